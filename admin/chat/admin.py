@@ -1,14 +1,28 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db import transaction
+from django.db.models import Q
 
+from .admin_filters import ModelNameListFilter, RangeListFilter, UsernameListFilter
+from .llm_backend import invalidate_training_context
 from .models import Conversation, LLMInteraction
+from .paginators import EstimatedCountPaginator
+from .search import search_interactions
+
+PENALTY_RANGES = (
+    ("< 0", None, 0),
+    ("0 – 1", 0, 1),
+    ("≥ 1", 1, None),
+)
 
 
 @admin.register(Conversation)
 class LLMConversationAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "user", "created_at", "updated_at")
-    list_filter = ("user", "created_at")
+    list_filter = (UsernameListFilter, "created_at")
     search_fields = ("title", "user__username")
     date_hierarchy = "created_at"
+    list_select_related = ("user",)
     readonly_fields = ("id", "user", "created_at", "updated_at", "title")
 
     def get_model_perms(self, request):
@@ -46,29 +60,56 @@ class LLMInteractionAdmin(admin.ModelAdmin):
         "feedback_comment",
         "include_in_training",
     )
+    # Numeric fields use fixed ranges and model names a cached list rather
+    # than Django's distinct-value filters, and users are entered by name.
+    # There is no conversation dropdown, which would list every
+    # conversation; filter with ?conversation__id__exact=<id> instead.
     list_filter = (
-        "model_name",
-        "temperature",
-        "top_p",
-        "frequency_penalty",
-        "presence_penalty",
+        ModelNameListFilter,
+        (
+            "temperature",
+            RangeListFilter.with_ranges(
+                ("< 0.3", None, 0.3),
+                ("0.3 – 0.7", 0.3, 0.7),
+                ("0.7 – 1.0", 0.7, 1.0),
+                ("≥ 1.0", 1.0, None),
+            ),
+        ),
+        (
+            "top_p",
+            RangeListFilter.with_ranges(
+                ("< 0.5", None, 0.5),
+                ("0.5 – 0.9", 0.5, 0.9),
+                ("≥ 0.9", 0.9, None),
+            ),
+        ),
+        ("frequency_penalty", RangeListFilter.with_ranges(*PENALTY_RANGES)),
+        ("presence_penalty", RangeListFilter.with_ranges(*PENALTY_RANGES)),
         "streamed",
         "timestamp",
-        "user",
-        "conversation",
-        "score",
+        UsernameListFilter,
+        (
+            "score",
+            RangeListFilter.with_ranges(
+                ("1 – 3", 1, 4),
+                ("4 – 6", 4, 7),
+                ("7 – 10", 7, 11),
+            ),
+        ),
         "include_in_training",
     )
-    search_fields = (
-        "prompt",
-        "response",
-        "model_name",
-        "user__username",
-        "conversation__title",
-        "comment",
-        "feedback_comment",
+    # Matched with LIKE next to the full-text index over prompts, responses
+    # and comments (see get_search_results)
+    search_fields = ("user__username", "model_name")
+    search_help_text = (
+        "Full-text search over prompts, responses and comments, best matches "
+        'first. Supports "quoted phrases", or, and -excluded words. Also '
+        "matches usernames and model names."
     )
-    date_hierarchy = "timestamp"
+    list_select_related = ("user", "conversation__user")
+    paginator = EstimatedCountPaginator
+    # Skip the unfiltered COUNT(*) shown next to filtered result counts
+    show_full_result_count = False
     readonly_fields = (
         "id",
         "user",
@@ -117,6 +158,23 @@ class LLMInteractionAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        field_matches, _ = super().get_search_results(request, queryset, search_term)
+        results = search_interactions(
+            queryset, search_term, also=Q(pk__in=field_matches.values("pk"))
+        )
+        # Best matches first unless a column sort was picked
+        if ORDER_VAR in request.GET:
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "include_in_training" in form.changed_data:
+            transaction.on_commit(lambda: invalidate_training_context(obj))
+
     def prompt_preview(self, obj):
         return obj.prompt[:50] + "..." if len(obj.prompt) > 50 else obj.prompt
 
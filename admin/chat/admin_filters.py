@@ -0,0 +1,147 @@
+from typing import Optional, Sequence, Tuple
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+Range = Tuple[str, Optional[float], Optional[float]]
+
+
+class RangeListFilter(admin.FieldListFilter):
+    """
+    List filter offering fixed value ranges for a numeric field.
+
+    Django's default filter for a plain field lists every distinct value,
+    which costs a SELECT DISTINCT over the whole table on each changelist
+    load. Ranges are declared up front, so rendering the filter needs no
+    query. Build a filter for a field with ``RangeListFilter.with_ranges``;
+    each range is ``(label, low, high)`` matching ``low <= value < high``,
+    where either bound may be None.
+    """
+
+    ranges: Sequence[Range] = ()
+
+    @classmethod
+    def with_ranges(cls, *ranges: Range):
+        return type(cls.__name__, (cls,), {"ranges": ranges})
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg_gte = f"{field_path}__gte"
+        self.lookup_kwarg_lt = f"{field_path}__lt"
+        self.lookup_kwarg_isnull = f"{field_path}__isnull"
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.current = {
+            key: str(value[-1] if isinstance(value, list) else value)
+            for key, value in self.used_parameters.items()
+        }
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg_gte, self.lookup_kwarg_lt, self.lookup_kwarg_isnull]
+
+    def _range_params(self, low, high):
+        params = {}
+        if low is not None:
+            params[self.lookup_kwarg_gte] = str(low)
+        if high is not None:
+            params[self.lookup_kwarg_lt] = str(high)
+        return params
+
+    def choices(self, changelist):
+        remove = self.expected_parameters()
+        yield {
+            "selected": not self.current,
+            "query_string": changelist.get_query_string(remove=remove),
+            "display": _("All"),
+        }
+        for label, low, high in self.ranges:
+            params = self._range_params(low, high)
+            yield {
+                "selected": self.current == params,
+                "query_string": changelist.get_query_string(params, remove),
+                "display": label,
+            }
+        if self.field.null:
+            params = {self.lookup_kwarg_isnull: "True"}
+            yield {
+                "selected": self.current == params,
+                "query_string": changelist.get_query_string(params, remove),
+                "display": _("Not set"),
+            }
+
+
+class CachedChoicesListFilter(admin.SimpleListFilter):
+    """
+    List filter on a field whose choices are its distinct values, cached.
+
+    The SELECT DISTINCT behind Django's field filter then runs once per
+    ``cache_timeout`` instead of on every changelist load, and at most
+    ``max_choices`` values are offered; others can still be selected through
+    the query string.
+    """
+
+    field_name = ""
+    cache_timeout = 600
+    max_choices = 50
+
+    def lookups(self, request, model_admin):
+        key = f"chat:admin:choices:{model_admin.model._meta.label}:{self.field_name}"
+        values = cache.get(key)
+        if values is None:
+            values = list(
+                model_admin.model.objects.order_by(self.field_name)
+                .values_list(self.field_name, flat=True)
+                .distinct()[: self.max_choices]
+            )
+            cache.set(key, values, self.cache_timeout)
+        return [(value, value) for value in values]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.field_name: self.value()})
+        return queryset
+
+
+class ModelNameListFilter(CachedChoicesListFilter):
+    title = _("model name")
+    parameter_name = field_name = "model_name"
+
+
+class InputListFilter(admin.SimpleListFilter):
+    """
+    List filter with a text box instead of a list of choices.
+
+    Suits foreign keys such as users, where Django's filter would render one
+    choice per row of the related table. Subclasses set ``lookup``, the
+    queryset lookup the entered value is matched with.
+    """
+
+    template = "admin/chat/input_filter.html"
+    lookup = ""
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup: self.value().strip()})
+        return queryset
+
+    def choices(self, changelist):
+        # The other active parameters, kept as hidden fields of the form
+        yield {
+            "query_parts": [
+                (name, value)
+                for name, values in changelist.filter_params.items()
+                if name != self.parameter_name
+                for value in values
+            ],
+        }
+
+
+class UsernameListFilter(InputListFilter):
+    title = _("username")
+    parameter_name = "username"
+    lookup = "user__username"
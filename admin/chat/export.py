@@ -0,0 +1,307 @@
+import datetime
+import hashlib
+import io
+import json
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import CharField, Func, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import LLMInteraction
+
+EXPORT_FORMATS = ("jsonl", "parquet")
+# Rows fetched per database round trip (server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 2000
+# Rows buffered per Parquet row group before it is flushed to the output
+PARQUET_ROW_GROUP_SIZE = 10_000
+# JSONL lines are joined into chunks of about this many bytes for streaming
+JSONL_CHUNK_BYTES = 64 * 1024
+# Prompts remembered for deduplication where it cannot run in SQL (not
+# PostgreSQL); past this many, a prompt is only compared with the most
+# recently seen ones
+DEDUP_MAX_PROMPTS = 200_000
+EXPORT_FIELDS = (
+    "id",
+    "conversation_id",
+    "model_name",
+    "prompt",
+    "response",
+    "context",
+    "score",
+    "timestamp",
+)
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """Parse an ISO datetime or date (midnight) in the current time zone."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date or datetime: {value!r}")
+        parsed = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def training_queryset(
+    model_name: Optional[str] = None,
+    user_id: Optional[int] = None,
+    conversation_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+    min_score: Optional[int] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    since_id: Optional[int] = None,
+):
+    """Curated interactions matching the export filters, oldest id first."""
+    queryset = LLMInteraction.objects.filter(include_in_training=True)
+    if model_name:
+        queryset = queryset.filter(model_name=model_name)
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+    if session_id:
+        queryset = queryset.filter(session_id=session_id)
+    if min_score is not None:
+        queryset = queryset.filter(score__gte=min_score)
+    if since is not None:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until is not None:
+        queryset = queryset.filter(timestamp__lt=until)
+    if since_id is not None:
+        queryset = queryset.filter(id__gt=since_id)
+    return queryset.order_by("id")
+
+
+def prompt_hash(prompt: str) -> str:
+    """Hash of a prompt with whitespace normalized, used for deduplication."""
+    normalized = " ".join(prompt.split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+class NormalizedPromptHash(Func):
+    """PostgreSQL md5 of a prompt with whitespace normalized as in prompt_hash."""
+
+    template = "md5(btrim(regexp_replace(%(expressions)s, '\\s+', ' ', 'g')))"
+    output_field = CharField()
+
+
+class _RecentHashes:
+    """Set of at most ``size`` prompt digests, forgetting the least recent."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._digests: "OrderedDict[bytes, None]" = OrderedDict()
+
+    def seen(self, digest: bytes) -> bool:
+        """Whether ``digest`` was seen before; remembers it either way."""
+        if digest in self._digests:
+            self._digests.move_to_end(digest)
+            return True
+        self._digests[digest] = None
+        if len(self._digests) > self.size:
+            self._digests.popitem(last=False)
+        return False
+
+
+def chat_messages(row: Dict, include_context: bool = True) -> List[Dict[str, str]]:
+    """The interaction as chat messages: prior context, prompt, response."""
+    messages = []
+    if include_context:
+        for message in row["context"] or []:
+            if not isinstance(message, dict):
+                continue
+            role, content = message.get("role"), message.get("content")
+            if isinstance(role, str) and isinstance(content, str):
+                messages.append({"role": role, "content": content})
+    messages.append({"role": "user", "content": row["prompt"]})
+    messages.append({"role": "assistant", "content": row["response"]})
+    return messages
+
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "Parquet export requires pyarrow (pip install pyarrow)"
+        ) from exc
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_available() -> bool:
+    try:
+        _parquet()
+    except ImproperlyConfigured:
+        return False
+    return True
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back out via ``drain``."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class TrainingExport:
+    """
+    Stream a training dataset from curated interactions.
+
+    The export is pinned to the highest matching id when it is created:
+    ``watermark`` is that id (or ``since_id`` when nothing matched), so
+    passing it back as ``since_id`` continues with rows added afterwards.
+    The watermark is insert-only: an older interaction curated after an
+    export has a lower id and is only included by a full export.
+    Rows are read with ``.iterator()`` in ``chunk_size`` batches and
+    written out as they arrive, so memory does not grow with the table.
+    With ``dedup`` only the first interaction per prompt is kept: PostgreSQL
+    selects the lowest id per normalized prompt hash in SQL, elsewhere
+    prompts are compared with the last DEDUP_MAX_PROMPTS distinct ones.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        dedup: bool = True,
+        include_context: bool = True,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+        since_id: Optional[int] = None,
+    ):
+        last_id = queryset.aggregate(last_id=Max("id"))["last_id"]
+        self.queryset = (
+            queryset.filter(id__lte=last_id) if last_id is not None else queryset.none()
+        )
+        self.watermark = last_id if last_id is not None else since_id
+        self.dedup = dedup
+        self.include_context = include_context
+        self.chunk_size = chunk_size
+        self.exported = 0
+        self.duplicates = 0
+
+    def rows(self) -> Iterator[Dict]:
+        queryset, recent = self.queryset, None
+        in_sql = connections[queryset.db].vendor == "postgresql"
+        if self.dedup and in_sql:
+            first_ids = (
+                queryset.order_by()
+                .values(normalized_hash=NormalizedPromptHash("prompt"))
+                .annotate(first_id=Min("id"))
+                .values("first_id")
+            )
+            queryset = queryset.filter(id__in=first_ids)
+        elif self.dedup:
+            recent = _RecentHashes(DEDUP_MAX_PROMPTS)
+        rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=self.chunk_size)
+        for row in rows:
+            row["prompt_hash"] = prompt_hash(row["prompt"])
+            if recent is not None and recent.seen(bytes.fromhex(row["prompt_hash"])):
+                self.duplicates += 1
+                continue
+            self.exported += 1
+            yield row
+        if self.dedup and in_sql:
+            self.duplicates = self.queryset.count() - self.exported
+
+    def records(self) -> Iterator[Dict]:
+        for row in self.rows():
+            yield {
+                "messages": chat_messages(row, self.include_context),
+                "metadata": {
+                    "id": row["id"],
+                    "conversation_id": row["conversation_id"],
+                    "model_name": row["model_name"],
+                    "score": row["score"],
+                    "timestamp": row["timestamp"],
+                    "prompt_hash": row["prompt_hash"],
+                },
+            }
+
+    def jsonl(self) -> Iterator[bytes]:
+        """One ``{"messages": [...], "metadata": {...}}`` object per line."""
+        buffer, size = [], 0
+        for record in self.records():
+            line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+            line = (line + "\n").encode()
+            buffer.append(line)
+            size += len(line)
+            if size >= JSONL_CHUNK_BYTES:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+    def parquet(self, row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> Iterator[bytes]:
+        """A Parquet file written one row group at a time."""
+        pa, pq = _parquet()
+        message = pa.struct([("role", pa.string()), ("content", pa.string())])
+        schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("conversation_id", pa.int64()),
+                ("model_name", pa.string()),
+                ("score", pa.int64()),
+                ("timestamp", pa.timestamp("us", tz="UTC")),
+                ("prompt_hash", pa.string()),
+                ("messages", pa.list_(message)),
+            ]
+        )
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        columns = {name: [] for name in schema.names}
+
+        def flush():
+            writer.write_table(pa.table(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+            return sink.drain()
+
+        try:
+            for record in self.records():
+                metadata = record["metadata"]
+                for name in schema.names[:-1]:
+                    columns[name].append(metadata[name])
+                columns["messages"].append(record["messages"])
+                if len(columns["id"]) >= row_group_size:
+                    yield flush()
+            if columns["id"]:
+                yield flush()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def stream(self, fmt: str) -> Iterator[bytes]:
+        if fmt == "jsonl":
+            return self.jsonl()
+        if fmt == "parquet":
+            return self.parquet()
+        raise ValueError(
+            f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}"
+        )
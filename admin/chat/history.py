@@ -0,0 +1,113 @@
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, ConversationMessage, LLMInteraction
+
+# Messages returned per request by the conversation history endpoint
+HISTORY_DEFAULT_LIMIT = 200
+HISTORY_MAX_LIMIT = 1000
+
+
+def interaction_messages(interaction, position: int):
+    """The user and assistant messages of one interaction, starting at ``position``."""
+    return [
+        ConversationMessage(
+            conversation_id=interaction.conversation_id,
+            position=position,
+            role="user",
+            content=interaction.prompt,
+            interaction=interaction,
+        ),
+        ConversationMessage(
+            conversation_id=interaction.conversation_id,
+            position=position + 1,
+            role="assistant",
+            content=interaction.response,
+            interaction=interaction,
+        ),
+    ]
+
+
+def append_interactions(interactions) -> int:
+    """
+    Append the prompt and response of saved interactions to their
+    conversations' history, in the order given.
+
+    Must run inside a transaction: the conversations are locked so that
+    concurrent writers cannot claim the same positions. Interactions that
+    already have messages, such as a redelivery that raced the original, are
+    skipped. Costs a fixed number of queries however many interactions and
+    conversations are involved.
+    """
+    interactions = [i for i in interactions if i.conversation_id is not None]
+    if not interactions:
+        return 0
+    conversation_ids = sorted({i.conversation_id for i in interactions})
+    # Lock in id order so concurrent batches cannot deadlock
+    list(
+        Conversation.objects.select_for_update()
+        .filter(id__in=conversation_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    appended = set(
+        ConversationMessage.objects.filter(
+            interaction__in=[i.pk for i in interactions]
+        ).values_list("interaction_id", flat=True)
+    )
+    interactions = [i for i in interactions if i.pk not in appended]
+    next_position = {
+        row["conversation_id"]: row["last"] + 1
+        for row in ConversationMessage.objects.filter(
+            conversation_id__in=conversation_ids
+        )
+        .values("conversation_id")
+        .annotate(last=Max("position"))
+    }
+    messages = []
+    for interaction in interactions:
+        position = next_position.get(interaction.conversation_id, 0)
+        messages.extend(interaction_messages(interaction, position))
+        next_position[interaction.conversation_id] = position + 2
+    ConversationMessage.objects.bulk_create(messages, batch_size=500)
+    Conversation.objects.filter(id__in=conversation_ids).update(
+        updated_at=timezone.now()
+    )
+    return len(messages)
+
+
+def _per_conversation(queryset, aggregate):
+    """Correlated subquery computing ``aggregate`` over one conversation's rows."""
+    return Subquery(
+        queryset.filter(conversation=OuterRef("pk"))
+        .order_by()
+        .values("conversation")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def with_stats(queryset):
+    """
+    Annotate conversations with message_count, interaction_count,
+    total_tokens and last_activity, computed in SQL.
+
+    Each aggregate is its own correlated subquery, so counting messages and
+    summing interactions never multiply each other's rows in a join.
+    """
+    interactions = LLMInteraction.objects.all()
+    return queryset.annotate(
+        message_count=Coalesce(
+            _per_conversation(ConversationMessage.objects.all(), Count("id")), 0
+        ),
+        interaction_count=Coalesce(_per_conversation(interactions, Count("id")), 0),
+        total_tokens=Coalesce(
+            _per_conversation(
+                interactions,
+                Sum(Coalesce("prompt_tokens", 0) + Coalesce("completion_tokens", 0)),
+            ),
+            0,
+        ),
+        last_activity=_per_conversation(interactions, Max("timestamp")),
+    )
@@ -0,0 +1,27 @@
+import logging
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_training_context(interaction):
+    """
+    Tell the FastAPI backend to drop training context cached for this interaction.
+
+    Best effort: the request reaches one backend worker, and the others serve
+    their cached context until its TTL expires.
+    """
+    try:
+        requests.post(
+            f"{settings.LLM_BACKEND_URL}/api/training-context/invalidate",
+            json={
+                "user_id": interaction.user_id,
+                "session_id": interaction.session_id,
+                "conversation_id": interaction.conversation_id,
+            },
+            timeout=2,
+        )
+    except requests.RequestException as e:
+        logger.warning("Failed to invalidate training context cache: %s", e)
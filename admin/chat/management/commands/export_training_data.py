@@ -0,0 +1,117 @@
+import json
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    TrainingExport,
+    parse_timestamp,
+    training_queryset,
+)
+
+
+def _timestamp(value):
+    try:
+        return parse_timestamp(value)
+    except ValueError as exc:
+        raise CommandError(str(exc))
+
+
+class Command(BaseCommand):
+    help = (
+        "Export curated interactions (include_in_training=True) as a chat-format "
+        "JSONL or Parquet training dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Output file, '-' for stdout (JSONL only). Default: -",
+        )
+        parser.add_argument("--model", dest="model_name")
+        parser.add_argument("--user", dest="user_id", type=int)
+        parser.add_argument("--conversation", dest="conversation_id", type=int)
+        parser.add_argument("--session", dest="session_id")
+        parser.add_argument("--min-score", type=int)
+        parser.add_argument("--since", help="Only rows logged at or after this date")
+        parser.add_argument("--until", help="Only rows logged before this date")
+        parser.add_argument(
+            "--since-id", type=int, help="Only rows with a greater id (watermark)"
+        )
+        parser.add_argument(
+            "--watermark-file",
+            help="JSON file holding the last exported id. Read as --since-id "
+            "and updated after a successful export, for incremental exports. "
+            "The watermark follows new rows only: interactions curated after "
+            "an export need a full export to be picked up.",
+        )
+        parser.add_argument(
+            "--no-dedup",
+            dest="dedup",
+            action="store_false",
+            help="Keep every interaction, not only the first per prompt",
+        )
+        parser.add_argument(
+            "--no-context",
+            dest="include_context",
+            action="store_false",
+            help="Export only the prompt and response, without prior turns",
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        output = options["output"]
+        if fmt == "parquet" and output == "-":
+            raise CommandError("Parquet export needs --output")
+
+        since_id = options["since_id"]
+        watermark_file = options["watermark_file"]
+        if since_id is None and watermark_file and os.path.exists(watermark_file):
+            with open(watermark_file) as f:
+                since_id = json.load(f).get("last_id")
+
+        queryset = training_queryset(
+            model_name=options["model_name"],
+            user_id=options["user_id"],
+            conversation_id=options["conversation_id"],
+            session_id=options["session_id"],
+            min_score=options["min_score"],
+            since=_timestamp(options["since"]) if options["since"] else None,
+            until=_timestamp(options["until"]) if options["until"] else None,
+            since_id=since_id,
+        )
+        export = TrainingExport(
+            queryset,
+            dedup=options["dedup"],
+            include_context=options["include_context"],
+            chunk_size=max(1, options["chunk_size"]),
+            since_id=since_id,
+        )
+
+        try:
+            if output == "-":
+                # JSONL chunks end on line boundaries, so each decodes alone
+                for chunk in export.stream(fmt):
+                    self.stdout.write(chunk.decode(), ending="")
+                self.stdout.flush()
+            else:
+                with open(output, "wb") as f:
+                    for chunk in export.stream(fmt):
+                        f.write(chunk)
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+
+        if watermark_file:
+            with open(watermark_file, "w") as f:
+                json.dump({"last_id": export.watermark}, f)
+        self.stderr.write(
+            f"Exported {export.exported} interactions "
+            f"({export.duplicates} duplicate prompts skipped), "
+            f"watermark {export.watermark}"
+        )
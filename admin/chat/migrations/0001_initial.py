@@ -0,0 +1,97 @@
+# Generated by Django 5.0.2 on 2026-10-17 06:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Conversation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("title", models.CharField(blank=True, max_length=255)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-updated_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="LLMInteraction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("prompt", models.TextField()),
+                ("response", models.TextField()),
+                ("model_name", models.CharField(max_length=100)),
+                ("temperature", models.FloatField(default=0.7)),
+                ("top_p", models.FloatField(blank=True, null=True)),
+                ("frequency_penalty", models.FloatField(blank=True, null=True)),
+                ("presence_penalty", models.FloatField(blank=True, null=True)),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                ("context", models.JSONField(blank=True, null=True)),
+                ("retrieved_documents", models.JSONField(blank=True, null=True)),
+                ("streamed", models.BooleanField(default=False)),
+                ("rating", models.IntegerField(blank=True, null=True)),
+                ("thumbs_up", models.BooleanField(blank=True, null=True)),
+                ("comment", models.TextField(blank=True, null=True)),
+                ("session_id", models.CharField(blank=True, max_length=255, null=True)),
+                ("score", models.IntegerField(blank=True, null=True)),
+                ("feedback_comment", models.TextField(blank=True, null=True)),
+                ("include_in_training", models.BooleanField(default=False)),
+                (
+                    "conversation",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="chat.conversation",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-timestamp"],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-17 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(
+                condition=models.Q(("include_in_training", True)),
+                fields=["user", "id"],
+                name="llmi_training_user_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(
+                condition=models.Q(("include_in_training", True)),
+                fields=["session_id", "id"],
+                name="llmi_training_session_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(
+                condition=models.Q(("include_in_training", True)),
+                fields=["conversation", "id"],
+                name="llmi_training_conv_idx",
+            ),
+        ),
+    ]
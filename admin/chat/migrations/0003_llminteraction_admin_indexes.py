@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-17 06:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_training_context_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(fields=["timestamp"], name="llmi_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(fields=["model_name"], name="llmi_model_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(
+                fields=["conversation", "timestamp"], name="llmi_conv_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(fields=["session_id"], name="llmi_session_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="llminteraction",
+            index=models.Index(
+                fields=["include_in_training", "timestamp"],
+                name="llmi_training_timestamp_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.0.2 on 2026-10-17 06:52
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+POSTGRES_TRIGGER = """
+CREATE FUNCTION chat_llminteraction_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.prompt, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.response, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.comment, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.feedback_comment, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER chat_llminteraction_search_vector_update
+BEFORE INSERT OR UPDATE OF prompt, response, comment, feedback_comment
+ON chat_llminteraction
+FOR EACH ROW EXECUTE FUNCTION chat_llminteraction_search_vector();
+"""
+# Existing rows are backfilled in batches by 0008_backfill_search_vector
+
+POSTGRES_TRIGGER_REVERSE = """
+DROP TRIGGER IF EXISTS chat_llminteraction_search_vector_update ON chat_llminteraction;
+DROP FUNCTION IF EXISTS chat_llminteraction_search_vector();
+"""
+
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE chat_llminteraction_fts USING fts5(
+        prompt, response, comment, feedback_comment,
+        content='chat_llminteraction', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER chat_llminteraction_fts_insert AFTER INSERT ON chat_llminteraction
+    BEGIN
+        INSERT INTO chat_llminteraction_fts(rowid, prompt, response, comment, feedback_comment)
+        VALUES (new.id, new.prompt, new.response, new.comment, new.feedback_comment);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_llminteraction_fts_delete AFTER DELETE ON chat_llminteraction
+    BEGIN
+        INSERT INTO chat_llminteraction_fts(
+            chat_llminteraction_fts, rowid, prompt, response, comment, feedback_comment
+        )
+        VALUES ('delete', old.id, old.prompt, old.response, old.comment, old.feedback_comment);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_llminteraction_fts_update AFTER UPDATE ON chat_llminteraction
+    BEGIN
+        INSERT INTO chat_llminteraction_fts(
+            chat_llminteraction_fts, rowid, prompt, response, comment, feedback_comment
+        )
+        VALUES ('delete', old.id, old.prompt, old.response, old.comment, old.feedback_comment);
+        INSERT INTO chat_llminteraction_fts(rowid, prompt, response, comment, feedback_comment)
+        VALUES (new.id, new.prompt, new.response, new.comment, new.feedback_comment);
+    END
+    """,
+    "INSERT INTO chat_llminteraction_fts(chat_llminteraction_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_REVERSE = [
+    "DROP TRIGGER IF EXISTS chat_llminteraction_fts_insert",
+    "DROP TRIGGER IF EXISTS chat_llminteraction_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_llminteraction_fts_update",
+    "DROP TABLE IF EXISTS chat_llminteraction_fts",
+]
+
+
+def install_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_TRIGGER)
+    elif vendor == "sqlite":
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def remove_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_TRIGGER_REVERSE)
+    elif vendor == "sqlite":
+        for statement in SQLITE_FTS_REVERSE:
+            schema_editor.execute(statement)
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """AddIndex for index types (GIN) that only exist on PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0003_llminteraction_admin_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="llminteraction",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        AddPostgresIndex(
+            model_name="llminteraction",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="llmi_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(install_search, remove_search),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.0.2 on 2026-10-17 06:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_messages(apps, schema_editor):
+    """Rebuild the history of existing conversations from their interactions."""
+    LLMInteraction = apps.get_model("chat", "LLMInteraction")
+    ConversationMessage = apps.get_model("chat", "ConversationMessage")
+    interactions = (
+        LLMInteraction.objects.filter(conversation__isnull=False)
+        .order_by("conversation_id", "id")
+        .values_list("id", "conversation_id", "prompt", "response")
+        .iterator(chunk_size=BACKFILL_BATCH_SIZE)
+    )
+    batch = []
+    current, position = None, 0
+    for interaction_id, conversation_id, prompt, response in interactions:
+        if conversation_id != current:
+            current, position = conversation_id, 0
+        for role, content in (("user", prompt), ("assistant", response)):
+            batch.append(
+                ConversationMessage(
+                    conversation_id=conversation_id,
+                    position=position,
+                    role=role,
+                    content=content,
+                    interaction_id=interaction_id,
+                )
+            )
+            position += 1
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ConversationMessage.objects.bulk_create(batch)
+            batch = []
+    ConversationMessage.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_llminteraction_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversationMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("role", models.CharField(max_length=20)),
+                ("content", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "conversation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="messages",
+                        to="chat.conversation",
+                    ),
+                ),
+                (
+                    "interaction",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="chat.llminteraction",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["conversation_id", "position"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="conversationmessage",
+            constraint=models.UniqueConstraint(
+                fields=("conversation", "position"),
+                name="conversation_message_position",
+            ),
+        ),
+        migrations.RunPython(backfill_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-17 07:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_conversationmessage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="llminteraction",
+            name="completion_tokens",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="llminteraction",
+            name="prompt_tokens",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "-updated_at", "-id"], name="conv_user_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-17 07:10
+
+import importlib
+
+from django.db import migrations, models
+
+search_vector = importlib.import_module(
+    "chat.migrations.0004_llminteraction_search_vector"
+)
+
+
+def restore_sqlite_fts_triggers(apps, schema_editor):
+    # SQLite adds a unique column by rebuilding the table, which drops the
+    # full-text search triggers installed by 0004
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in search_vector.SQLITE_FTS[1:]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_conversation_pagination"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_fts_triggers),
+        migrations.AddField(
+            model_name="llminteraction",
+            name="idempotency_key",
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(restore_sqlite_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Rows updated per transaction
+BATCH_SIZE = 5000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """
+    Fill search_vector for rows stored before the 0004 trigger existed.
+
+    Touching ``prompt`` fires the trigger. The migration is not atomic, so
+    each batch commits on its own and never holds locks on the whole table;
+    an interrupted run resumes where it stopped, as filled rows are skipped.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                "SELECT max(id) FROM (SELECT id FROM chat_llminteraction "
+                "WHERE id > %s ORDER BY id LIMIT %s) AS batch",
+                [last_id, BATCH_SIZE],
+            )
+            (upper,) = cursor.fetchone()
+            if upper is None:
+                return
+            cursor.execute(
+                "UPDATE chat_llminteraction SET prompt = prompt "
+                "WHERE id > %s AND id <= %s AND search_vector IS NULL",
+                [last_id, upper],
+            )
+            last_id = upper
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("chat", "0007_llminteraction_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
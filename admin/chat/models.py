@@ -1,4 +1,6 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import JSONField
 
@@ -11,9 +13,52 @@ class Conversation(models.Model):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # Keyset pagination of a user's conversations, most recent first
+            models.Index(
+                fields=["user", "-updated_at", "-id"], name="conv_user_updated_idx"
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.title or 'Untitled'} - {self.user.username}"
+        # Only name the user when it is already loaded, so listing
+        # conversations never costs a query per row
+        if Conversation.user.is_cached(self):
+            return f"{self.title or 'Untitled'} - {self.user.username}"
+        return f"{self.title or 'Untitled'} - user {self.user_id}"
+
+
+class ConversationMessage(models.Model):
+    """
+    One message of a conversation's history, in order.
+
+    Written by the admin when an interaction is logged with a conversation
+    (see chat/history.py), so the backend can rebuild the context of a turn
+    without the client resending it.
+    """
+
+    conversation = models.ForeignKey(
+        Conversation, related_name="messages", on_delete=models.CASCADE
+    )
+    position = models.PositiveIntegerField()
+    role = models.CharField(max_length=20)
+    content = models.TextField()
+    interaction = models.ForeignKey(
+        "LLMInteraction", null=True, blank=True, on_delete=models.SET_NULL
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["conversation_id", "position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["conversation", "position"],
+                name="conversation_message_position",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.conversation_id}#{self.position} {self.role}"
 
 
 class LLMInteraction(models.Model):
@@ -40,9 +85,50 @@ class LLMInteraction(models.Model):
     score = models.IntegerField(null=True, blank=True)
     feedback_comment = models.TextField(null=True, blank=True)
     include_in_training = models.BooleanField(default=False)
+    # Token usage reported by Ollama for the generation
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
+    # Generated by the client for each interaction, so a batch that is
+    # retried or replayed from the spool is stored only once
+    idempotency_key = models.UUIDField(null=True, blank=True, unique=True)
+    # Weighted tsvector of prompt, response and comments, maintained by a
+    # database trigger (see migration 0004 and chat/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # Admin changelist: default ordering, date filter and the most
+            # common filters
+            models.Index(fields=["timestamp"], name="llmi_timestamp_idx"),
+            models.Index(fields=["model_name"], name="llmi_model_name_idx"),
+            models.Index(
+                fields=["conversation", "timestamp"], name="llmi_conv_timestamp_idx"
+            ),
+            models.Index(fields=["session_id"], name="llmi_session_idx"),
+            models.Index(
+                fields=["include_in_training", "timestamp"],
+                name="llmi_training_timestamp_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="llmi_search_vector_idx"),
+            # Back the training-context endpoint, which only reads curated rows
+            # filtered by one of these columns and paginated by id.
+            models.Index(
+                fields=["user", "id"],
+                condition=models.Q(include_in_training=True),
+                name="llmi_training_user_idx",
+            ),
+            models.Index(
+                fields=["session_id", "id"],
+                condition=models.Q(include_in_training=True),
+                name="llmi_training_session_idx",
+            ),
+            models.Index(
+                fields=["conversation", "id"],
+                condition=models.Q(include_in_training=True),
+                name="llmi_training_conv_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.model_name} | {self.prompt[:30]}... -> {self.response[:30]}..."
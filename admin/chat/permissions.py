@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+# Header carrying the token shared with the FastAPI backend
+SERVICE_TOKEN_HEADER = "X-Service-Token"
+
+
+class IsInternalService(BasePermission):
+    """
+    Allow the FastAPI backend, identified by INTERNAL_SERVICE_TOKEN in the
+    X-Service-Token header, and authenticated staff users.
+
+    With no token configured only staff users are let in.
+    """
+
+    def has_permission(self, request, view):
+        token = settings.INTERNAL_SERVICE_TOKEN
+        supplied = request.headers.get(SERVICE_TOKEN_HEADER, "")
+        if token and supplied and hmac.compare_digest(token, supplied):
+            return True
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_staff)
@@ -0,0 +1,92 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+# Text search configuration of the search_vector column and its trigger
+SEARCH_CONFIG = "english"
+# Columns covered by full-text search, with PostgreSQL weights A-D
+SEARCH_WEIGHTS = {
+    "prompt": "A",
+    "response": "B",
+    "comment": "C",
+    "feedback_comment": "C",
+}
+# FTS5 table used instead of search_vector on SQLite (tests, local runs)
+FTS_TABLE = "chat_llminteraction_fts"
+# bm25 column weights mirroring PostgreSQL's default A/B/C weights
+FTS_WEIGHTS = (1.0, 0.4, 0.2, 0.2)
+
+
+def fts_match(query: str) -> str:
+    """Quote each word so user input cannot break FTS5 query syntax."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def _no_results(queryset):
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+
+def search_interactions(queryset, query: str, also: Q = Q()):
+    """
+    Full-text search ``queryset`` of LLMInteractions, best matches first.
+
+    Rows are annotated with ``rank`` (higher is better). PostgreSQL matches
+    the trigger-maintained ``search_vector`` column (GIN indexed) with
+    ``websearch_to_tsquery``, so quoted phrases, ``or`` and ``-term`` work.
+    SQLite uses an FTS5 index kept in sync by triggers; other databases
+    fall back to unranked substring matching. Rows matching ``also`` are
+    returned as well, ranked after text matches.
+    """
+    query = query.strip()
+    if not query:
+        return _no_results(queryset)
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(Q(search_vector=search_query) | also)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "-timestamp")
+        )
+    if vendor == "sqlite":
+        match = fts_match(query)
+        if not match:
+            return _no_results(queryset)
+        table = queryset.model._meta.db_table
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        return (
+            queryset.filter(
+                Q(
+                    id__in=RawSQL(
+                        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                        (match,),
+                    )
+                )
+                | also
+            )
+            .annotate(
+                rank=Coalesce(
+                    RawSQL(
+                        f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                        f"WHERE {FTS_TABLE} MATCH %s "
+                        f"AND {FTS_TABLE}.rowid = {table}.id",
+                        (match,),
+                        output_field=FloatField(),
+                    ),
+                    0.0,
+                )
+            )
+            .order_by("-rank", "-timestamp")
+        )
+    condition = also
+    for field in SEARCH_WEIGHTS:
+        condition |= Q(**{f"{field}__icontains": query})
+    return (
+        queryset.filter(condition)
+        .annotate(rank=Value(0.0, output_field=FloatField()))
+        .order_by("-timestamp")
+    )
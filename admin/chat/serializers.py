@@ -1,19 +1,51 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from .models import LLMInteraction
+from .models import Conversation, LLMInteraction
 
 
 class LLMInteractionSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), required=False, allow_null=True
     )
+    conversation = serializers.PrimaryKeyRelatedField(
+        queryset=Conversation.objects.all(), required=False, allow_null=True
+    )
 
     class Meta:
         model = LLMInteraction
-        fields = "__all__"
+        exclude = ("search_vector",)
         read_only_fields = (
             "id",
             "timestamp",
-            "conversation",
         )
+        # Redeliveries are expected and handled by the views, not rejected
+        extra_kwargs = {"idempotency_key": {"validators": []}}
+
+
+class LLMInteractionBulkSerializer(LLMInteractionSerializer):
+    """
+    Validate one item of a bulk ingest without per-item database lookups.
+
+    Foreign keys are checked against the id sets the view preloads into the
+    serializer context, so validating N items costs two queries in total.
+    """
+
+    user = serializers.IntegerField(required=False, allow_null=True, source="user_id")
+    conversation = serializers.IntegerField(
+        required=False, allow_null=True, source="conversation_id"
+    )
+
+    def validate_user(self, value):
+        if value is not None and value not in self.context["user_ids"]:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
+
+    def validate_conversation(self, value):
+        if value is not None and value not in self.context["conversation_ids"]:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
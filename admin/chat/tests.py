@@ -1,11 +1,25 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import uuid
+from unittest import skipUnless
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.management import call_command
 from django.db import connection
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from .models import Conversation, LLMInteraction
+from .export import parquet_available
+from .models import Conversation, ConversationMessage, LLMInteraction
+from .paginators import EstimatedCountPaginator, estimated_count
 
 # Create your tests here.
 
@@ -52,7 +66,7 @@ class ChatViewsTest(TestCase):
         list_url = reverse("list_conversations")
         resp2 = self.client.get(list_url)
         self.assertEqual(resp2.status_code, 200)
-        self.assertTrue(any(c["id"] == conv_id for c in resp2.json()))
+        self.assertTrue(any(c["id"] == conv_id for c in resp2.json()["results"]))
 
     def test_get_conversation(self):
         conv = Conversation.objects.create(user=self.user, title="Test")
@@ -86,3 +100,687 @@ class ChatViewsTest(TestCase):
         self.assertEqual(interaction.prompt, data["prompt"])
         self.assertEqual(interaction.response, data["response"])
         self.assertEqual(interaction.session_id, data["session_id"])
+
+
+class BulkLogLLMInteractionTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="bulkuser", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="Bulk")
+        self.url = reverse("bulk_log_llm_interactions")
+
+    def interaction(self, **overrides):
+        data = {
+            "prompt": "Hello",
+            "response": "Hi",
+            "model_name": "mistral",
+            "temperature": 0.7,
+            "streamed": True,
+            "session_id": "bulk-session",
+            "user": self.user.id,
+            "conversation": self.conversation.id,
+        }
+        data.update(overrides)
+        return data
+
+    def test_bulk_create_from_json_list(self):
+        items = [self.interaction(prompt=f"p{i}") for i in range(20)]
+        # Two foreign key lookups, the already-delivered keys, one INSERT and
+        # reading back its ids, and five queries appending the conversation
+        # history, wrapped in a savepoint
+        with self.assertNumQueries(12):
+            resp = self.client.post(self.url, items, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json(), {"created": 20, "duplicates": 0, "errors": []})
+        self.assertEqual(
+            LLMInteraction.objects.filter(conversation=self.conversation).count(), 20
+        )
+
+    def test_bulk_create_from_ndjson(self):
+        body = "\n".join(json.dumps(self.interaction(prompt=f"p{i}")) for i in range(3))
+        resp = self.client.post(
+            self.url, data=body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(LLMInteraction.objects.count(), 3)
+
+    def test_invalid_items_are_reported_per_index(self):
+        items = [
+            self.interaction(),
+            self.interaction(user=999999),
+            self.interaction(prompt=None),
+        ]
+        resp = self.client.post(self.url, items, format="json")
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.json()["created"], 1)
+        self.assertEqual([e["index"] for e in resp.json()["errors"]], [1, 2])
+        self.assertEqual(LLMInteraction.objects.count(), 1)
+
+    def test_redelivered_items_are_stored_once(self):
+        keys = [str(uuid.uuid4()) for _ in range(3)]
+        first = [
+            self.interaction(prompt=f"p{i}", idempotency_key=keys[i]) for i in range(2)
+        ]
+        self.client.post(self.url, first, format="json")
+
+        # A retried batch overlapping the first, with a key repeated inside it
+        retry = first + [self.interaction(prompt="p2", idempotency_key=keys[2])] * 2
+        resp = self.client.post(self.url, retry, format="json")
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json(), {"created": 1, "duplicates": 3, "errors": []})
+        self.assertEqual(LLMInteraction.objects.count(), 3)
+        self.assertEqual(
+            ConversationMessage.objects.filter(conversation=self.conversation).count(),
+            6,
+        )
+
+    def test_single_log_redelivery_returns_the_stored_row(self):
+        data = self.interaction(idempotency_key=str(uuid.uuid4()))
+        url = reverse("log_llm_interaction")
+        first = self.client.post(url, data, format="json")
+        again = self.client.post(url, data, format="json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["id"], first.json()["id"])
+        self.assertEqual(LLMInteraction.objects.count(), 1)
+
+
+@override_settings(INTERNAL_SERVICE_TOKEN="service-secret")
+class ConversationHistoryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient(HTTP_X_SERVICE_TOKEN="service-secret")
+        self.user = User.objects.create_user(username="historyuser", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="H")
+        self.other = Conversation.objects.create(user=self.user, title="Other")
+
+    def log(self, *items):
+        resp = self.client.post(
+            reverse("bulk_log_llm_interactions"),
+            [
+                {
+                    "prompt": prompt,
+                    "response": f"re: {prompt}",
+                    "model_name": "mistral",
+                    "conversation": conversation,
+                }
+                for prompt, conversation in items
+            ],
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 201)
+
+    def history(self, conversation, **params):
+        url = reverse("conversation_messages", args=[conversation.id])
+        return self.client.get(url, params).json()
+
+    def test_logged_interactions_append_ordered_messages(self):
+        self.log(("one", self.conversation.id), ("a", self.other.id), ("b", None))
+        self.log(("two", self.conversation.id))
+        resp = self.client.post(
+            reverse("log_llm_interaction"),
+            {
+                "prompt": "three",
+                "response": "re: three",
+                "model_name": "mistral",
+                "conversation": self.conversation.id,
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 201)
+
+        results = self.history(self.conversation)["results"]
+        self.assertEqual([m["position"] for m in results], list(range(6)))
+        self.assertEqual(
+            [(m["role"], m["content"]) for m in results[-2:]],
+            [("user", "three"), ("assistant", "re: three")],
+        )
+        self.assertEqual(len(self.history(self.other)["results"]), 2)
+        self.assertEqual(ConversationMessage.objects.count(), 8)
+        message = ConversationMessage.objects.get(conversation=self.other, position=0)
+        self.assertEqual(message.interaction.prompt, "a")
+
+    def test_history_pages_backwards_from_the_latest_message(self):
+        self.log(*[(f"p{i}", self.conversation.id) for i in range(3)])
+        page = self.history(self.conversation, limit=4)
+        self.assertEqual([m["position"] for m in page["results"]], [2, 3, 4, 5])
+        older = self.history(self.conversation, limit=4, before=page["next_cursor"])
+        self.assertEqual([m["position"] for m in older["results"]], [0, 1])
+        self.assertIsNone(older["next_cursor"])
+        url = reverse("conversation_messages", args=[self.conversation.id])
+        self.assertEqual(self.client.get(url, {"limit": "x"}).status_code, 400)
+        self.assertEqual(APIClient().get(url).status_code, 403)
+
+
+class ConversationListDetailTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="heavy", password="pass")
+        self.client.force_authenticate(user=self.user)
+        other = User.objects.create_user(username="other", password="pass")
+        Conversation.objects.create(user=other, title="not mine")
+        self.conversations = [
+            Conversation.objects.create(user=self.user, title=f"c{i}") for i in range(5)
+        ]
+        # Two conversations share an updated_at, so ids must break the tie
+        now = timezone.now()
+        for i, conversation in enumerate(self.conversations):
+            updated_at = now - datetime.timedelta(minutes=min(i, 3))
+            Conversation.objects.filter(id=conversation.id).update(
+                updated_at=updated_at
+            )
+
+    def test_list_pages_with_a_keyset_cursor(self):
+        url = reverse("list_conversations")
+        titles, params = [], {"limit": 2}
+        while True:
+            with self.assertNumQueries(1):
+                page = self.client.get(url, params).json()
+            titles += [c["title"] for c in page["results"]]
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        self.assertEqual(titles, ["c0", "c1", "c2", "c4", "c3"])
+        resp = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_detail_has_aggregates_and_a_page_of_interactions(self):
+        conversation = self.conversations[0]
+        self.client.post(
+            reverse("bulk_log_llm_interactions"),
+            [
+                {
+                    "prompt": f"p{i}",
+                    "response": f"r{i}",
+                    "model_name": "mistral",
+                    "conversation": conversation.id,
+                    "prompt_tokens": 10,
+                    "completion_tokens": i,
+                }
+                for i in range(4)
+            ],
+            format="json",
+        )
+        url = reverse("get_conversation", args=[conversation.id])
+        with self.assertNumQueries(2):
+            detail = self.client.get(url, {"limit": 3}).json()
+        self.assertEqual(detail["message_count"], 8)
+        self.assertEqual(detail["interaction_count"], 4)
+        self.assertEqual(detail["total_tokens"], 46)
+        self.assertIsNotNone(detail["last_activity"])
+        self.assertEqual(
+            [i["prompt"] for i in detail["interactions"]], ["p0", "p1", "p2"]
+        )
+        rest = self.client.get(url, {"limit": 3, "cursor": detail["next_cursor"]})
+        self.assertEqual([i["prompt"] for i in rest.json()["interactions"]], ["p3"])
+        self.assertIsNone(rest.json()["next_cursor"])
+
+        empty = self.client.get(
+            reverse("get_conversation", args=[self.conversations[1].id])
+        ).json()
+        self.assertEqual((empty["message_count"], empty["total_tokens"]), (0, 0))
+
+    def test_str_does_not_load_the_user(self):
+        conversation = Conversation.objects.get(id=self.conversations[0].id)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(conversation), f"c0 - user {self.user.id}")
+        conversation = Conversation.objects.select_related("user").get(
+            id=self.conversations[0].id
+        )
+        self.assertEqual(str(conversation), "c0 - heavy")
+
+
+@override_settings(INTERNAL_SERVICE_TOKEN="service-secret")
+class TrainingContextTest(TestCase):
+    def setUp(self):
+        self.client = APIClient(HTTP_X_SERVICE_TOKEN="service-secret")
+        self.user = User.objects.create_user(username="ctxuser", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="Ctx")
+        self.url = reverse("training_context")
+        for i in range(5):
+            LLMInteraction.objects.create(
+                user=self.user,
+                conversation=self.conversation,
+                session_id="ctx-session",
+                prompt=f"p{i}",
+                response=f"r{i}",
+                model_name="mistral",
+                include_in_training=i != 2,
+            )
+        LLMInteraction.objects.create(
+            prompt="other",
+            response="other",
+            model_name="mistral",
+            session_id="other-session",
+            include_in_training=True,
+        )
+
+    def test_filters_curated_interactions(self):
+        resp = self.client.get(self.url, {"conversation": self.conversation.id})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()["results"]
+        self.assertEqual([r["prompt"] for r in results], ["p0", "p1", "p3", "p4"])
+        self.assertEqual(set(results[0]), {"id", "prompt", "response"})
+        self.assertIsNone(resp.json()["next_cursor"])
+
+    def test_cursor_pagination(self):
+        params = {"user": self.user.id, "session_id": "ctx-session", "limit": 3}
+        first = self.client.get(self.url, params).json()
+        self.assertEqual([r["prompt"] for r in first["results"]], ["p0", "p1", "p3"])
+        params["cursor"] = first["next_cursor"]
+        second = self.client.get(self.url, params).json()
+        self.assertEqual([r["prompt"] for r in second["results"]], ["p4"])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_invalid_params(self):
+        resp = self.client.get(self.url, {"limit": "many"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_requires_service_token(self):
+        resp = APIClient().get(self.url, {"user": self.user.id})
+        self.assertEqual(resp.status_code, 403)
+
+
+class TrainingContextInvalidationTest(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(
+            "curator", "curator@example.com", "pass"
+        )
+        self.client.force_login(self.superuser)
+        self.interaction = LLMInteraction.objects.create(
+            user=self.superuser,
+            prompt="p",
+            response="r",
+            model_name="mistral",
+            session_id="s1",
+        )
+
+    def change(self, include_in_training):
+        url = reverse("admin:chat_llminteraction_change", args=[self.interaction.id])
+        data = {"feedback_comment": "", "score": ""}
+        if include_in_training:
+            data["include_in_training"] = "on"
+        with patch("chat.llm_backend.requests.post") as post:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(url, data)
+        self.assertEqual(resp.status_code, 302)
+        return post
+
+    def test_toggling_include_in_training_notifies_backend(self):
+        post = self.change(include_in_training=True)
+        post.assert_called_once()
+        self.assertEqual(
+            post.call_args.kwargs["json"],
+            {"user_id": self.superuser.id, "session_id": "s1", "conversation_id": None},
+        )
+
+    def test_other_changes_do_not_notify(self):
+        post = self.change(include_in_training=False)
+        post.assert_not_called()
+
+
+@override_settings(INTERNAL_SERVICE_TOKEN="service-secret")
+class EvaluationWriteBackTest(TestCase):
+    def setUp(self):
+        self.client = APIClient(HTTP_X_SERVICE_TOKEN="service-secret")
+        self.user = User.objects.create_user(username="evaluser", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="Eval")
+        self.interactions = [
+            LLMInteraction.objects.create(
+                conversation=self.conversation,
+                prompt=f"p{i}",
+                response=f"r{i}",
+                model_name="mistral",
+            )
+            for i in range(3)
+        ]
+
+    def test_bulk_update_scores(self):
+        items = [
+            {"id": interaction.id, "score": 7, "feedback_comment": "ok"}
+            for interaction in self.interactions
+        ] + [{"id": 999999, "score": 1}]
+        resp = self.client.post(reverse("bulk_update_scores"), items, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"updated": 3, "missing": [999999]})
+        self.assertEqual(
+            set(LLMInteraction.objects.values_list("score", flat=True)), {7}
+        )
+
+    def test_conversation_interactions_pages_by_id(self):
+        url = reverse("conversation_interactions", args=[self.conversation.id])
+        first = self.client.get(url, {"limit": 2}).json()
+        self.assertEqual([r["prompt"] for r in first["results"]], ["p0", "p1"])
+        second = self.client.get(url, {"limit": 2, "cursor": first["next_cursor"]})
+        self.assertEqual([r["prompt"] for r in second.json()["results"]], ["p2"])
+
+    def test_internal_endpoints_need_the_service_token_or_staff(self):
+        url = reverse("conversation_interactions", args=[self.conversation.id])
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get(url).status_code, 403)
+        wrong = APIClient(HTTP_X_SERVICE_TOKEN="guess")
+        self.assertEqual(
+            wrong.post(reverse("bulk_update_scores"), [], format="json").status_code,
+            403,
+        )
+        anonymous.force_login(self.user)
+        self.assertEqual(anonymous.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(anonymous.get(url).status_code, 200)
+
+
+class InteractionAdminChangelistTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="root", password="pass")
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:chat_llminteraction_changelist")
+
+    def create_interactions(self, count, **fields):
+        user = User.objects.create_user(username=f"user{User.objects.count()}")
+        conversation = Conversation.objects.create(user=user, title="c")
+        fields.setdefault("model_name", "mistral")
+        for i in range(count):
+            LLMInteraction.objects.create(
+                user=user,
+                conversation=conversation,
+                prompt=f"p{i}",
+                response=f"r{i}",
+                **fields,
+            )
+
+    def test_temperature_range_filter(self):
+        self.create_interactions(2, temperature=0.2)
+        self.create_interactions(3, temperature=0.8)
+        resp = self.client.get(
+            self.url, {"temperature__gte": "0.7", "temperature__lt": "1.0"}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["cl"].result_count, 3)
+        self.assertContains(resp, "0.7 – 1.0")
+
+    def test_score_filter_offers_not_set(self):
+        self.create_interactions(1, score=8)
+        self.create_interactions(2)
+        resp = self.client.get(self.url, {"score__isnull": "True"})
+        self.assertEqual(resp.context["cl"].result_count, 2)
+
+    def test_model_names_are_cached_and_users_entered(self):
+        self.create_interactions(2)
+        self.create_interactions(1, model_name="llama3")
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(self.url, {"model_name": "llama3"})
+        self.assertEqual(resp.context["cl"].result_count, 1)
+        self.assertContains(resp, "?model_name=mistral")
+        self.assertFalse(any("DISTINCT" in q["sql"] for q in queries))
+
+        resp = self.client.get(self.url, {"username": "user1", "model_name": "mistral"})
+        self.assertEqual(resp.context["cl"].result_count, 2)
+        self.assertContains(resp, 'name="model_name" value="mistral"')
+        resp = self.client.get(
+            reverse("admin:chat_conversation_changelist"), {"username": "user1"}
+        )
+        self.assertEqual(resp.context["cl"].result_count, 1)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.create_interactions(1)
+        self.client.get(self.url)  # caches the model names
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.create_interactions(20)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url)
+        self.assertEqual(len(few), len(many))
+
+    def test_counts_are_exact_without_postgres_statistics(self):
+        self.create_interactions(3)
+        paginator = EstimatedCountPaginator(LLMInteraction.objects.all(), 100)
+        self.assertIsNone(estimated_count(LLMInteraction.objects.all()))
+        self.assertEqual(paginator.count, 3)
+
+
+class InteractionSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(
+                username="searcher", password="pass", is_staff=True
+            )
+        )
+        self.url = reverse("search_llm_interactions")
+        self.in_prompt = LLMInteraction.objects.create(
+            prompt="How do I tune a PostgreSQL database?",
+            response="Start with shared_buffers.",
+            model_name="mistral",
+        )
+        self.in_response = LLMInteraction.objects.create(
+            prompt="Which store should I pick?",
+            response="A PostgreSQL database is a safe default.",
+            model_name="llama",
+        )
+        LLMInteraction.objects.create(
+            prompt="Tell me a joke", response="No.", model_name="mistral"
+        )
+
+    def search(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        return [row["id"] for row in resp.json()["results"]]
+
+    def test_search_requires_staff(self):
+        self.assertEqual(APIClient().get(self.url, {"q": "database"}).status_code, 403)
+        user = APIClient()
+        user.force_authenticate(User.objects.create_user(username="plain"))
+        self.assertEqual(user.get(self.url, {"q": "database"}).status_code, 403)
+
+    def test_prompt_matches_rank_above_response_matches(self):
+        self.assertEqual(
+            self.search(q="postgresql database"),
+            [self.in_prompt.id, self.in_response.id],
+        )
+
+    def test_filters_and_query_syntax(self):
+        self.assertEqual(
+            self.search(q='"postgresql" (database)', model_name="llama"),
+            [self.in_response.id],
+        )
+        self.assertEqual(self.search(q="!!!"), [])
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 400)
+
+    def test_index_follows_updates_deletes_and_bulk_inserts(self):
+        self.in_prompt.prompt = "Something about kernels"
+        self.in_prompt.save()
+        self.assertEqual(self.search(q="kernels"), [self.in_prompt.id])
+        self.assertEqual(self.search(q="tune"), [])
+        self.in_response.delete()
+        self.assertEqual(self.search(q="database"), [])
+
+        self.client.post(
+            reverse("bulk_log_llm_interactions"),
+            [{"prompt": "bulk inserted zebra", "response": "r", "model_name": "m"}],
+            format="json",
+        )
+        self.assertEqual(len(self.search(q="zebra")), 1)
+
+    def test_admin_search_uses_the_index(self):
+        admin_user = User.objects.create_superuser(username="root", password="pass")
+        self.client.force_login(admin_user)
+        resp = self.client.get(
+            reverse("admin:chat_llminteraction_changelist"), {"q": "postgresql"}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [row.id for row in resp.context["cl"].result_list],
+            [self.in_prompt.id, self.in_response.id],
+        )
+        resp = self.client.get(
+            reverse("admin:chat_llminteraction_changelist"),
+            {"q": "postgresql", "o": "-1"},
+        )
+        self.assertEqual(
+            [row.id for row in resp.context["cl"].result_list],
+            [self.in_response.id, self.in_prompt.id],
+        )
+
+    def test_admin_search_matches_usernames_and_model_names(self):
+        admin_user = User.objects.create_superuser(username="root", password="pass")
+        self.client.force_login(admin_user)
+        owned = LLMInteraction.objects.create(
+            user=User.objects.create_user(username="postgresql_fan"),
+            prompt="Unrelated question",
+            response="r",
+            model_name="mistral",
+        )
+
+        def admin_search(term):
+            resp = self.client.get(
+                reverse("admin:chat_llminteraction_changelist"), {"q": term}
+            )
+            self.assertEqual(resp.status_code, 200)
+            return [row.id for row in resp.context["cl"].result_list]
+
+        self.assertEqual(admin_search("fan"), [owned.id])
+        self.assertEqual(admin_search("llama"), [self.in_response.id])
+        # Text matches still rank first, then rows matched by username
+        self.assertEqual(
+            admin_search("postgresql"),
+            [self.in_prompt.id, self.in_response.id, owned.id],
+        )
+
+
+class TrainingExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="exporter", password="pass", is_staff=True
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("export_training_data")
+        self.first = self.create("What is a GIN index?", score=9)
+        self.create("What  is a GIN index?", score=7)
+        self.create("Explain MVCC", model_name="llama", score=4)
+        self.create("Not curated", include_in_training=False)
+
+    def create(self, prompt, **fields):
+        fields.setdefault("include_in_training", True)
+        fields.setdefault("model_name", "mistral")
+        return LLMInteraction.objects.create(
+            prompt=prompt,
+            response=f"answer to {prompt}",
+            context=[{"role": "system", "content": "Be brief."}],
+            **fields,
+        )
+
+    def export(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        return resp, [json.loads(line) for line in lines]
+
+    def test_jsonl_chat_format_deduplicated_by_prompt(self):
+        resp, records = self.export()
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(records), 2)
+        self.assertEqual(
+            records[0]["messages"],
+            [
+                {"role": "system", "content": "Be brief."},
+                {"role": "user", "content": "What is a GIN index?"},
+                {"role": "assistant", "content": "answer to What is a GIN index?"},
+            ],
+        )
+        self.assertEqual(records[0]["metadata"]["id"], self.first.id)
+
+        _, records = self.export(dedup="false", context="0")
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]["messages"][0]["role"], "user")
+
+    def test_filters_and_incremental_export(self):
+        _, records = self.export(model_name="llama")
+        self.assertEqual([r["metadata"]["model_name"] for r in records], ["llama"])
+        _, records = self.export(min_score=8)
+        self.assertEqual([r["metadata"]["score"] for r in records], [9])
+
+        resp, _ = self.export()
+        watermark = resp["X-Export-Watermark"]
+        later = self.create("Vacuum tuning")
+        resp, records = self.export(since_id=watermark)
+        self.assertEqual([r["metadata"]["id"] for r in records], [later.id])
+        resp, records = self.export(since_id=resp["X-Export-Watermark"])
+        self.assertEqual(records, [])
+        self.assertEqual(resp["X-Export-Watermark"], str(later.id))
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {"output": "csv"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"since": "soon"}).status_code, 400)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(User.objects.create_user(username="plain"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for i in range(50):
+            self.create(f"prompt {i}")
+        with CaptureQueriesContext(connection) as queries:
+            _, records = self.export()
+        self.assertEqual(len(records), 52)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_dedup_memory_is_bounded(self):
+        self.create("What is a GIN index?")
+        # Remembering one prompt, the GIN duplicate right after the first is
+        # caught, but the first is forgotten by the time it repeats again
+        with patch("chat.export.DEDUP_MAX_PROMPTS", 1):
+            _, records = self.export(context="0")
+        self.assertEqual(
+            [r["messages"][0]["content"] for r in records],
+            ["What is a GIN index?", "Explain MVCC", "What is a GIN index?"],
+        )
+
+    def test_management_command_writes_through_stdout(self):
+        stdout = io.StringIO()
+        call_command("export_training_data", stdout=stdout, stderr=io.StringIO())
+        records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(records), 2)
+
+    def test_management_command_with_watermark_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "data.jsonl")
+            watermark = os.path.join(tmp, "watermark.json")
+            call_command(
+                "export_training_data",
+                output=output,
+                watermark_file=watermark,
+                stderr=io.StringIO(),
+            )
+            with open(output) as f:
+                self.assertEqual(len(f.readlines()), 2)
+            later = self.create("Vacuum tuning")
+            call_command(
+                "export_training_data",
+                output=output,
+                watermark_file=watermark,
+                stderr=io.StringIO(),
+            )
+            with open(output) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([r["metadata"]["id"] for r in records], [later.id])
+            with open(watermark) as f:
+                self.assertEqual(json.load(f), {"last_id": later.id})
+
+    @skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet_export(self):
+        import pyarrow.parquet as pq
+
+        resp = self.client.get(self.url, {"output": "parquet", "dedup": "0"})
+        self.assertEqual(resp.status_code, 200)
+        table = pq.read_table(io.BytesIO(b"".join(resp.streaming_content)))
+        self.assertEqual(table.num_rows, 3)
+        rows = table.to_pylist()
+        self.assertEqual(rows[0]["id"], self.first.id)
+        self.assertEqual(rows[0]["messages"][1]["content"], "What is a GIN index?")
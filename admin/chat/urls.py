@@ -17,4 +17,39 @@ urlpatterns = [
     path(
         "llm-interactions/log/", views.log_llm_interaction, name="log_llm_interaction"
     ),
+    path(
+        "llm-interactions/bulk/",
+        views.bulk_log_llm_interactions,
+        name="bulk_log_llm_interactions",
+    ),
+    path(
+        "llm-interactions/training-context/",
+        views.training_context,
+        name="training_context",
+    ),
+    path(
+        "llm-interactions/search/",
+        views.search_llm_interactions,
+        name="search_llm_interactions",
+    ),
+    path(
+        "llm-interactions/export/",
+        views.export_training_data,
+        name="export_training_data",
+    ),
+    path(
+        "llm-interactions/scores/",
+        views.bulk_update_scores,
+        name="bulk_update_scores",
+    ),
+    path(
+        "conversations/<int:conversation_id>/messages/",
+        views.conversation_messages,
+        name="conversation_messages",
+    ),
+    path(
+        "conversations/<int:conversation_id>/interactions/",
+        views.conversation_interactions,
+        name="conversation_interactions",
+    ),
 ]
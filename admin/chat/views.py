@@ -1,12 +1,37 @@
+import logging
+import uuid
+
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
-from .models import Conversation
-from .serializers import LLMInteractionSerializer
+from .export import (
+    EXPORT_FORMATS,
+    TrainingExport,
+    parquet_available,
+    parse_timestamp,
+    training_queryset,
+)
+from .history import (
+    HISTORY_DEFAULT_LIMIT,
+    HISTORY_MAX_LIMIT,
+    append_interactions,
+    with_stats,
+)
+from .models import Conversation, ConversationMessage, LLMInteraction
+from .paginators import decode_cursor, encode_cursor
+from .parsers import NDJSONParser
+from .permissions import IsInternalService
+from .search import search_interactions
+from .serializers import LLMInteractionBulkSerializer, LLMInteractionSerializer
+
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 
@@ -73,41 +98,124 @@ def create_conversation(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+CONVERSATIONS_DEFAULT_LIMIT = 50
+CONVERSATIONS_MAX_LIMIT = 200
+CONVERSATION_FIELDS = ("id", "title", "created_at", "updated_at")
+CONVERSATION_STATS = (
+    "message_count",
+    "interaction_count",
+    "total_tokens",
+    "last_activity",
+)
+CONVERSATION_INTERACTION_FIELDS = (
+    "id",
+    "prompt",
+    "response",
+    "model_name",
+    "timestamp",
+    "prompt_tokens",
+    "completion_tokens",
+    "score",
+    "include_in_training",
+)
+
+
 @api_view(["GET"])
 def list_conversations(request):
-    """List all conversations for the current user."""
-    conversations = Conversation.objects.filter(user=request.user)
-    return Response(
-        [
-            {
-                "id": conv.id,
-                "title": conv.title,
-                "created_at": conv.created_at,
-                "updated_at": conv.updated_at,
-            }
-            for conv in conversations
+    """
+    List the current user's conversations, most recently updated first.
+
+    Pages with an opaque keyset cursor over (updated_at, id), so every page
+    costs one indexed query however many conversations the user has.
+    """
+    try:
+        limit = _int_param(request, "limit", CONVERSATIONS_DEFAULT_LIMIT)
+        cursor = request.query_params.get("cursor")
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return Response(
+            {"error": "limit must be an integer and cursor a next_cursor value"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, CONVERSATIONS_MAX_LIMIT))
+
+    queryset = Conversation.objects.filter(user=request.user)
+    if after is not None:
+        updated_at, pk = after
+        queryset = queryset.filter(
+            Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=pk)
+        )
+    # Fetch one extra row to know whether another page exists
+    rows = list(
+        queryset.order_by("-updated_at", "-id").values(*CONVERSATION_FIELDS)[
+            : limit + 1
         ]
     )
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(
+            rows[limit - 1]["updated_at"], rows[limit - 1]["id"]
+        )
+    return Response({"results": rows[:limit], "next_cursor": next_cursor})
 
 
 @api_view(["GET"])
 def get_conversation(request, conversation_id):
-    """Get a specific conversation."""
+    """
+    Get a conversation with its aggregates and a page of its interactions.
+
+    Interactions are paged by id (``cursor``, ``limit``) and prefetched with
+    the conversation, so the response costs two queries regardless of the
+    conversation's length.
+    """
     try:
-        conversation = Conversation.objects.get(id=conversation_id, user=request.user)
+        cursor = _int_param(request, "cursor")
+        limit = _int_param(request, "limit", CONVERSATIONS_DEFAULT_LIMIT)
+    except ValueError:
         return Response(
-            {
-                "id": conversation.id,
-                "title": conversation.title,
-                "created_at": conversation.created_at,
-                "updated_at": conversation.updated_at,
-            }
+            {"error": "cursor and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, CONVERSATIONS_MAX_LIMIT))
+
+    interactions = LLMInteraction.objects.order_by("id").only(
+        "conversation", *CONVERSATION_INTERACTION_FIELDS
+    )
+    if cursor is not None:
+        interactions = interactions.filter(id__gt=cursor)
+    try:
+        conversation = (
+            with_stats(Conversation.objects.filter(user=request.user))
+            .prefetch_related(
+                Prefetch(
+                    "llminteraction_set",
+                    queryset=interactions[: limit + 1],
+                    to_attr="interaction_page",
+                )
+            )
+            .get(id=conversation_id)
         )
     except Conversation.DoesNotExist:
         return Response(
             {"error": "Conversation not found"}, status=status.HTTP_404_NOT_FOUND
         )
 
+    page = conversation.interaction_page
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    data = {
+        field: getattr(conversation, field)
+        for field in CONVERSATION_FIELDS + CONVERSATION_STATS
+    }
+    data["interactions"] = [
+        {
+            field: getattr(interaction, field)
+            for field in CONVERSATION_INTERACTION_FIELDS
+        }
+        for interaction in page[:limit]
+    ]
+    data["next_cursor"] = next_cursor
+    return Response(data)
+
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
@@ -115,8 +223,365 @@ def log_llm_interaction(request):
     """Log an LLM interaction (prompt, response, metadata, etc)."""
     serializer = LLMInteractionSerializer(data=request.data)
     if serializer.is_valid():
-        print("VALIDATED DATA:", serializer.validated_data)
-        serializer.save()
+        key = serializer.validated_data.get("idempotency_key")
+        existing = (
+            LLMInteraction.objects.filter(idempotency_key=key).first() if key else None
+        )
+        if existing is not None:
+            # A redelivery of an interaction that is already stored
+            return Response(
+                LLMInteractionSerializer(existing).data, status=status.HTTP_200_OK
+            )
+        with transaction.atomic():
+            append_interactions([serializer.save()])
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-    print("SERIALIZER ERRORS:", serializer.errors)
+    logger.warning("Rejected LLM interaction: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _existing_ids(model, items, field):
+    ids = {item.get(field) for item in items if isinstance(item, dict)}
+    ids = {pk for pk in ids if isinstance(pk, int)}
+    if not ids:
+        return set()
+    return set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, NDJSONParser])
+def bulk_log_llm_interactions(request):
+    """
+    Log many LLM interactions in one request.
+
+    Accepts a JSON list or an NDJSON body. Valid items are inserted with a
+    single bulk_create inside one transaction; invalid items are reported by
+    index and do not prevent the others from being stored.
+
+    Items are idempotent on ``idempotency_key``: a key that is already stored
+    (a retried or replayed batch) is counted as a duplicate and skipped, and
+    ``ignore_conflicts`` covers two deliveries of one key racing each other.
+    Items without a key are given one.
+    """
+    items = request.data
+    if not isinstance(items, list):
+        return Response(
+            {"error": "Expected a list of interactions"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    context = {
+        "user_ids": _existing_ids(User, items, "user"),
+        "conversation_ids": _existing_ids(Conversation, items, "conversation"),
+    }
+    interactions = {}
+    errors = []
+    duplicates = 0
+    for index, item in enumerate(items):
+        serializer = LLMInteractionBulkSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+        interaction = LLMInteraction(**serializer.validated_data)
+        if interaction.idempotency_key is None:
+            interaction.idempotency_key = uuid.uuid4()
+        if interaction.idempotency_key in interactions:
+            duplicates += 1
+        else:
+            interactions[interaction.idempotency_key] = interaction
+
+    with transaction.atomic():
+        delivered = set(
+            LLMInteraction.objects.filter(
+                idempotency_key__in=list(interactions)
+            ).values_list("idempotency_key", flat=True)
+        )
+        duplicates += len(delivered)
+        new = [i for key, i in interactions.items() if key not in delivered]
+        # ignore_conflicts does not set primary keys, so read them back
+        LLMInteraction.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+        ids = dict(
+            LLMInteraction.objects.filter(
+                idempotency_key__in=[i.idempotency_key for i in new]
+            ).values_list("idempotency_key", "id")
+        )
+        for interaction in new:
+            interaction.pk = ids[interaction.idempotency_key]
+        append_interactions(new)
+
+    if errors:
+        logger.warning("Rejected %d of %d LLM interactions", len(errors), len(items))
+    if not errors:
+        response_status = status.HTTP_201_CREATED
+    elif interactions or duplicates:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response(
+        {"created": len(new), "duplicates": duplicates, "errors": errors},
+        status=response_status,
+    )
+
+
+TRAINING_CONTEXT_DEFAULT_LIMIT = 50
+TRAINING_CONTEXT_MAX_LIMIT = 500
+
+
+def _int_param(request, name, default=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    return int(value)
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalService])
+def training_context(request):
+    """
+    List curated interactions (include_in_training=True) for use as context.
+
+    Filters by user, session_id and conversation, and pages by id using an
+    opaque cursor (the last id of the previous page). Only the prompt and
+    response columns are read.
+    """
+    try:
+        user_id = _int_param(request, "user")
+        conversation_id = _int_param(request, "conversation")
+        cursor = _int_param(request, "cursor")
+        limit = _int_param(request, "limit", TRAINING_CONTEXT_DEFAULT_LIMIT)
+    except ValueError:
+        return Response(
+            {"error": "user, conversation, cursor and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, TRAINING_CONTEXT_MAX_LIMIT))
+
+    queryset = LLMInteraction.objects.filter(include_in_training=True)
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    session_id = request.query_params.get("session_id")
+    if session_id:
+        queryset = queryset.filter(session_id=session_id)
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset.order_by("id").values("id", "prompt", "response")[: limit + 1])
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return Response({"results": rows[:limit], "next_cursor": next_cursor})
+
+
+@api_view(["POST"])
+@permission_classes([IsInternalService])
+def bulk_update_scores(request):
+    """
+    Write evaluation results back to many interactions at once.
+
+    Expects a list of ``{"id", "score", "feedback_comment"}`` objects and
+    applies them with a single bulk_update.
+    """
+    items = request.data
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and isinstance(item.get("id"), int) for item in items
+    ):
+        return Response(
+            {"error": "Expected a list of objects with an integer id"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    interactions = LLMInteraction.objects.in_bulk([item["id"] for item in items])
+    for item in items:
+        interaction = interactions.get(item["id"])
+        if interaction is None:
+            continue
+        interaction.score = item.get("score")
+        interaction.feedback_comment = item.get("feedback_comment")
+
+    with transaction.atomic():
+        updated = LLMInteraction.objects.bulk_update(
+            interactions.values(), ["score", "feedback_comment"], batch_size=500
+        )
+    missing = [item["id"] for item in items if item["id"] not in interactions]
+    return Response({"updated": updated, "missing": missing})
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalService])
+def conversation_interactions(request, conversation_id):
+    """Page through a conversation's interactions (id, prompt, response) by id."""
+    try:
+        cursor = _int_param(request, "cursor")
+        limit = _int_param(request, "limit", TRAINING_CONTEXT_DEFAULT_LIMIT)
+    except ValueError:
+        return Response(
+            {"error": "cursor and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, TRAINING_CONTEXT_MAX_LIMIT))
+
+    queryset = LLMInteraction.objects.filter(conversation_id=conversation_id)
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+    rows = list(queryset.order_by("id").values("id", "prompt", "response")[: limit + 1])
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return Response({"results": rows[:limit], "next_cursor": next_cursor})
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalService])
+def conversation_messages(request, conversation_id):
+    """
+    Return the most recent messages of a conversation, oldest first.
+
+    ``limit`` bounds the number of messages; ``before`` (a position, from
+    ``next_cursor``) continues with older ones.
+    """
+    try:
+        before = _int_param(request, "before")
+        limit = _int_param(request, "limit", HISTORY_DEFAULT_LIMIT)
+    except ValueError:
+        return Response(
+            {"error": "before and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+
+    queryset = ConversationMessage.objects.filter(conversation_id=conversation_id)
+    if before is not None:
+        queryset = queryset.filter(position__lt=before)
+    # Fetch one extra row to know whether older messages exist
+    rows = list(
+        queryset.order_by("-position").values("position", "role", "content")[
+            : limit + 1
+        ]
+    )
+    next_cursor = rows[limit - 1]["position"] if len(rows) > limit else None
+    return Response({"results": rows[:limit][::-1], "next_cursor": next_cursor})
+
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def search_llm_interactions(request):
+    """
+    Full-text search over interaction prompts, responses and comments.
+
+    ``q`` is required; ``model_name``, ``user`` and ``conversation`` narrow
+    the search. Results are ordered by rank, best match first.
+    """
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user_id = _int_param(request, "user")
+        conversation_id = _int_param(request, "conversation")
+        limit = _int_param(request, "limit", SEARCH_DEFAULT_LIMIT)
+    except ValueError:
+        return Response(
+            {"error": "user, conversation and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    queryset = LLMInteraction.objects.all()
+    model_name = request.query_params.get("model_name")
+    if model_name:
+        queryset = queryset.filter(model_name=model_name)
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+
+    rows = search_interactions(queryset, query).values(
+        "id",
+        "conversation",
+        "model_name",
+        "timestamp",
+        "prompt",
+        "response",
+        "rank",
+    )[:limit]
+    return Response({"results": list(rows)})
+
+
+EXPORT_CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _flag_param(request, name, default=True):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    return value.lower() not in ("0", "false", "no")
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_training_data(request):
+    """
+    Stream curated interactions as a chat-format training dataset.
+
+    ``output`` is jsonl (default) or parquet. Filters match the
+    export_training_data management command; the X-Export-Watermark header
+    carries the last exported id, to pass back as ``since_id`` for an
+    incremental export. Staff only, since it reads every user's data.
+    """
+    fmt = request.query_params.get("output", "jsonl")
+    if fmt not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"output must be one of {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if fmt == "parquet" and not parquet_available():
+        return Response(
+            {"error": "Parquet export requires pyarrow on the server"},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    try:
+        user_id = _int_param(request, "user")
+        conversation_id = _int_param(request, "conversation")
+        min_score = _int_param(request, "min_score")
+        since_id = _int_param(request, "since_id")
+        since = request.query_params.get("since")
+        until = request.query_params.get("until")
+        since = parse_timestamp(since) if since else None
+        until = parse_timestamp(until) if until else None
+    except ValueError:
+        return Response(
+            {
+                "error": "user, conversation, min_score and since_id must be "
+                "integers; since and until ISO dates"
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    queryset = training_queryset(
+        model_name=request.query_params.get("model_name"),
+        user_id=user_id,
+        conversation_id=conversation_id,
+        session_id=request.query_params.get("session_id"),
+        min_score=min_score,
+        since=since,
+        until=until,
+        since_id=since_id,
+    )
+    export = TrainingExport(
+        queryset,
+        dedup=_flag_param(request, "dedup"),
+        include_context=_flag_param(request, "context"),
+        since_id=since_id,
+    )
+    response = StreamingHttpResponse(
+        export.stream(fmt), content_type=EXPORT_CONTENT_TYPES[fmt]
+    )
+    response["Content-Disposition"] = f'attachment; filename="training-data.{fmt}"'
+    if export.watermark is not None:
+        response["X-Export-Watermark"] = str(export.watermark)
+    return response
@@ -151,3 +151,10 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.BasicAuthentication",
     ],
 }
+
+# FastAPI backend, notified when curated training data changes
+LLM_BACKEND_URL = os.getenv("LLM_BACKEND_URL", "http://backend:8000")
+
+# Shared with the FastAPI backend, which sends it to the internal endpoints
+# (chat/permissions.py)
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", "")
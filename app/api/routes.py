@@ -1,12 +1,19 @@
-from typing import List, Optional
+import json
+from typing import Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-from app.services.llm_service import LLMService, Message
+from app.core.config import settings
+from app.services.evaluation import EvaluationEngine
+from app.services.llm_service import AsyncLLMService, Message
+from app.services.pull_jobs import FINISHED
+from app.services.scheduler import SchedulerBusy
 
 router = APIRouter()
-llm_service = LLMService()
+llm_service = AsyncLLMService()
 
 
 class GenerateRequest(BaseModel):
@@ -18,6 +25,8 @@ class GenerateRequest(BaseModel):
     context: Optional[List[Message]] = None
     session_id: Optional[str] = None
     user_id: Optional[int] = None
+    # Without a context, the conversation's stored history is used
+    conversation_id: Optional[int] = None
 
 
 class GenerateResponse(BaseModel):
@@ -29,7 +38,7 @@ class GenerateResponse(BaseModel):
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_response(request: GenerateRequest):
     try:
-        result = llm_service.generate_response(
+        result = await llm_service.generate_response(
             prompt=request.prompt,
             model=request.model,
             temperature=request.temperature,
@@ -38,32 +47,346 @@ async def generate_response(request: GenerateRequest):
             context=request.context,
             session_id=request.session_id,
             user_id=request.user_id,
+            conversation_id=request.conversation_id,
         )
         return GenerateResponse(
             response=result["message"]["content"],
             model=result["model"],
             usage=result.get("usage", {}),
         )
+    except SchedulerBusy as e:
+        raise _too_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/models", response_model=List[str])
-async def list_models():
+def _too_busy(e: SchedulerBusy) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def _sse_event(data: Dict, event: Optional[str] = None) -> str:
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate/stream")
+async def generate_stream(request: GenerateRequest):
+    """Server-Sent-Events variant of /generate that forwards tokens as they arrive."""
+    stream = llm_service.generate_stream(
+        prompt=request.prompt,
+        model=request.model,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        system_prompt=request.system_prompt,
+        context=request.context,
+        session_id=request.session_id,
+        user_id=request.user_id,
+        conversation_id=request.conversation_id,
+    )
+    # Wait for the first event before responding so that a saturated
+    # scheduler can still be reported as 429 instead of an SSE error
+    try:
+        first = await stream.__anext__()
+    except SchedulerBusy as e:
+        await stream.aclose()
+        raise _too_busy(e)
+    except Exception as e:
+        first = e
+
+    def sse(event: Dict) -> str:
+        if event.get("done"):
+            return _sse_event(
+                {
+                    "response": event["message"]["content"],
+                    "model": event["model"],
+                    "usage": event.get("usage", {}),
+                },
+                event="done",
+            )
+        return _sse_event(event)
+
+    async def events():
+        try:
+            if isinstance(first, Exception):
+                raise first
+            yield sse(first)
+            async for event in stream:
+                yield sse(event)
+        except Exception as e:
+            yield _sse_event({"error": str(e)}, event="error")
+        finally:
+            await stream.aclose()
+
+    # The background task also runs when the client disconnects before the
+    # body is iterated. Closing the stream releases the scheduler slot and
+    # Ollama connection, or for a coalesced stream leaves it to the other
+    # subscribers and cancels the upstream once the last one is gone
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(stream.aclose),
+    )
+
+
+def _parse_jsonl(text: str) -> List:
+    items = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Keep the index; generate_many reports the item as invalid
+            items.append(line)
+    return items
+
+
+async def _read_batch_items(request: Request) -> List:
+    """Accept a JSON list, {"requests": [...]}, an NDJSON body or a JSONL upload."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=400, detail="Expected a JSONL file in the 'file' field"
+            )
+        return _parse_jsonl((await upload.read()).decode())
+    body = await request.body()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return _parse_jsonl(body.decode())
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get("requests")
+    if not isinstance(data, list):
+        raise HTTPException(
+            status_code=400, detail="Expected a list of generation requests"
+        )
+    return data
+
+
+@router.post("/generate/batch")
+async def generate_batch(request: Request, concurrency: Optional[int] = None):
+    """
+    Run many prompts with bounded concurrency per model.
+
+    Results stream back as NDJSON in completion order, each tagged with the
+    index of its request, followed by a summary line with aggregated usage.
+    """
+    items = await _read_batch_items(request)
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the limit of {settings.BATCH_MAX_ITEMS} items",
+        )
+
+    async def lines():
+        async for result in llm_service.generate_many(
+            items, concurrency_per_model=concurrency
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class EvaluateRequest(BaseModel):
+    prompt: str
+    response: str
+    criteria: Optional[Dict[str, str]] = None
+    mode: Optional[Literal["json", "parallel"]] = None
+    model: Optional[str] = None
+    interaction_id: Optional[int] = None
+
+
+@router.post("/evaluate")
+async def evaluate(request: EvaluateRequest):
+    """Grade one response; the score is saved when interaction_id is given."""
+    engine = EvaluationEngine(llm_service, model=request.model)
     try:
-        return llm_service.list_models()
+        result = await engine.evaluate(
+            request.prompt,
+            request.response,
+            criteria=request.criteria,
+            mode=request.mode,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if request.interaction_id is not None and result["score"] is not None:
+        await engine.write_scores(
+            [engine.score_update({**result, "interaction_id": request.interaction_id})]
+        )
+    return result
 
 
-@router.post("/models/{model_name}/pull")
-async def pull_model(model_name: str):
+class EvaluateBatchRequest(BaseModel):
+    items: Optional[List[Dict]] = None
+    conversation_id: Optional[int] = None
+    criteria: Optional[Dict[str, str]] = None
+    mode: Optional[Literal["json", "parallel"]] = None
+    model: Optional[str] = None
+    concurrency: Optional[int] = None
+    write_back: bool = True
+
+
+@router.post("/evaluate/batch")
+async def evaluate_batch(request: EvaluateBatchRequest):
+    """
+    Grade a dataset (``items``) or every interaction of a conversation.
+
+    Results stream back as NDJSON in completion order, followed by a summary
+    line. Scores are written back to the admin in bulk.
+    """
+    engine = EvaluationEngine(llm_service, model=request.model)
+    if request.conversation_id is not None:
+        try:
+            items = await engine.conversation_items(request.conversation_id)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=str(e))
+    elif request.items is not None:
+        items = request.items
+    else:
+        raise HTTPException(
+            status_code=400, detail="Provide either items or conversation_id"
+        )
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the limit of {settings.BATCH_MAX_ITEMS} items",
+        )
+
+    async def lines():
+        async for result in engine.evaluate_many(
+            items,
+            criteria=request.criteria,
+            mode=request.mode,
+            concurrency=request.concurrency,
+            write_back=request.write_back,
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class TrainingContextInvalidation(BaseModel):
+    user_id: Optional[int] = None
+    session_id: Optional[str] = None
+    conversation_id: Optional[int] = None
+
+
+@router.post("/training-context/invalidate")
+async def invalidate_training_context(request: TrainingContextInvalidation):
+    """Called by the Django admin when an interaction's include_in_training changes."""
+    invalidated = llm_service.invalidate_training_context(
+        user_id=request.user_id,
+        session_id=request.session_id,
+        conversation_id=request.conversation_id,
+    )
+    return {
+        "invalidated": invalidated,
+        "cache": llm_service.training_context_cache.stats(),
+    }
+
+
+@router.get("/training-context/cache")
+async def training_context_cache_stats():
+    return llm_service.training_context_cache.stats()
+
+
+@router.get("/conversations/{conversation_id}/history")
+async def conversation_history(conversation_id: int):
+    """The stored history a turn of this conversation continues from."""
+    return {
+        "conversation_id": conversation_id,
+        "messages": await llm_service.history.load(conversation_id),
+    }
+
+
+@router.get("/conversations/history/cache")
+async def conversation_history_cache_stats():
+    return llm_service.history.stats()
+
+
+@router.get("/scheduler")
+async def scheduler_stats():
+    return llm_service.scheduler.stats()
+
+
+@router.get("/nodes")
+async def ollama_nodes():
+    return llm_service.pool.stats()
+
+
+@router.get("/models", response_model=List[str])
+async def list_models():
     try:
-        return llm_service.pull_model(model_name)
+        return await llm_service.list_models()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/models/catalog")
+async def model_catalog():
+    """Available models with size, quantization and family metadata."""
+    return (await llm_service.model_catalog()).snapshot()
+
+
+@router.post("/models/{model_name}/pull", status_code=202)
+async def pull_model(model_name: str):
+    """Start pulling a model in the background; joins a running pull of it."""
+    return llm_service.pull_jobs.start(model_name).snapshot()
+
+
+@router.get("/models/pulls")
+async def list_pull_jobs():
+    return llm_service.pull_jobs.list()
+
+
+def _pull_job(job_id: str):
+    job = llm_service.pull_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown pull job {job_id}")
+    return job
+
+
+@router.get("/models/pulls/{job_id}")
+async def get_pull_job(job_id: str):
+    return _pull_job(job_id).snapshot()
+
+
+@router.get("/models/pulls/{job_id}/events")
+async def pull_job_events(job_id: str):
+    """Server-Sent-Events stream of a pull job's progress until it finishes."""
+    job = _pull_job(job_id)
+
+    async def events():
+        async for snapshot in job.watch():
+            finished = snapshot["status"] in FINISHED
+            yield _sse_event(snapshot, event="done" if finished else None)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/models/{model_name}/warm", status_code=202)
+async def warm_model(model_name: str):
+    """Start loading a model (e.g. when it is selected in the UI) without waiting."""
+    return llm_service.residency.warm_in_background(model_name)
+
+
+@router.get("/models/residency")
+async def model_residency():
+    return llm_service.residency.stats()
+
+
 @router.get("/health")
 async def api_health_check():
     from app.main import health_check
@@ -1,11 +1,19 @@
-import json
 from typing import Optional
 
 import typer
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
 from rich.prompt import Prompt
 
+from app.core.logging_config import configure_logging
 from app.services.llm_service import LLMService, Message
 
 app = typer.Typer()
@@ -64,13 +72,32 @@ def list_models():
 def pull_model(model_name: str):
     """Pull a model from Ollama's model library."""
     try:
-        console.print(f"Pulling model {model_name}...")
-        result = llm_service.pull_model(model_name)
+        with Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            console=console,
+        ) as progress:
+            status = progress.add_task(f"Pulling {model_name}", total=None)
+            layers = {}
+            for event in llm_service.pull_model_progress(model_name):
+                digest = event.get("digest")
+                if digest and "total" in event:
+                    # One bar per layer being downloaded
+                    if digest not in layers:
+                        name = digest.split(":")[-1][:12]
+                        layers[digest] = progress.add_task(name, total=event["total"])
+                    progress.update(layers[digest], completed=event.get("completed", 0))
+                else:
+                    progress.update(status, description=event.get("status", ""))
+            progress.update(status, total=1, completed=1)
         console.print("[bold green]Model pulled successfully![/bold green]")
-        console.print(json.dumps(result, indent=2))
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {str(e)}")
 
 
 if __name__ == "__main__":
+    configure_logging()
     app()
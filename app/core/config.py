@@ -15,18 +15,133 @@ class Settings(BaseSettings):
     # Ollama Settings
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "localhost")
     OLLAMA_PORT: int = int(os.getenv("OLLAMA_PORT", "11434"))
+    # Comma-separated base URLs of several Ollama servers; when empty the
+    # single OLLAMA_HOST:OLLAMA_PORT server is used
+    OLLAMA_ENDPOINTS: str = os.getenv("OLLAMA_ENDPOINTS", "")
+    OLLAMA_HEALTH_INTERVAL: float = 10.0  # seconds between node probes
+    OLLAMA_PROBE_TIMEOUT: float = 2.0
+    OLLAMA_MAX_FAILURES: int = 2  # consecutive failures before a node is ejected
+    OLLAMA_FAILOVER_ATTEMPTS: int = 2  # nodes tried when a connection fails
+    # Model catalog snapshots older than this are reported stale
+    MODEL_CATALOG_MAX_AGE: float = 30.0  # seconds
+
+    # Ollama HTTP client settings (shared pooled client used by AsyncLLMService)
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 120.0
+    OLLAMA_WRITE_TIMEOUT: float = 10.0
+    OLLAMA_POOL_TIMEOUT: float = 10.0
+    OLLAMA_MAX_CONNECTIONS: int = 100
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OLLAMA_KEEPALIVE_EXPIRY: float = 30.0
 
     # Model Settings
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "mistral:7b-instruct-q4")
     DEFAULT_TEMPERATURE: float = 0.7
     DEFAULT_MAX_TOKENS: int = 2000
 
+    # Model residency (see app/services/residency.py). MODEL_WARM_MODELS is a
+    # comma-separated list warmed at startup and kept loaded (defaults to
+    # DEFAULT_MODEL); keep-alive values use Ollama's duration syntax.
+    MODEL_WARM_MODELS: str = os.getenv("MODEL_WARM_MODELS", "")
+    MODEL_KEEP_ALIVE: str = os.getenv("MODEL_KEEP_ALIVE", "30m")
+    MODEL_KEEP_ALIVE_OVERRIDES: str = os.getenv("MODEL_KEEP_ALIVE_OVERRIDES", "")
+    MODEL_WARM_TIMEOUT: float = 300.0  # seconds
+    PULL_JOB_HISTORY: int = 50  # finished pull jobs kept for GET /api/models/pulls
+
+    # Exact-match response cache, opt-in: "" (disabled), "memory" or "sqlite".
+    # Only requests at or below RESPONSE_CACHE_MAX_TEMPERATURE are cached.
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "")
+    RESPONSE_CACHE_MAX_TEMPERATURE: float = 0.3
+    RESPONSE_CACHE_TTL: float = 24 * 3600  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_PATH: str = os.getenv(
+        "RESPONSE_CACHE_PATH", "/tmp/llm_response_cache.sqlite3"
+    )
+
+    # Share one Ollama call between concurrent identical requests
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Batch generation (/api/generate/batch)
+    BATCH_CONCURRENCY_PER_MODEL: int = 4
+    BATCH_MAX_ITEMS: int = 10000
+
+    # LLM-as-judge evaluation (see app/services/evaluation.py). "json" asks for
+    # every criterion in one call using Ollama's JSON format mode, "parallel"
+    # runs one judge call per criterion concurrently.
+    EVALUATION_MODEL: str = os.getenv("EVALUATION_MODEL", "")
+    EVALUATION_MODE: str = os.getenv("EVALUATION_MODE", "json")
+    EVALUATION_TEMPERATURE: float = 0.1
+    EVALUATION_MAX_TOKENS: int = 512
+    EVALUATION_CONCURRENCY: int = 4
+    EVALUATION_WRITE_BATCH_SIZE: int = 100
+
+    # Context window management (see app/services/context_window.py)
+    CONTEXT_WINDOW_POLICY: str = os.getenv("CONTEXT_WINDOW_POLICY", "sliding_window")
+    CONTEXT_WINDOW_MAX_TURNS: int = 10
+    CONTEXT_WINDOW_DEFAULT_LENGTH: int = 4096
+    CONTEXT_WINDOW_SUMMARY_MAX_TOKENS: int = 256
+
+    # Server-side conversation history (see app/services/conversation_history.py).
+    # Requests with a conversation_id but no context continue the stored history.
+    CONVERSATION_HISTORY_ENABLED: bool = True
+    CONVERSATION_HISTORY_MAX_MESSAGES: int = 200  # most recent messages kept
+    # Seconds before a process reloads a conversation it has cached, which
+    # bounds how long it misses turns served by other processes; keep it
+    # above INTERACTION_LOG_FLUSH_INTERVAL so its own turns are delivered.
+    CONVERSATION_HISTORY_CACHE_TTL: float = 30.0
+    CONVERSATION_HISTORY_CACHE_MAX_ENTRIES: int = 10000
+    CONVERSATION_HISTORY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
     # Memory Management
-    MODEL_MEMORY_REQUIREMENT: float = 4.0  # GB
+    MODEL_MEMORY_REQUIREMENT: float = 4.0  # GB, for models not in the registry
+
+    # Admission control for Ollama calls (see app/services/scheduler.py).
+    # Limits and the memory budget are per healthy Ollama node. A budget of 0
+    # uses 80% of this machine's RAM when Ollama runs locally and disables
+    # the memory check for remote nodes.
+    SCHEDULER_MAX_CONCURRENCY_PER_MODEL: int = 2
+    SCHEDULER_MEMORY_BUDGET_GB: float = float(
+        os.getenv("SCHEDULER_MEMORY_BUDGET_GB", "0")
+    )
+    SCHEDULER_MAX_QUEUE: int = 64
+    SCHEDULER_MAX_WAIT: float = 10.0  # seconds before answering 429
+    SCHEDULER_DEFAULT_DURATION: float = 10.0  # seconds, for Retry-After estimates
+    SCHEDULER_AGING_SECONDS: float = 30.0  # waiting time per priority level gained
+
+    # Logging (see app/core/logging_config.py). LOG_FORMAT is "json" or "text".
+    # Each generation logs fixed-size metadata; prompt and response text is
+    # only attached to the sampled fraction of requests, truncated.
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    REQUEST_LOG_PAYLOAD_SAMPLE_RATE: float = float(
+        os.getenv("REQUEST_LOG_PAYLOAD_SAMPLE_RATE", "0")
+    )
+    REQUEST_LOG_PAYLOAD_MAX_CHARS: int = 256
 
     # Django Admin API Settings
     DJANGO_ADMIN_HOST: str = os.getenv("DJANGO_ADMIN_HOST", "admin")
     DJANGO_ADMIN_PORT: int = int(os.getenv("DJANGO_ADMIN_PORT", "8001"))
+    # Sent as X-Service-Token to the admin's internal endpoints
+    INTERNAL_SERVICE_TOKEN: str = os.getenv("INTERNAL_SERVICE_TOKEN", "")
+
+    # Curated interactions fetched per request when use_training_context is set
+    TRAINING_CONTEXT_LIMIT: int = 20
+    # The TTL is what bounds staleness: invalidation from the admin is a
+    # best-effort hint that reaches one worker, and curated rows that arrive
+    # through the log endpoints or bulk admin updates send none
+    TRAINING_CONTEXT_CACHE_TTL: float = 60.0  # seconds
+    TRAINING_CONTEXT_CACHE_MAX_ENTRIES: int = 1024
+    TRAINING_CONTEXT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Interaction logging pipeline (background batches to the Django admin)
+    INTERACTION_LOG_QUEUE_SIZE: int = 10000
+    INTERACTION_LOG_BATCH_SIZE: int = 50
+    INTERACTION_LOG_FLUSH_INTERVAL: float = 1.0  # seconds
+    INTERACTION_LOG_MAX_RETRIES: int = 3
+    INTERACTION_LOG_RETRY_BACKOFF: float = 0.5  # seconds, doubled per retry
+    INTERACTION_LOG_SPOOL_PATH: str = os.getenv(
+        "INTERACTION_LOG_SPOOL_PATH", "/tmp/llm_interactions.spool.jsonl"
+    )
 
     class Config:
         case_sensitive = True
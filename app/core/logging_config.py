@@ -0,0 +1,94 @@
+import atexit
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler renders ``msg % args`` before enqueueing; the queue is
+    in-process, so the record can be passed through as is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RESERVED and not key.startswith("_")
+        )
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def build_formatter(fmt: Optional[str] = None) -> logging.Formatter:
+    if (fmt or settings.LOG_FORMAT) == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    handler: Optional[logging.Handler] = None,
+) -> QueueListener:
+    """
+    Route the root logger through a queue so logging calls never block on I/O.
+
+    Records are put on an in-memory queue by a QueueHandler and written to
+    ``handler`` (stderr by default) on the QueueListener's thread. Calling
+    this again replaces the previous configuration.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    handler = handler or logging.StreamHandler()
+    handler.setFormatter(build_formatter(fmt))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+    return _listener
+
+
+def stop_logging() -> None:
+    """Detach the queue handler, flush queued records and stop the listener."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
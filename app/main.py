@@ -1,13 +1,19 @@
+import asyncio
+import time
 import uuid
 from typing import Dict
 
-import requests
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.api.routes import llm_service
 from app.api.routes import router as api_router
 from app.core.config import settings
-from app.services.llm_service import LLMService
+from app.core.logging_config import configure_logging, stop_logging
+from app.services import metrics
+from app.services.interaction_logger import interaction_logger
+from app.services.scheduler import PRIORITY_INTERACTIVE, SchedulerBusy
 
 app = FastAPI(
     title="LLM Experimentation Platform",
@@ -24,11 +30,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class MetricsMiddleware:
+    """Record HTTP latency per route template until the response starts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                metrics.HTTP_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=message["status"],
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
+
+
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
-llm_service = LLMService()
-
 
 @app.get("/")
 async def root():
@@ -39,54 +71,87 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text exposition of the service metrics."""
+    scheduler = llm_service.scheduler.stats()
+    state = {
+        "scheduler_active": sum(scheduler["active"].values()),
+        "scheduler_queued": scheduler["queued"],
+        "single_flight_in_flight": llm_service.single_flight.in_flight(),
+        "interaction_log_queue": interaction_logger.queue_size(),
+        "healthy_ollama_nodes": sum(node.healthy for node in llm_service.pool.nodes),
+        "model_catalog_age_seconds": llm_service.catalog.age or 0,
+        "training_context_cache_entries": llm_service.training_context_cache.stats()[
+            "entries"
+        ],
+        "conversation_history_entries": llm_service.history.stats()["entries"],
+    }
+    for name, value in state.items():
+        metrics.STATE.set(value, name=name)
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/health")
 async def health_check() -> Dict:
-    """Health check endpoint that verifies Ollama connection and model availability."""
+    """
+    Health check served from the model catalog, so load balancer probes do
+    not reach Ollama. A stale catalog reports "degraded".
+    """
     try:
-        # Check Ollama API
-        ollama_url = f"http://{settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}/api/tags"
-        response = requests.get(ollama_url, timeout=5)
-        response.raise_for_status()
-
-        # Check if our default model is available
-        models = [model["name"] for model in response.json().get("models", [])]
-        model_status = settings.DEFAULT_MODEL in models
-
-        return {
-            "status": "healthy",
-            "ollama_status": "connected",
-            "default_model_available": model_status,
-            "default_model": settings.DEFAULT_MODEL,
-        }
-    except requests.RequestException as e:
+        models = await llm_service.list_models()
+    except Exception as e:
         return {"status": "unhealthy", "error": str(e), "ollama_status": "disconnected"}
 
+    catalog = llm_service.catalog
+    return {
+        "status": "degraded" if catalog.stale else "healthy",
+        "ollama_status": "unreachable" if catalog.error else "connected",
+        "default_model_available": settings.DEFAULT_MODEL in models,
+        "default_model": settings.DEFAULT_MODEL,
+        "catalog_stale": catalog.stale,
+        "catalog_age_seconds": catalog.snapshot()["age_seconds"],
+    }
 
-@app.on_event("startup")
-async def startup_event():
-    """Verify Ollama connection and pull the default model if not available."""
+
+async def prepare_models():
+    """Pull the default model if it is missing, then warm the configured models."""
     try:
-        health_status = await health_check()
-        if not health_status.get("default_model_available"):
-            # Pull the default model
-            ollama_url = (
-                f"http://{settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}/api/pull"
-            )
-            response = requests.post(
-                ollama_url,
-                json={"name": settings.DEFAULT_MODEL},
-                timeout=300,  # Allow 5 minutes for model download
-            )
-            response.raise_for_status()
+        models = await llm_service.list_models()
+        if settings.DEFAULT_MODEL not in models:
+            # Allow 5 minutes for the download
+            await llm_service.pull_model(settings.DEFAULT_MODEL, timeout=300)
+        await llm_service.residency.warm_configured()
     except Exception as e:
         print(f"Startup check failed: {str(e)}")
-        # Don't raise the error - let the app start anyway
-        # The health check endpoint will show the actual status
+        # Don't raise the error - the health check endpoint will show the status
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background workers; models are pulled and warmed without blocking."""
+    configure_logging()
+    interaction_logger.start()
+    llm_service.start_health_checks()
+    app.state.prepare_models = asyncio.ensure_future(prepare_models())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections and flush queued interaction logs."""
+    app.state.prepare_models.cancel()
+    await llm_service.aclose()
+    await asyncio.to_thread(interaction_logger.close)
+    stop_logging()
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    metrics.WEBSOCKET_CONNECTIONS.inc()
     conversation_id = None
     session_id = None
     user_id = None
@@ -103,21 +168,14 @@ async def websocket_endpoint(websocket: WebSocket):
             user_id = data.get("user_id") or user_id
             conversation_id = data.get("conversation_id") or conversation_id
             use_training_context = data.get("use_training_context", False)
+            stream = data.get("stream", True)
 
             # If no conversation_id, create one in Django
             if not conversation_id:
                 try:
-                    conv_resp = requests.post(
-                        f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}/chat/conversations/create/",
-                        json={
-                            "title": "Web Chat",
-                            "session_id": session_id,
-                            "user_id": user_id,
-                        },
-                        timeout=5,
+                    conversation_id = await llm_service.create_conversation(
+                        "Web Chat", session_id=session_id, user_id=user_id
                     )
-                    if conv_resp.status_code == 201:
-                        conversation_id = conv_resp.json().get("id")
                 except Exception as e:
                     await websocket.send_json(
                         {"error": f"Failed to create conversation: {str(e)}"}
@@ -125,7 +183,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     continue
 
             try:
-                result = llm_service.generate_response(
+                generate_kwargs = dict(
                     prompt=prompt,
                     model=model,
                     temperature=temperature,
@@ -136,28 +194,24 @@ async def websocket_endpoint(websocket: WebSocket):
                     user_id=user_id,
                     use_training_context=use_training_context,
                     conversation_id=conversation_id,
+                    priority=PRIORITY_INTERACTIVE,
                 )
-                # Log interaction to Django with conversation
-                try:
-                    admin_url = f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}/chat/llm-interactions/log/"
-                    llm_data = {
-                        "prompt": prompt,
-                        "response": result["message"]["content"],
-                        "model_name": model,
-                        "temperature": temperature,
-                        "top_p": None,
-                        "frequency_penalty": None,
-                        "presence_penalty": None,
-                        "context": context,
-                        "retrieved_documents": None,
-                        "streamed": False,
-                        "session_id": session_id,
-                        "user": user_id,
-                        "conversation": conversation_id,
-                    }
-                    requests.post(admin_url, json=llm_data, timeout=5)
-                except Exception:
-                    pass  # Don't block user on logging error
+                if stream:
+                    # Forward deltas as Ollama produces them; the last event
+                    # carries the full message and usage.
+                    async for event in llm_service.generate_stream(**generate_kwargs):
+                        if event.get("done"):
+                            result = event
+                        else:
+                            await websocket.send_json(
+                                {
+                                    "delta": event["delta"],
+                                    "conversation_id": conversation_id,
+                                    "session_id": session_id,
+                                }
+                            )
+                else:
+                    result = await llm_service.generate_response(**generate_kwargs)
                 await websocket.send_json(
                     {
                         "response": result["message"]["content"],
@@ -165,9 +219,16 @@ async def websocket_endpoint(websocket: WebSocket):
                         "usage": result.get("usage", {}),
                         "conversation_id": conversation_id,
                         "session_id": session_id,
+                        "done": True,
                     }
                 )
+            except SchedulerBusy as e:
+                await websocket.send_json(
+                    {"error": str(e), "retry_after": e.retry_after}
+                )
             except Exception as e:
                 await websocket.send_json({"error": str(e)})
     except WebSocketDisconnect:
         pass
+    finally:
+        metrics.WEBSOCKET_CONNECTIONS.dec()
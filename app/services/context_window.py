@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Context length (in tokens) per model family. Lookups strip the tag
+# ("mistral:7b-instruct-q4" -> "mistral") and fall back to the longest
+# matching family prefix ("llama3.1" -> "llama3").
+MODEL_CONTEXT_LENGTHS = {
+    "mistral": 8192,
+    "mixtral": 32768,
+    "llama2": 4096,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "codellama": 16384,
+    "gemma": 8192,
+    "gemma2": 8192,
+    "phi3": 4096,
+    "qwen2": 32768,
+    "qwen2.5": 32768,
+    "tinyllama": 2048,
+}
+
+# Role markers and separators the chat template adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+POLICIES = ("sliding_window", "last_n_turns", "summarize")
+
+# Tokens reserved for the instructions of a summary request
+SUMMARY_PROMPT_TOKENS = 64
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count: roughly four characters per token for BPE vocabularies."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message) -> int:
+    content = message["content"] if isinstance(message, dict) else message.content
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def lookup_model_family(registry: Dict, model: str):
+    """Return the registry value for a model's family, or None if unknown."""
+    name = model.split(":")[0].split("/")[-1].lower()
+    if name in registry:
+        return registry[name]
+    families = [family for family in registry if name.startswith(family)]
+    if families:
+        return registry[max(families, key=len)]
+    return None
+
+
+def context_length(model: str, default: Optional[int] = None) -> int:
+    """Return the context length registered for a model name."""
+    length = lookup_model_family(MODEL_CONTEXT_LENGTHS, model)
+    return length or default or settings.CONTEXT_WINDOW_DEFAULT_LENGTH
+
+
+class ContextWindowManager:
+    """
+    Keep the prompt sent for each turn within the model's context budget.
+
+    Policies:
+      - ``sliding_window``: drop the oldest history messages until it fits.
+      - ``last_n_turns``: keep only the last ``max_turns`` user/assistant
+        turns, then slide if that is still too long.
+      - ``summarize``: like ``last_n_turns``, but the caller replaces the
+        dropped messages with a model-written summary.
+
+    System messages in the history are always kept.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        max_turns: Optional[int] = None,
+        summary_max_tokens: Optional[int] = None,
+    ):
+        self.policy = policy or settings.CONTEXT_WINDOW_POLICY
+        if self.policy not in POLICIES:
+            raise ValueError(
+                f"Unknown context window policy {self.policy!r}, expected one of {POLICIES}"
+            )
+        self.max_turns = (
+            settings.CONTEXT_WINDOW_MAX_TURNS if max_turns is None else max_turns
+        )
+        self.summary_max_tokens = (
+            summary_max_tokens or settings.CONTEXT_WINDOW_SUMMARY_MAX_TOKENS
+        )
+
+    def budget(self, model: str, max_tokens: int) -> int:
+        """Prompt tokens available once the completion has been reserved."""
+        length = context_length(model)
+        return length - min(max_tokens, length // 2)
+
+    def summary_chunks(self, messages: List, model: str) -> List[List]:
+        """
+        Split ``messages`` into runs that each fit one summary request.
+
+        A request holds the summary so far (up to ``summary_max_tokens``)
+        and one run; a message too long for any run gets one of its own.
+        """
+        budget = self.budget(model, self.summary_max_tokens)
+        budget -= self.summary_max_tokens + SUMMARY_PROMPT_TOKENS
+        chunks, chunk, used = [], [], 0
+        for message in messages:
+            tokens = message_tokens(message)
+            if chunk and used + tokens > budget:
+                chunks.append(chunk)
+                chunk, used = [], 0
+            chunk.append(message)
+            used += tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def fit(
+        self, history: Optional[List], model: str, max_tokens: int, pinned: List[Dict]
+    ) -> Tuple[List, List]:
+        """
+        Split ``history`` into the messages to send and the ones to drop.
+
+        ``pinned`` are the messages that are always sent (system prompt,
+        training examples and the new prompt) and count against the budget.
+        """
+        if not history:
+            return [], []
+        budget = self.budget(model, max_tokens)
+        budget -= sum(message_tokens(message) for message in pinned)
+        if self.policy == "summarize":
+            budget -= self.summary_max_tokens
+
+        system = [msg for msg in history if msg.role == "system"]
+        turns = [msg for msg in history if msg.role != "system"]
+        budget -= sum(message_tokens(msg) for msg in system)
+
+        dropped = []
+        if self.policy in ("last_n_turns", "summarize"):
+            keep = self.max_turns * 2
+            cut = max(len(turns) - keep, 0)
+            dropped, turns = turns[:cut], turns[cut:]
+
+        used = sum(message_tokens(msg) for msg in turns)
+        start = 0
+        while start < len(turns) and used > budget:
+            used -= message_tokens(turns[start])
+            start += 1
+        dropped += turns[:start]
+        return system + turns[start:], dropped
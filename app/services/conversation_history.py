@@ -0,0 +1,101 @@
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+
+if TYPE_CHECKING:
+    from app.services.llm_service import AsyncLLMService
+
+logger = logging.getLogger(__name__)
+
+
+def _history_size(messages: List[Dict]) -> int:
+    return sum(len(message["content"]) for message in messages)
+
+
+class ConversationHistory:
+    """
+    Server-side history of each conversation, so clients only send the new
+    prompt of a turn.
+
+    The hot tier is an in-process LRU of the last ``max_messages`` messages
+    per conversation. A miss loads them from the admin, which appends the
+    prompt and response of every interaction logged with a conversation to
+    its history. Finished turns are added to the hot tier with ``append``
+    and reach the admin through the batching interaction logger (see
+    ``AsyncLLMService._record_turn``).
+
+    Each process keeps its own hot tier. ``append`` does not extend an
+    entry's TTL, so every process reloads a conversation at least every
+    CONVERSATION_HISTORY_CACHE_TTL seconds and picks up turns that other
+    processes served.
+    """
+
+    def __init__(
+        self,
+        service: "AsyncLLMService",
+        max_messages: Optional[int] = None,
+        cache: Optional[TTLCache] = None,
+    ):
+        self.service = service
+        self.max_messages = max_messages or settings.CONVERSATION_HISTORY_MAX_MESSAGES
+        self.cache = cache or TTLCache(
+            ttl=settings.CONVERSATION_HISTORY_CACHE_TTL,
+            max_entries=settings.CONVERSATION_HISTORY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.CONVERSATION_HISTORY_CACHE_MAX_BYTES,
+            sizeof=_history_size,
+        )
+
+    async def load(self, conversation_id: int) -> List[Dict]:
+        """The most recent messages of a conversation, oldest first."""
+        cached = self.cache.get(conversation_id)
+        if cached is not None:
+            return list(cached)
+        # Concurrent misses for one conversation share a single admin request
+        return list(
+            await self.service.single_flight.do(
+                ("history", conversation_id), lambda: self._fetch(conversation_id)
+            )
+        )
+
+    async def _fetch(self, conversation_id: int) -> List[Dict]:
+        try:
+            resp = await self.service.client.get(
+                f"{self.service.admin_url}/chat/conversations/"
+                f"{conversation_id}/messages/",
+                params={"limit": self.max_messages},
+                headers=self.service.admin_headers,
+                timeout=5,
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            # Not cached, so the next turn tries again
+            logger.warning("Failed to load conversation %s: %s", conversation_id, e)
+            return []
+        messages = [
+            {"role": row["role"], "content": row["content"]}
+            for row in resp.json()["results"]
+        ]
+        self.cache.set(conversation_id, messages)
+        return messages
+
+    def start(self, conversation_id: int) -> None:
+        """Record a conversation that was just created, so its first turn skips the load."""
+        self.cache.set(conversation_id, [])
+
+    def append(self, conversation_id: int, prompt: str, response: str) -> None:
+        """Add a completed turn to the cached history, if the conversation is hot."""
+        cached = self.cache.get(conversation_id)
+        if cached is None:
+            return
+        messages = cached + [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": response},
+        ]
+        self.cache.replace(conversation_id, messages[-self.max_messages :])
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
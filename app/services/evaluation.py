@@ -0,0 +1,399 @@
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.scheduler import PRIORITY_BATCH
+
+if TYPE_CHECKING:
+    from app.services.llm_service import AsyncLLMService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CRITERIA = {
+    "relevance": "Is the response relevant to the prompt?",
+    "accuracy": "Is the information accurate?",
+    "completeness": "Is the response complete?",
+    "clarity": "Is the response clear and well-structured?",
+}
+
+MODES = ("json", "parallel")
+SCORE_MIN = 1
+SCORE_MAX = 10
+
+EVALUATOR_SYSTEM_PROMPT = "You are an expert AI evaluator. Be objective and critical."
+
+
+def json_messages(prompt: str, response: str, criteria: Dict[str, str]) -> List[Dict]:
+    """Judge messages asking for every criterion in one JSON object."""
+    listing = "\n".join(f"- {name}: {question}" for name, question in criteria.items())
+    return [
+        {"role": "system", "content": EVALUATOR_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Evaluate the following AI response to a prompt.\n"
+                f"Rate each criterion with an integer from {SCORE_MIN} to {SCORE_MAX} "
+                "and give a brief explanation.\n\n"
+                f"Prompt: {prompt}\n"
+                f"Response: {response}\n\n"
+                f"Criteria:\n{listing}\n\n"
+                'Answer with a JSON object of the form {"scores": {"<criterion>": '
+                '<score>}, "explanations": {"<criterion>": "<explanation>"}}.'
+            ),
+        },
+    ]
+
+
+def criterion_messages(
+    prompt: str, response: str, name: str, question: str
+) -> List[Dict]:
+    """Judge messages for a single criterion."""
+    return [
+        {"role": "system", "content": EVALUATOR_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Evaluate the following AI response to a prompt on one criterion.\n"
+                f"Criterion ({name}): {question}\n\n"
+                f"Prompt: {prompt}\n"
+                f"Response: {response}\n\n"
+                f'Answer with a JSON object of the form {{"score": <integer '
+                f'{SCORE_MIN}-{SCORE_MAX}>, "explanation": "<explanation>"}}.'
+            ),
+        },
+    ]
+
+
+def parse_json_object(text: str) -> Dict:
+    """Parse the JSON object in a judge reply, tolerating surrounding prose."""
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise ValueError("Judge reply does not contain a JSON object")
+        try:
+            value = json.loads(text[start : end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Judge reply is not valid JSON: {e}")
+    if not isinstance(value, dict):
+        raise ValueError("Judge reply is not a JSON object")
+    return value
+
+
+def validate_score(value) -> int:
+    """Coerce a judge score to an int within [SCORE_MIN, SCORE_MAX]."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid score {value!r}")
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid score {value!r}")
+    if number != int(number) or not SCORE_MIN <= number <= SCORE_MAX:
+        raise ValueError(
+            f"Score {value!r} is not an integer from {SCORE_MIN} to {SCORE_MAX}"
+        )
+    return int(number)
+
+
+def build_result(
+    scores: Dict[str, int],
+    explanations: Dict[str, str],
+    errors: Dict[str, str],
+    model: str,
+) -> Dict:
+    """Assemble an evaluation result with the overall score (rounded mean)."""
+    overall = round(sum(scores.values()) / len(scores)) if scores else None
+    return {
+        "score": overall,
+        "scores": scores,
+        "explanations": explanations,
+        "errors": errors,
+        "model": model,
+    }
+
+
+def parse_evaluation(text: str, criteria: Dict[str, str], model: str) -> Dict:
+    """Validate a JSON-mode judge reply covering every criterion."""
+    scores, explanations, errors = {}, {}, {}
+    try:
+        reply = parse_json_object(text)
+    except ValueError as e:
+        return build_result({}, {}, {name: str(e) for name in criteria}, model)
+    reply_scores = reply.get("scores") if isinstance(reply.get("scores"), dict) else {}
+    reply_explanations = (
+        reply.get("explanations") if isinstance(reply.get("explanations"), dict) else {}
+    )
+    for name in criteria:
+        if name not in reply_scores:
+            errors[name] = "Missing score"
+            continue
+        try:
+            scores[name] = validate_score(reply_scores[name])
+        except ValueError as e:
+            errors[name] = str(e)
+            continue
+        explanations[name] = str(reply_explanations.get(name, ""))
+    return build_result(scores, explanations, errors, model)
+
+
+def feedback_comment(result: Dict) -> str:
+    """Human-readable summary stored in LLMInteraction.feedback_comment."""
+    lines = [
+        f"{name}: {score}/{SCORE_MAX} - {result['explanations'].get(name, '')}".rstrip(
+            " -"
+        )
+        for name, score in result["scores"].items()
+    ]
+    lines += [
+        f"{name}: not scored ({error})" for name, error in result["errors"].items()
+    ]
+    return "\n".join(lines)
+
+
+class EvaluationEngine:
+    """
+    LLM-as-judge grading with validated scores and bulk write-back.
+
+    ``json`` mode asks for every criterion in a single call using Ollama's
+    JSON format mode; ``parallel`` mode runs one judge call per criterion
+    concurrently. Judge calls go through the service's response cache and
+    single-flight, so grading the same response twice is cheap.
+    """
+
+    def __init__(
+        self,
+        llm_service: "AsyncLLMService",
+        model: Optional[str] = None,
+        mode: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        priority: int = PRIORITY_BATCH,
+    ):
+        self.llm_service = llm_service
+        self.priority = priority
+        self.model = model or settings.EVALUATION_MODEL or llm_service.default_model
+        self.mode = self._check_mode(mode or settings.EVALUATION_MODE)
+        self.temperature = (
+            settings.EVALUATION_TEMPERATURE if temperature is None else temperature
+        )
+        self.max_tokens = max_tokens or settings.EVALUATION_MAX_TOKENS
+
+    @staticmethod
+    def _check_mode(mode: str) -> str:
+        if mode not in MODES:
+            raise ValueError(
+                f"Unknown evaluation mode {mode!r}, expected one of {MODES}"
+            )
+        return mode
+
+    async def _judge(
+        self, messages: List[Dict], semaphore: Optional[asyncio.Semaphore]
+    ) -> str:
+        if semaphore is None:
+            return await self._complete(messages)
+        async with semaphore:
+            return await self._complete(messages)
+
+    async def _complete(self, messages: List[Dict]) -> str:
+        return await self.llm_service._complete(
+            messages,
+            self.model,
+            self.temperature,
+            self.max_tokens,
+            response_format="json",
+            priority=self.priority,
+        )
+
+    async def evaluate(
+        self,
+        prompt: str,
+        response: str,
+        criteria: Optional[Dict[str, str]] = None,
+        mode: Optional[str] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Dict:
+        """
+        Grade one response.
+
+        Returns ``{"score", "scores", "explanations", "errors", "model"}``
+        where ``score`` is the rounded mean of the valid criterion scores and
+        ``errors`` lists the criteria the judge did not score validly.
+        ``semaphore``, when given, bounds the number of judge calls in flight.
+        """
+        criteria = criteria or DEFAULT_CRITERIA
+        mode = self._check_mode(mode) if mode else self.mode
+        if mode == "json":
+            raw = await self._judge(
+                json_messages(prompt, response, criteria), semaphore
+            )
+            return parse_evaluation(raw, criteria, self.model)
+
+        names = list(criteria)
+        replies = await asyncio.gather(
+            *(
+                self._judge(
+                    criterion_messages(prompt, response, name, criteria[name]),
+                    semaphore,
+                )
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+        scores, explanations, errors = {}, {}, {}
+        failures = []
+        for name, reply in zip(names, replies):
+            if isinstance(reply, Exception):
+                failures.append(reply)
+                errors[name] = str(reply)
+                continue
+            try:
+                parsed = parse_json_object(reply)
+                scores[name] = validate_score(parsed.get("score"))
+                explanations[name] = str(parsed.get("explanation", ""))
+            except ValueError as e:
+                errors[name] = str(e)
+        if len(failures) == len(names):
+            # No judge call got through; surface the error to the caller
+            raise failures[0]
+        return build_result(scores, explanations, errors, self.model)
+
+    async def evaluate_many(
+        self,
+        items: List[Dict],
+        criteria: Optional[Dict[str, str]] = None,
+        mode: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        write_back: bool = True,
+    ) -> AsyncIterator[Dict]:
+        """
+        Grade many ``{"prompt", "response", "interaction_id"?}`` items.
+
+        At most ``concurrency`` judge calls run at once. Results are yielded in
+        completion order as ``{"index", "interaction_id", **result}`` or
+        ``{"index", "error"}``, followed by a ``{"summary": ...}`` event.
+        Scores of items with an ``interaction_id`` are written back to the
+        admin in batches when ``write_back`` is set.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.EVALUATION_CONCURRENCY)
+        results: asyncio.Queue = asyncio.Queue()
+        started = time.monotonic()
+
+        async def run_one(index: int, item):
+            try:
+                if not isinstance(item, dict) or not all(
+                    isinstance(item.get(field), str) for field in ("prompt", "response")
+                ):
+                    raise ValueError(
+                        "Each item must be an object with string 'prompt' and 'response'"
+                    )
+                result = await self.evaluate(
+                    item["prompt"],
+                    item["response"],
+                    criteria=criteria,
+                    mode=mode,
+                    semaphore=semaphore,
+                )
+                await results.put(
+                    {
+                        "index": index,
+                        "interaction_id": item.get("interaction_id"),
+                        **result,
+                    }
+                )
+            except Exception as e:
+                await results.put({"index": index, "error": str(e)})
+
+        tasks = [
+            asyncio.ensure_future(run_one(index, item))
+            for index, item in enumerate(items)
+        ]
+        pending_updates: List[Dict] = []
+        scored = []
+        failed = written = 0
+        try:
+            for _ in range(len(tasks)):
+                result = await results.get()
+                if "error" in result:
+                    failed += 1
+                elif result["score"] is not None:
+                    scored.append(result["score"])
+                    if write_back and result["interaction_id"] is not None:
+                        pending_updates.append(self.score_update(result))
+                if len(pending_updates) >= settings.EVALUATION_WRITE_BATCH_SIZE:
+                    written += await self.write_scores(pending_updates)
+                    pending_updates = []
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending_updates:
+            written += await self.write_scores(pending_updates)
+
+        yield {
+            "summary": {
+                "total": len(tasks),
+                "succeeded": len(tasks) - failed,
+                "failed": failed,
+                "written": written,
+                "mean_score": round(sum(scored) / len(scored), 2) if scored else None,
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+            }
+        }
+
+    @staticmethod
+    def score_update(result: Dict) -> Dict:
+        return {
+            "id": result["interaction_id"],
+            "score": result["score"],
+            "feedback_comment": feedback_comment(result),
+        }
+
+    async def write_scores(self, updates: List[Dict]) -> int:
+        """Bulk-update LLMInteraction.score/feedback_comment in the admin."""
+        url = f"{self.llm_service.admin_url}/chat/llm-interactions/scores/"
+        try:
+            response = await self.llm_service.client.post(
+                url, json=updates, headers=self.llm_service.admin_headers, timeout=10
+            )
+            response.raise_for_status()
+            return response.json().get("updated", 0)
+        except Exception as e:
+            logger.error("Failed to write %s evaluation scores: %s", len(updates), e)
+            return 0
+
+    async def conversation_items(self, conversation_id: int) -> List[Dict]:
+        """Fetch every interaction of a conversation as evaluation items."""
+        url = (
+            f"{self.llm_service.admin_url}/chat/conversations/"
+            f"{conversation_id}/interactions/"
+        )
+        items, cursor = [], None
+        while True:
+            params = {"limit": 500}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = await self.llm_service.client.get(
+                url,
+                params=params,
+                headers=self.llm_service.admin_headers,
+                timeout=10,
+            )
+            response.raise_for_status()
+            page = response.json()
+            items += [
+                {
+                    "interaction_id": row["id"],
+                    "prompt": row["prompt"],
+                    "response": row["response"],
+                }
+                for row in page["results"]
+            ]
+            cursor = page.get("next_cursor")
+            if cursor is None:
+                return items
@@ -0,0 +1,227 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import requests
+
+from app.core.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionLogger:
+    """
+    Ship LLM interactions to the Django admin without blocking the caller.
+
+    Records are put on a bounded in-memory queue and a daemon worker thread
+    flushes them in batches, retrying with exponential backoff. Batches that
+    still fail, or records that do not fit in the queue, are appended to a
+    local JSONL spool which is replayed after the next successful flush.
+
+    Delivery is at least once; each record carries an ``idempotency_key``
+    that the admin stores uniquely, so redelivered records are stored once.
+    """
+
+    def __init__(
+        self,
+        admin_url: Optional[str] = None,
+        max_queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        spool_path: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        self.admin_url = admin_url or (
+            f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}"
+        )
+        self.batch_size = batch_size or settings.INTERACTION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.INTERACTION_LOG_FLUSH_INTERVAL
+        self.max_retries = (
+            settings.INTERACTION_LOG_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.retry_backoff = (
+            settings.INTERACTION_LOG_RETRY_BACKOFF
+            if retry_backoff is None
+            else retry_backoff
+        )
+        self.spool_path = spool_path or settings.INTERACTION_LOG_SPOOL_PATH
+        self.session = session or requests.Session()
+        self._queue = queue.Queue(
+            maxsize=max_queue_size or settings.INTERACTION_LOG_QUEUE_SIZE
+        )
+        self._spool_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the background worker if it is not running yet."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="interaction-logger", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def log(self, record: Dict) -> None:
+        """Enqueue an interaction record; never blocks on the network."""
+        self.start()
+        record.setdefault("idempotency_key", str(uuid.uuid4()))
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Interaction log queue is full, spooling record to disk")
+            self._spool([record])
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush queued records and stop the worker."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._stop.is_set():
+                return
+
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    def _next_batch(self) -> List[Dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if self._stop.is_set():
+                    # Drain whatever is left without waiting for the interval
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[Dict]):
+        with metrics.stage("admin_log_flush"):
+            self._flush_batch(batch)
+
+    def _flush_batch(self, batch: List[Dict]):
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            pending = self._send(pending)
+            if not pending:
+                self._replay_spool()
+                return
+            if attempt < self.max_retries and not self._stop.is_set():
+                time.sleep(self.retry_backoff * (2**attempt))
+        logger.error(
+            "Failed to log %s LLM interactions to Django, spooling to disk",
+            len(pending),
+        )
+        self._spool(pending)
+
+    def _send(self, batch: List[Dict]) -> List[Dict]:
+        """Send a batch and return the records that should be retried."""
+        url = f"{self.admin_url}/chat/llm-interactions/bulk/"
+        try:
+            response = self.session.post(url, json=batch, timeout=10)
+        except requests.RequestException as e:
+            logger.warning("Error logging LLM interactions: %s", e)
+            return batch
+        if response.status_code < 300 and response.status_code != 207:
+            metrics.ADMIN_LOG_RECORDS.inc(len(batch), outcome="sent")
+            return []
+        errors = self._item_errors(response)
+        if errors is None and response.status_code != 207:
+            # The batch as a whole was refused (404, 413, a 400 that is not
+            # about its items, 5xx): keep it for a retry and the spool.
+            # Records carry an idempotency key, so resending is safe.
+            logger.warning(
+                "Django refused LLM interactions: %s %s",
+                response.status_code,
+                response.text,
+            )
+            return batch
+        # Rejected items failed validation and will not succeed on retry
+        errors = errors or []
+        logger.error("Django rejected %s LLM interactions: %s", len(errors), errors)
+        metrics.ADMIN_LOG_RECORDS.inc(len(batch) - len(errors), outcome="sent")
+        metrics.ADMIN_LOG_RECORDS.inc(len(errors), outcome="rejected")
+        return []
+
+    @staticmethod
+    def _item_errors(response) -> Optional[List[Dict]]:
+        """Per-item validation errors of a 207 or 400 reply, None if there are none."""
+        if response.status_code not in (207, 400):
+            return None
+        try:
+            errors = response.json().get("errors")
+        except (ValueError, AttributeError):
+            return None
+        if not errors or not isinstance(errors, list):
+            return None
+        return errors
+
+    def _spool(self, records: List[Dict]) -> bool:
+        """Append records to the spool, returning whether they were written."""
+        metrics.ADMIN_LOG_RECORDS.inc(len(records), outcome="spooled")
+        with self._spool_lock:
+            try:
+                with open(self.spool_path, "a") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.error("Failed to spool LLM interactions: %s", e)
+                return False
+        return True
+
+    def _replay_spool(self):
+        """
+        Resend spooled records now that the admin is reachable again.
+
+        The spool is moved aside first so new failures start a fresh one, and
+        the moved file is only removed once its records were sent or written
+        back to the spool. A replay interrupted by a crash is resumed from it
+        on the next successful flush; records it already delivered are
+        dropped by the admin as duplicates.
+        """
+        replay_path = f"{self.spool_path}.replay"
+        with self._spool_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spool_path):
+                    return
+                os.replace(self.spool_path, replay_path)
+        with open(replay_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        logger.info("Replaying %s spooled LLM interactions", len(records))
+        for start in range(0, len(records), self.batch_size):
+            failed = self._send(records[start : start + self.batch_size])
+            if failed:
+                if not self._spool(failed + records[start + self.batch_size :]):
+                    return
+                break
+        os.remove(replay_path)
+
+
+interaction_logger = InteractionLogger()
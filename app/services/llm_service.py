@@ -1,28 +1,109 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
+import httpx
 import psutil
 import requests
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.services import evaluation
+from app.services import interaction_logger as interaction_logging
+from app.services import metrics, request_log
+from app.services.cache import TTLCache
+from app.services.context_window import ContextWindowManager, context_length
+from app.services.conversation_history import ConversationHistory
+from app.services.model_catalog import ModelCatalog
+from app.services.ollama_pool import OllamaNode, OllamaPool, configured_endpoints
+from app.services.pull_jobs import PullJobManager, parse_pull_line
+from app.services.residency import ResidencyManager, keep_alive_for
+from app.services.response_cache import ResponseCache, build_response_cache, request_key
+from app.services.scheduler import PRIORITY_API, PRIORITY_BATCH, Scheduler
+from app.services.singleflight import SingleFlight
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# generate_response arguments accepted for each item of a batch
+BATCH_ITEM_FIELDS = (
+    "prompt",
+    "model",
+    "temperature",
+    "max_tokens",
+    "system_prompt",
+    "context",
+    "session_id",
+    "user_id",
+)
+
 
 class Message(BaseModel):
     role: str
     content: str
 
 
-class LLMService:
-    def __init__(self):
-        self.base_url = f"http://{settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}"
+class BaseLLMService:
+    """Request building and response parsing shared by the sync and async services."""
+
+    def __init__(
+        self,
+        interaction_logger: Optional[interaction_logging.InteractionLogger] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        self.response_cache = (
+            build_response_cache() if response_cache is None else response_cache
+        )
+        self.interaction_logger = (
+            interaction_logger or interaction_logging.interaction_logger
+        )
+        self.base_url = configured_endpoints()[0]
+        self.admin_url = (
+            f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}"
+        )
+        # Authenticates calls to the admin's internal endpoints
+        self.admin_headers = (
+            {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+            if settings.INTERNAL_SERVICE_TOKEN
+            else {}
+        )
         self.default_model = settings.DEFAULT_MODEL
         self.default_temperature = settings.DEFAULT_TEMPERATURE
         self.default_max_tokens = settings.DEFAULT_MAX_TOKENS
+        self.training_context_cache = TTLCache(
+            ttl=settings.TRAINING_CONTEXT_CACHE_TTL,
+            max_entries=settings.TRAINING_CONTEXT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.TRAINING_CONTEXT_CACHE_MAX_BYTES,
+            sizeof=lambda items: sum(
+                len(item["prompt"]) + len(item["response"]) for item in items
+            ),
+        )
+        self.context_window = ContextWindowManager()
+        self.summary_cache = TTLCache(
+            ttl=3600, max_entries=256, max_bytes=4 * 1024 * 1024, sizeof=len
+        )
+
+    def invalidate_training_context(
+        self, user_id=None, session_id=None, conversation_id=None
+    ) -> int:
+        """
+        Drop cached training context that could include the given interaction.
+
+        A cached key matches when each of its filters is unset or equal to the
+        interaction's value. With no arguments the whole cache is cleared.
+
+        This only shortens staleness on the worker that receives the call;
+        other workers, and rows logged with include_in_training already set,
+        rely on TRAINING_CONTEXT_CACHE_TTL.
+        """
+        if user_id is None and session_id is None and conversation_id is None:
+            return self.training_context_cache.invalidate()
+        values = (user_id, session_id, conversation_id)
+        return self.training_context_cache.invalidate(
+            lambda key: all(k is None or k == v for k, v in zip(key, values))
+        )
 
     def _check_memory_availability(self, required_gb: float = None) -> bool:
         """Check if enough memory is available for the model."""
@@ -30,25 +111,367 @@ class LLMService:
         available_gb = psutil.virtual_memory().available / (1024 * 1024 * 1024)
         return available_gb >= required_gb
 
-    def get_training_context(self, user_id=None, session_id=None, conversation_id=None):
-        """Retrieve past interactions marked for training."""
-        params = {}
+    @staticmethod
+    def _training_context_params(user_id=None, session_id=None, conversation_id=None):
+        params = {"limit": settings.TRAINING_CONTEXT_LIMIT}
         if user_id:
             params["user"] = user_id
         if session_id:
             params["session_id"] = session_id
         if conversation_id:
             params["conversation"] = conversation_id
+        return params
+
+    @staticmethod
+    def _normalize_context(context) -> Optional[List[Message]]:
+        """Accept history as Message objects or plain dicts (e.g. from the websocket)."""
+        if not context:
+            return None
+        return [msg if isinstance(msg, Message) else Message(**msg) for msg in context]
+
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[Message]] = None,
+        training_context: Optional[List[Dict]] = None,
+    ) -> List[Dict]:
+        """
+        Assemble the /api/chat messages array.
+
+        The order (system prompt, curated training examples, conversation
+        history, new prompt) keeps everything but the last turn identical
+        between calls, so Ollama can reuse its KV cache for the prefix and
+        only evaluate the new tokens.
+        """
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        for item in training_context or []:
+            messages.append({"role": "user", "content": item["prompt"]})
+            messages.append({"role": "assistant", "content": item["response"]})
+        for msg in context or []:
+            messages.append({"role": msg.role, "content": msg.content})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _summary_steps(self, dropped: List[Message], model: str):
+        """
+        Plan an incremental summary of ``dropped``.
+
+        Summaries are cached by the prefix of the history they cover, and
+        each turn only drops a few more messages, so the summary of the
+        longest cached prefix is reused and only the messages after it are
+        folded in. Returns that summary (None if there is none) and the
+        ``(messages, key)`` steps still to run; each step's summary is
+        cached under ``key``.
+        """
+        digest = hashlib.sha256(model.encode())
+        keys = []
+        for msg in dropped:
+            digest.update(json.dumps([msg.role, msg.content]).encode())
+            keys.append(digest.hexdigest())
+
+        summary, start = None, 0
+        for end in range(len(keys), 0, -1):
+            summary = self.summary_cache.get(keys[end - 1])
+            if summary is not None:
+                start = end
+                break
+
+        steps = []
+        for chunk in self.context_window.summary_chunks(dropped[start:], model):
+            start += len(chunk)
+            steps.append((chunk, keys[start - 1]))
+        return summary, steps
+
+    @staticmethod
+    def _summary_request(summary: Optional[str], chunk: List[Message]) -> List[Dict]:
+        """Messages asking to fold ``chunk`` into the summary so far."""
+        transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in chunk)
+        if summary:
+            transcript = (
+                f"Summary of the conversation so far: {summary}\n\n"
+                f"It continues:\n{transcript}"
+            )
+        return [
+            {
+                "role": "system",
+                "content": "Summarize the conversation below in a few sentences. "
+                "Keep names, facts and decisions that later turns may refer to.",
+            },
+            {"role": "user", "content": transcript},
+        ]
+
+    @staticmethod
+    def _with_summary(context: List[Message], summary: str) -> List[Message]:
+        return [
+            Message(
+                role="system", content=f"Summary of the earlier conversation: {summary}"
+            )
+        ] + context
+
+    @staticmethod
+    def _build_payload(
+        messages: List[Dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+        response_format: Optional[str] = None,
+    ) -> Dict:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                # Ollama otherwise runs with its own default window (2048) and
+                # silently truncates prompts the budget was computed to fit
+                "num_ctx": context_length(model),
+            },
+            "keep_alive": keep_alive_for(model),
+        }
+        if response_format:
+            payload["format"] = response_format
+        return payload
+
+    @staticmethod
+    def _parse_chat_response(raw_text: str):
+        """Return the generated text and the final Ollama chunk from a /api/chat body."""
+        full_response = ""
+        last_response = None
+
+        try:
+            # Try to parse the entire response as a single JSON object first
+            result = json.loads(raw_text)
+            if result.get("message", {}).get("content"):
+                full_response = result["message"]["content"]
+                last_response = result
+        except json.JSONDecodeError:
+            # If that fails, try to parse line by line
+            for line in raw_text.split("\n"):
+                if not line.strip():
+                    continue
+
+                try:
+                    chunk = json.loads(line)
+                    if chunk.get("message", {}).get("content"):
+                        full_response += chunk["message"]["content"]
+                    if chunk.get("done"):
+                        last_response = chunk
+                except json.JSONDecodeError as e:
+                    logger.error("Error decoding JSON: %s, line: %s", e, line)
+                    continue
+
+        return full_response, last_response
+
+    @staticmethod
+    def _parse_stream_line(line: str):
+        """Return the content delta and the decoded chunk of one NDJSON stream line."""
+        if not line.strip():
+            return "", None
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise ValueError(chunk["error"])
+        return chunk.get("message", {}).get("content", ""), chunk
+
+    @staticmethod
+    def _format_response(full_response: str, last_response: Optional[Dict], model):
+        """Format the response to match our expected structure."""
+        prompt_tokens = (
+            last_response.get("prompt_eval_count", 0) if last_response else 0
+        )
+        completion_tokens = last_response.get("eval_count", 0) if last_response else 0
+        return {
+            "message": {
+                "content": full_response or "Sorry, I couldn't generate a response.",
+                "role": "assistant",
+            },
+            "model": model,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def _interaction_record(
+        prompt: str,
+        response: str,
+        model: str,
+        temperature: float,
+        context: Optional[List[Message]] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        streamed: bool = False,
+        conversation_id: Optional[int] = None,
+        usage: Optional[Dict] = None,
+    ) -> Dict:
+        usage = usage or {}
+        if usage.get("cache") == "hit":
+            # Served from the response cache: nothing was generated, and the
+            # usage is the original generation's, already logged with it
+            usage = {}
+        return {
+            "prompt": prompt,
+            "response": response,
+            "model_name": model,
+            "temperature": temperature,
+            "top_p": None,
+            "frequency_penalty": None,
+            "presence_penalty": None,
+            "context": [msg.dict() for msg in context] if context else None,
+            "retrieved_documents": None,
+            "streamed": streamed,
+            "session_id": session_id,
+            "user": user_id,
+            "conversation": conversation_id,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+        }
+
+    def _cache_key(self, payload: Dict, temperature: float):
+        """Cache key of a request, or None and the reason it is not cacheable."""
+        if self.response_cache is None:
+            return None, "disabled"
+        if temperature > settings.RESPONSE_CACHE_MAX_TEMPERATURE:
+            return None, "bypass"
+        return request_key(payload), None
+
+    def _cache_lookup(self, payload: Dict, temperature: float):
+        """
+        Look a request up in the response cache.
+
+        Returns the cache key (None when the request is not cacheable), the
+        cached response if any, and the status reported in ``usage["cache"]``.
+        """
+        key, status = self._cache_key(payload, temperature)
+        if key is None:
+            return None, None, status
+        cached = self.response_cache.get(key)
+        return key, cached, "miss" if cached is None else "hit"
+
+    @staticmethod
+    def _with_cache_status(response: Dict, status: str) -> Dict:
+        return {**response, "usage": {**response["usage"], "cache": status}}
+
+    def _log_interaction(self, llm_data: Dict):
+        """Queue the interaction for the background logger; never blocks."""
+        self.interaction_logger.log(llm_data)
+
+    @staticmethod
+    def _ollama_error(e: Exception) -> Exception:
+        error_msg = f"Error communicating with Ollama: {str(e)}"
+        if "model requires more system memory" in str(e):
+            error_msg += "\nTry using a smaller model like 'mistral:7b-instruct-q4'"
+        logger.error(error_msg)
+        return Exception(error_msg)
+
+
+class LLMService(BaseLLMService):
+    def get_training_context(self, user_id=None, session_id=None, conversation_id=None):
+        """Retrieve past interactions marked for training."""
+        cache_key = (user_id or None, session_id or None, conversation_id or None)
+        cached = self.training_context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        params = self._training_context_params(user_id, session_id, conversation_id)
         try:
-            admin_url = f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}/chat/llm-interactions/log/"
-            # This should be replaced with a dedicated endpoint for filtering in production
-            resp = requests.get(admin_url, params=params, timeout=5)
+            admin_url = f"{self.admin_url}/chat/llm-interactions/training-context/"
+            resp = requests.get(
+                admin_url, params=params, headers=self.admin_headers, timeout=5
+            )
             if resp.status_code == 200:
-                return [item for item in resp.json() if item.get("include_in_training")]
-        except Exception:
-            pass
+                results = resp.json()["results"]
+                self.training_context_cache.set(cache_key, results)
+                return results
+        except Exception as e:
+            logger.warning("Failed to fetch training context: %s", e)
         return []
 
+    def _prepare_payload(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+        context: Optional[List[Message]],
+        session_id: Optional[str],
+        user_id: Optional[int],
+        use_training_context: bool,
+        conversation_id: Optional[int],
+        stream: bool = False,
+    ):
+        """Build the Ollama /api/chat payload; returns it with the normalized history."""
+        if not self._check_memory_availability():
+            logger.warning(
+                "Low memory available. Model %s might not work properly.", model
+            )
+
+        context = self._normalize_context(context)
+
+        # Optionally add training context
+        training_context = None
+        if use_training_context:
+            training_context = self.get_training_context(
+                user_id=user_id,
+                session_id=session_id,
+                conversation_id=conversation_id,
+            )
+
+        # Trim the history to the model's context budget
+        pinned = self._build_messages(prompt, system_prompt, None, training_context)
+        context, dropped = self.context_window.fit(context, model, max_tokens, pinned)
+        if dropped and self.context_window.policy == "summarize":
+            summary = self._summarize(dropped, model)
+            if summary:
+                context = self._with_summary(context, summary)
+
+        messages = self._build_messages(
+            prompt, system_prompt, context, training_context
+        )
+        payload = self._build_payload(
+            messages, model, temperature, max_tokens, stream=stream
+        )
+        return payload, context
+
+    def _complete(
+        self,
+        messages: List[Dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[str] = None,
+    ) -> str:
+        """Run a non-streaming chat completion without logging the interaction."""
+        payload = self._build_payload(
+            messages, model, temperature, max_tokens, response_format=response_format
+        )
+        response = requests.post(f"{self.base_url}/api/chat", json=payload, timeout=30)
+        response.raise_for_status()
+        return self._parse_chat_response(response.text)[0]
+
+    def _summarize(self, dropped: List[Message], model: str) -> Optional[str]:
+        summary, steps = self._summary_steps(dropped, model)
+        for chunk, key in steps:
+            try:
+                summary = self._complete(
+                    self._summary_request(summary, chunk),
+                    model,
+                    0.2,
+                    self.context_window.summary_max_tokens,
+                )
+            except (requests.RequestException, json.JSONDecodeError) as e:
+                # Keep the summary of the part that is done, if any
+                logger.warning("Failed to summarize conversation history: %s", e)
+                break
+            self.summary_cache.set(key, summary)
+        return summary
+
     def generate_response(
         self,
         prompt: str,
@@ -66,142 +489,161 @@ class LLMService:
         Generate a response from the LLM using Ollama's API.
         """
         model = model or self.default_model
-        temperature = temperature or self.default_temperature
+        temperature = self.default_temperature if temperature is None else temperature
         max_tokens = max_tokens or self.default_max_tokens
+        started = time.perf_counter()
 
-        if not self._check_memory_availability():
-            logger.warning(
-                f"Low memory available. Model {model} might not work properly."
+        try:
+            payload, context = self._prepare_payload(
+                prompt,
+                model,
+                temperature,
+                max_tokens,
+                system_prompt,
+                context,
+                session_id,
+                user_id,
+                use_training_context,
+                conversation_id,
             )
 
-        try:
-            # First, prepare the prompt with context if any
-            full_prompt = ""
-            if system_prompt:
-                full_prompt += f"System: {system_prompt}\n\n"
-            if context:
-                for msg in context:
-                    full_prompt += f"{msg.role.capitalize()}: {msg.content}\n"
-            full_prompt += f"User: {prompt}"
-
-            logger.info(f"Sending request to Ollama with prompt: {full_prompt}")
-
-            # Optionally add training context
-            if use_training_context:
-                training_contexts = self.get_training_context(
-                    user_id=user_id,
+            cache_key, formatted_response, cache_status = self._cache_lookup(
+                payload, temperature
+            )
+            if formatted_response is None:
+                response = requests.post(
+                    f"{self.base_url}/api/chat", json=payload, timeout=30
+                )
+                response.raise_for_status()
+
+                full_response, last_response = self._parse_chat_response(response.text)
+                formatted_response = self._format_response(
+                    full_response, last_response, model
+                )
+                if cache_key and full_response:
+                    self.response_cache.set(cache_key, formatted_response)
+            formatted_response = self._with_cache_status(
+                formatted_response, cache_status
+            )
+            request_log.log_request(
+                "generate",
+                payload,
+                prompt,
+                formatted_response,
+                time.perf_counter() - started,
+                session_id,
+                conversation_id,
+            )
+
+            self._log_interaction(
+                self._interaction_record(
+                    prompt,
+                    formatted_response["message"]["content"],
+                    model,
+                    temperature,
+                    context=context,
+                    usage=formatted_response["usage"],
                     session_id=session_id,
+                    user_id=user_id,
                     conversation_id=conversation_id,
                 )
-                if training_contexts:
-                    if not context:
-                        context = []
-                    for item in training_contexts:
-                        context.append(Message(role="user", content=item["prompt"]))
-                        context.append(
-                            Message(role="assistant", content=item["response"])
-                        )
-
-            payload = {
-                "model": model,
-                "messages": [{"role": "user", "content": full_prompt}],
-                "stream": False,
-                "options": {"temperature": temperature, "num_predict": max_tokens},
-            }
-            logger.info(f"Request payload: {payload}")
-
-            response = requests.post(
-                f"{self.base_url}/api/chat", json=payload, timeout=30
             )
-            response.raise_for_status()
 
-            # Get the raw response text
-            raw_text = response.text
-            logger.debug(f"Raw response text: {raw_text}")
+            return formatted_response
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            raise self._ollama_error(e)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[Message]] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        use_training_context: bool = False,
+        conversation_id: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream a response from the LLM as Ollama produces it.
+
+        Yields the same events as AsyncLLMService.generate_stream.
+        """
+        model = model or self.default_model
+        temperature = self.default_temperature if temperature is None else temperature
+        max_tokens = max_tokens or self.default_max_tokens
+        started = time.perf_counter()
 
-            # Process each line as a separate JSON object
-            full_response = ""
-            last_response = None
+        try:
+            payload, context = self._prepare_payload(
+                prompt,
+                model,
+                temperature,
+                max_tokens,
+                system_prompt,
+                context,
+                session_id,
+                user_id,
+                use_training_context,
+                conversation_id,
+                stream=True,
+            )
 
-            try:
-                # Try to parse the entire response as a single JSON object first
-                result = json.loads(raw_text)
-                if result.get("message", {}).get("content"):
-                    full_response = result["message"]["content"]
-                    last_response = result
-            except json.JSONDecodeError:
-                # If that fails, try to parse line by line
-                for line in raw_text.split("\n"):
-                    if not line.strip():
-                        continue
-
-                    try:
-                        chunk = json.loads(line)
-                        if chunk.get("message", {}).get("content"):
-                            full_response += chunk["message"]["content"]
-                        if chunk.get("done"):
+            cache_key, cached, cache_status = self._cache_lookup(payload, temperature)
+            if cached is not None:
+                yield {"delta": cached["message"]["content"]}
+            else:
+                parts = []
+                last_response = None
+                with requests.post(
+                    f"{self.base_url}/api/chat", json=payload, stream=True, timeout=30
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines(decode_unicode=True):
+                        delta, chunk = self._parse_stream_line(line)
+                        if delta:
+                            parts.append(delta)
+                            yield {"delta": delta}
+                        if chunk and chunk.get("done"):
                             last_response = chunk
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Error decoding JSON: {e}, line: {line}")
-                        continue
-
-            # Format the response to match our expected structure
-            formatted_response = {
-                "message": {
-                    "content": full_response
-                    or "Sorry, I couldn't generate a response.",
-                    "role": "assistant",
-                },
-                "model": model,
-                "usage": {
-                    "prompt_tokens": (
-                        last_response.get("prompt_eval_count", 0)
-                        if last_response
-                        else 0
-                    ),
-                    "completion_tokens": (
-                        last_response.get("eval_count", 0) if last_response else 0
-                    ),
-                    "total_tokens": (
-                        (
-                            last_response.get("prompt_eval_count", 0)
-                            + last_response.get("eval_count", 0)
-                        )
-                        if last_response
-                        else 0
-                    ),
-                },
-            }
-            logger.info(f"Formatted response: {formatted_response}")
-
-            # Log interaction to Django admin
-            try:
-                admin_url = f"http://{settings.DJANGO_ADMIN_HOST}:{settings.DJANGO_ADMIN_PORT}/chat/llm-interactions/log/"
-                llm_data = {
-                    "prompt": prompt,
-                    "response": formatted_response["message"]["content"],
-                    "model_name": model,
-                    "temperature": temperature,
-                    "top_p": None,
-                    "frequency_penalty": None,
-                    "presence_penalty": None,
-                    "context": [msg.dict() for msg in context] if context else None,
-                    "retrieved_documents": None,
-                    "streamed": False,
-                    "session_id": session_id,
-                    "user": user_id,
-                }
-                requests.post(admin_url, json=llm_data, timeout=5)
-            except Exception as log_exc:
-                logger.error(f"Failed to log LLM interaction to Django: {log_exc}")
+        except (requests.RequestException, ValueError) as e:
+            raise self._ollama_error(e)
 
-            return formatted_response
-        except (requests.RequestException, json.JSONDecodeError) as e:
-            error_msg = f"Error communicating with Ollama: {str(e)}"
-            if "model requires more system memory" in str(e):
-                error_msg += "\nTry using a smaller model like 'mistral:7b-instruct-q4'"
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        if cached is not None:
+            formatted_response = cached
+        else:
+            formatted_response = self._format_response(
+                "".join(parts), last_response, model
+            )
+            if cache_key and parts:
+                self.response_cache.set(cache_key, formatted_response)
+        formatted_response = self._with_cache_status(formatted_response, cache_status)
+        request_log.log_request(
+            "stream",
+            payload,
+            prompt,
+            formatted_response,
+            time.perf_counter() - started,
+            session_id,
+            conversation_id,
+        )
+        self._log_interaction(
+            self._interaction_record(
+                prompt,
+                formatted_response["message"]["content"],
+                model,
+                temperature,
+                context=context,
+                usage=formatted_response["usage"],
+                session_id=session_id,
+                user_id=user_id,
+                streamed=True,
+                conversation_id=conversation_id,
+            )
+        )
+        yield {"done": True, **formatted_response}
 
     def list_models(self) -> List[str]:
         """
@@ -212,57 +654,716 @@ class LLMService:
             response.raise_for_status()
             return [model["name"] for model in response.json().get("models", [])]
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error listing models: {str(e)}")
+            logger.error("Error listing models: %s", e)
             raise Exception(f"Error listing models: {str(e)}")
 
-    def pull_model(self, model_name: str) -> Dict:
+    def pull_model_progress(self, model_name: str) -> Iterator[Dict]:
         """
-        Pull a model from Ollama's model library.
+        Pull a model from Ollama's model library, yielding its progress events.
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/api/pull", json={"name": model_name}
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error pulling model: {str(e)}")
+            with requests.post(
+                f"{self.base_url}/api/pull",
+                json={"name": model_name, "stream": True},
+                stream=True,
+                timeout=(settings.OLLAMA_CONNECT_TIMEOUT, settings.OLLAMA_READ_TIMEOUT),
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    event = parse_pull_line(line)
+                    if event is not None:
+                        yield event
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error("Error pulling model: %s", e)
             raise Exception(f"Error pulling model: {str(e)}")
 
+    def pull_model(self, model_name: str) -> Dict:
+        """
+        Pull a model from Ollama's model library and return the final status.
+        """
+        result = {}
+        for result in self.pull_model_progress(model_name):
+            pass
+        return result
+
     def evaluate_response(
         self, prompt: str, response: str, criteria: Optional[Dict] = None
     ) -> Dict:
         """
-        Evaluate an LLM response using another model instance.
+        Grade a response on every criterion in one JSON-mode judge call.
+
+        See app/services/evaluation.py for the concurrent engine used by the API.
         """
-        default_criteria = {
-            "relevance": "Is the response relevant to the prompt?",
-            "accuracy": "Is the information accurate?",
-            "completeness": "Is the response complete?",
-            "clarity": "Is the response clear and well-structured?",
-        }
+        criteria = criteria or evaluation.DEFAULT_CRITERIA
+        model = settings.EVALUATION_MODEL or self.default_model
+        try:
+            raw = self._complete(
+                evaluation.json_messages(prompt, response, criteria),
+                model,
+                settings.EVALUATION_TEMPERATURE,
+                settings.EVALUATION_MAX_TOKENS,
+                response_format="json",
+            )
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            logger.error("Error during evaluation: %s", e)
+            raise Exception(f"Error during evaluation: {str(e)}")
+        return evaluation.parse_evaluation(raw, criteria, model)
 
-        eval_criteria = criteria or default_criteria
-        eval_prompt = f"""
-        Please evaluate the following AI response to a prompt.
-        Rate each criterion from 1-10 and provide a brief explanation.
 
-        Prompt: {prompt}
-        Response: {response}
+class AsyncLLMService(BaseLLMService):
+    """
+    Non-blocking counterpart of LLMService for use inside the FastAPI event loop.
 
-        Criteria to evaluate:
-        {eval_criteria}
+    All calls go through one shared httpx.AsyncClient, so connections to Ollama
+    and the Django admin are pooled and kept alive between requests.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        interaction_logger: Optional[interaction_logging.InteractionLogger] = None,
+        response_cache: Optional[ResponseCache] = None,
+        scheduler: Optional[Scheduler] = None,
+        pool: Optional[OllamaPool] = None,
+    ):
+        super().__init__(
+            interaction_logger=interaction_logger, response_cache=response_cache
+        )
+        self._client = client
+        self.single_flight = SingleFlight()
+        self.pool = pool or OllamaPool()
+        self.scheduler = scheduler or Scheduler(pool=self.pool)
+        self.catalog = ModelCatalog()
+        self.residency = ResidencyManager(self)
+        self.pull_jobs = PullJobManager(self)
+        self.history = ConversationHistory(self)
+        self._health_task: Optional[asyncio.Task] = None
 
-        Format your response as JSON with 'scores' and 'explanations' keys.
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=settings.OLLAMA_CONNECT_TIMEOUT,
+                    read=settings.OLLAMA_READ_TIMEOUT,
+                    write=settings.OLLAMA_WRITE_TIMEOUT,
+                    pool=settings.OLLAMA_POOL_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    def start_health_checks(self):
+        """
+        Probe the Ollama nodes every OLLAMA_HEALTH_INTERVAL in the background,
+        refreshing the model catalog and re-warming evicted models.
         """
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            try:
+                await self.refresh_catalog()
+                await self.residency.ensure_resident()
+            except Exception as e:
+                logger.warning("Ollama health probe failed: %s", e)
+            await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL)
 
+    async def aclose(self):
+        """Stop health checks and close the shared HTTP client."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _cache_lookup(self, payload: Dict, temperature: float):
+        """Like the threaded lookup, but off the event loop for disk caches."""
+        key, status = self._cache_key(payload, temperature)
+        if key is None:
+            return None, None, status
+        cached = await self.response_cache.aget(key)
+        return key, cached, "miss" if cached is None else "hit"
+
+    async def get_training_context(
+        self, user_id=None, session_id=None, conversation_id=None
+    ):
+        """Retrieve past interactions marked for training."""
+        cache_key = (user_id or None, session_id or None, conversation_id or None)
+        cached = self.training_context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        params = self._training_context_params(user_id, session_id, conversation_id)
         try:
-            eval_result = self.generate_response(
-                prompt=eval_prompt,
-                system_prompt="You are an expert AI evaluator. Be objective and critical.",
-                temperature=0.3,  # Lower temperature for more consistent evaluation
+            admin_url = f"{self.admin_url}/chat/llm-interactions/training-context/"
+            resp = await self.client.get(
+                admin_url, params=params, headers=self.admin_headers, timeout=5
             )
-            return eval_result
+            if resp.status_code == 200:
+                results = resp.json()["results"]
+                self.training_context_cache.set(cache_key, results)
+                return results
         except Exception as e:
-            logger.error(f"Error during evaluation: {str(e)}")
+            logger.warning("Failed to fetch training context: %s", e)
+        return []
+
+    async def _prepare_payload(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+        context: Optional[List[Message]],
+        session_id: Optional[str],
+        user_id: Optional[int],
+        use_training_context: bool,
+        conversation_id: Optional[int],
+        stream: bool = False,
+    ):
+        """Build the Ollama /api/chat payload; returns it with the normalized history."""
+        started = time.perf_counter()
+        waited = 0.0  # time spent in the stages timed separately below
+        label = self.catalog.metric_label(model)
+
+        # Without a client-sent history, continue the conversation's stored one
+        if (
+            context is None
+            and conversation_id
+            and settings.CONVERSATION_HISTORY_ENABLED
+        ):
+            load_started = time.perf_counter()
+            context = await self.history.load(conversation_id)
+            loaded = time.perf_counter() - load_started
+            metrics.observe_stage("history", loaded, label)
+            waited += loaded
+        context = self._normalize_context(context)
+
+        # Optionally add training context
+        training_context = None
+        if use_training_context:
+            fetch_started = time.perf_counter()
+            training_context = await self.get_training_context(
+                user_id=user_id,
+                session_id=session_id,
+                conversation_id=conversation_id,
+            )
+            fetched = time.perf_counter() - fetch_started
+            metrics.observe_stage("training_context", fetched, label)
+            waited += fetched
+
+        # Trim the history to the model's context budget
+        pinned = self._build_messages(prompt, system_prompt, None, training_context)
+        context, dropped = self.context_window.fit(context, model, max_tokens, pinned)
+        if dropped and self.context_window.policy == "summarize":
+            summary_started = time.perf_counter()
+            summary = await self._summarize(dropped, model)
+            summarized = time.perf_counter() - summary_started
+            metrics.observe_stage("summarize", summarized, label)
+            waited += summarized
+            if summary:
+                context = self._with_summary(context, summary)
+
+        messages = self._build_messages(
+            prompt, system_prompt, context, training_context
+        )
+        payload = self._build_payload(
+            messages, model, temperature, max_tokens, stream=stream
+        )
+        metrics.observe_stage(
+            "prompt_assembly", time.perf_counter() - started - waited, label
+        )
+        return payload, context
+
+    async def _complete(
+        self,
+        messages: List[Dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[str] = None,
+        priority: int = PRIORITY_API,
+    ) -> str:
+        """
+        Run a non-streaming chat completion without logging the interaction.
+
+        Goes through the response cache and single-flight like generate_response,
+        so repeated summaries and judge calls are not recomputed.
+        """
+        payload = self._build_payload(
+            messages, model, temperature, max_tokens, response_format=response_format
+        )
+        cache_key, cached, _ = await self._cache_lookup(payload, temperature)
+        if cached is not None:
+            return cached["message"]["content"]
+        full_response, last_response = await self._coalesced(
+            "chat", payload, lambda: self._scheduled_chat(payload, priority)
+        )
+        if cache_key and full_response:
+            await self.response_cache.aset(
+                cache_key, self._format_response(full_response, last_response, model)
+            )
+        return full_response
+
+    async def _summarize(self, dropped: List[Message], model: str) -> Optional[str]:
+        summary, steps = self._summary_steps(dropped, model)
+        for chunk, key in steps:
+            try:
+                summary = await self._complete(
+                    self._summary_request(summary, chunk),
+                    model,
+                    0.2,
+                    self.context_window.summary_max_tokens,
+                )
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                # Keep the summary of the part that is done, if any
+                logger.warning("Failed to summarize conversation history: %s", e)
+                break
+            self.summary_cache.set(key, summary)
+        return summary
+
+    def _failover_nodes(self, model: str) -> List[OllamaNode]:
+        return self.pool.ranked(model)[: max(settings.OLLAMA_FAILOVER_ATTEMPTS, 1)]
+
+    async def _chat(self, payload: Dict):
+        """POST a non-streaming /api/chat request to the best node and parse it."""
+        model = payload["model"]
+        label = self.catalog.metric_label(model)
+        nodes = self._failover_nodes(model)
+        for attempt, node in enumerate(nodes, 1):
+            try:
+                with self.pool.track(node, model), metrics.stage(
+                    "ollama_request", label
+                ):
+                    started = time.perf_counter()
+                    response = await self.client.post(
+                        f"{node.url}/api/chat", json=payload
+                    )
+                    self.pool.observe_latency(node, time.perf_counter() - started)
+                    response.raise_for_status()
+                break
+            except httpx.ConnectError:
+                if attempt == len(nodes):
+                    raise
+                logger.warning("Ollama node %s unreachable, failing over", node.url)
+
+        full_response, last_response = self._parse_chat_response(response.text)
+        metrics.record_ollama_chunk(label, last_response)
+        return full_response, last_response
+
+    async def _stream_chat(self, payload: Dict) -> AsyncIterator:
+        """Yield (delta, chunk) pairs from a streaming /api/chat request."""
+        model = payload["model"]
+        label = self.catalog.metric_label(model)
+        nodes = self._failover_nodes(model)
+        for attempt, node in enumerate(nodes, 1):
+            try:
+                with self.pool.track(node, model), metrics.stage(
+                    "ollama_request", label
+                ):
+                    started = time.perf_counter()
+                    async with self.client.stream(
+                        "POST", f"{node.url}/api/chat", json=payload
+                    ) as response:
+                        self.pool.observe_latency(node, time.perf_counter() - started)
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            delta, chunk = self._parse_stream_line(line)
+                            if chunk and chunk.get("done"):
+                                metrics.record_ollama_chunk(label, chunk)
+                            yield delta, chunk
+                return
+            except httpx.ConnectError:
+                # Nothing was yielded yet, so another node can take over
+                if attempt == len(nodes):
+                    raise
+                logger.warning("Ollama node %s unreachable, failing over", node.url)
+
+    async def _scheduled_chat(self, payload: Dict, priority: int):
+        """_chat holding one of the model's scheduler slots."""
+        async with self.scheduler.slot(payload["model"], priority):
+            return await self._chat(payload)
+
+    async def _scheduled_stream_chat(
+        self, payload: Dict, priority: int
+    ) -> AsyncIterator:
+        """_stream_chat holding one of the model's scheduler slots until it ends."""
+        async with self.scheduler.slot(payload["model"], priority):
+            async for item in self._stream_chat(payload):
+                yield item
+
+    async def _coalesced(self, kind: str, payload: Dict, fn):
+        """Share one upstream call between concurrent identical requests."""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await fn()
+        return await self.single_flight.do((kind, request_key(payload)), fn)
+
+    def _record_turn(self, record: Dict) -> None:
+        """
+        Log a finished turn.
+
+        A turn that continues a conversation is added to the cached history
+        first, so the next turn served here sees it; the batching logger then
+        delivers it to the admin, which appends it to the stored history.
+        """
+        conversation_id = record["conversation"]
+        if conversation_id and settings.CONVERSATION_HISTORY_ENABLED:
+            self.history.append(conversation_id, record["prompt"], record["response"])
+        self._log_interaction(record)
+
+    async def generate_response(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[Message]] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        use_training_context: bool = False,
+        conversation_id: Optional[int] = None,
+        priority: int = PRIORITY_API,
+    ) -> Dict:
+        """
+        Generate a response from the LLM using Ollama's API without blocking the event loop.
+
+        ``priority`` orders the Ollama call in the scheduler queue; SchedulerBusy
+        is raised when the model is saturated.
+        """
+        model = model or self.default_model
+        temperature = self.default_temperature if temperature is None else temperature
+        max_tokens = max_tokens or self.default_max_tokens
+        started = time.perf_counter()
+
+        try:
+            payload, context = await self._prepare_payload(
+                prompt,
+                model,
+                temperature,
+                max_tokens,
+                system_prompt,
+                context,
+                session_id,
+                user_id,
+                use_training_context,
+                conversation_id,
+            )
+
+            cache_key, formatted_response, cache_status = await self._cache_lookup(
+                payload, temperature
+            )
+            if formatted_response is None:
+                full_response, last_response = await self._coalesced(
+                    "chat", payload, lambda: self._scheduled_chat(payload, priority)
+                )
+                formatted_response = self._format_response(
+                    full_response, last_response, model
+                )
+                if cache_key and full_response:
+                    await self.response_cache.aset(cache_key, formatted_response)
+            formatted_response = self._with_cache_status(
+                formatted_response, cache_status
+            )
+            metrics.GENERATIONS.inc(
+                model=self.catalog.metric_label(model),
+                mode="generate",
+                cache=cache_status,
+            )
+            request_log.log_request(
+                "generate",
+                payload,
+                prompt,
+                formatted_response,
+                time.perf_counter() - started,
+                session_id,
+                conversation_id,
+            )
+
+            self._record_turn(
+                self._interaction_record(
+                    prompt,
+                    formatted_response["message"]["content"],
+                    model,
+                    temperature,
+                    context=context,
+                    usage=formatted_response["usage"],
+                    session_id=session_id,
+                    user_id=user_id,
+                    conversation_id=conversation_id,
+                )
+            )
+
+            return formatted_response
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            raise self._ollama_error(e)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[Message]] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        use_training_context: bool = False,
+        conversation_id: Optional[int] = None,
+        priority: int = PRIORITY_API,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a response from the LLM as Ollama produces it.
+
+        Yields ``{"delta": str}`` for every content chunk and finally a
+        ``{"done": True, ...}`` event carrying the same message/model/usage
+        structure as generate_response. The interaction is logged with
+        ``streamed=True`` once the stream completes. SchedulerBusy is raised
+        before the first event when the model is saturated.
+        """
+        model = model or self.default_model
+        temperature = self.default_temperature if temperature is None else temperature
+        max_tokens = max_tokens or self.default_max_tokens
+        started = time.perf_counter()
+
+        try:
+            payload, context = await self._prepare_payload(
+                prompt,
+                model,
+                temperature,
+                max_tokens,
+                system_prompt,
+                context,
+                session_id,
+                user_id,
+                use_training_context,
+                conversation_id,
+                stream=True,
+            )
+
+            cache_key, cached, cache_status = await self._cache_lookup(
+                payload, temperature
+            )
+            if cached is not None:
+                yield {"delta": cached["message"]["content"]}
+            else:
+                parts = []
+                last_response = None
+                if settings.SINGLE_FLIGHT_ENABLED:
+                    chunks = self.single_flight.stream(
+                        ("stream", request_key(payload)),
+                        lambda: self._scheduled_stream_chat(payload, priority),
+                    )
+                else:
+                    chunks = self._scheduled_stream_chat(payload, priority)
+                async for delta, chunk in chunks:
+                    if delta:
+                        if not parts:
+                            metrics.observe_stage(
+                                "first_token",
+                                time.perf_counter() - started,
+                                self.catalog.metric_label(model),
+                            )
+                        parts.append(delta)
+                        yield {"delta": delta}
+                    if chunk and chunk.get("done"):
+                        last_response = chunk
+        except (httpx.HTTPError, ValueError) as e:
+            raise self._ollama_error(e)
+
+        if cached is not None:
+            formatted_response = cached
+        else:
+            formatted_response = self._format_response(
+                "".join(parts), last_response, model
+            )
+            if cache_key and parts:
+                await self.response_cache.aset(cache_key, formatted_response)
+        formatted_response = self._with_cache_status(formatted_response, cache_status)
+        request_log.log_request(
+            "stream",
+            payload,
+            prompt,
+            formatted_response,
+            time.perf_counter() - started,
+            session_id,
+            conversation_id,
+        )
+        metrics.GENERATIONS.inc(
+            model=self.catalog.metric_label(model), mode="stream", cache=cache_status
+        )
+        self._record_turn(
+            self._interaction_record(
+                prompt,
+                formatted_response["message"]["content"],
+                model,
+                temperature,
+                context=context,
+                usage=formatted_response["usage"],
+                session_id=session_id,
+                user_id=user_id,
+                streamed=True,
+                conversation_id=conversation_id,
+            )
+        )
+        yield {"done": True, **formatted_response}
+
+    async def generate_many(
+        self, items: List[Dict], concurrency_per_model: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Run many generate_response calls with bounded concurrency per model.
+
+        Each item holds generate_response keyword arguments. Results are
+        yielded in completion order as ``{"index", "response", "model",
+        "usage"}`` or ``{"index", "error"}``; one item failing never affects
+        the others. A final ``{"summary": ...}`` event aggregates token usage.
+        """
+        concurrency = concurrency_per_model or settings.BATCH_CONCURRENCY_PER_MODEL
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+        results: asyncio.Queue = asyncio.Queue()
+        started = time.monotonic()
+
+        async def run_one(index: int, item):
+            try:
+                if not isinstance(item, dict) or not isinstance(
+                    item.get("prompt"), str
+                ):
+                    raise ValueError(
+                        "Each item must be an object with a string 'prompt'"
+                    )
+                kwargs = {k: v for k, v in item.items() if k in BATCH_ITEM_FIELDS}
+                model = kwargs.get("model") or self.default_model
+                semaphore = semaphores.setdefault(model, asyncio.Semaphore(concurrency))
+                async with semaphore:
+                    result = await self.generate_response(
+                        **kwargs, priority=PRIORITY_BATCH
+                    )
+                await results.put(
+                    {
+                        "index": index,
+                        "response": result["message"]["content"],
+                        "model": result["model"],
+                        "usage": result.get("usage", {}),
+                    }
+                )
+            except Exception as e:
+                await results.put({"index": index, "error": str(e)})
+
+        tasks = [
+            asyncio.ensure_future(run_one(index, item))
+            for index, item in enumerate(items)
+        ]
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        failed = 0
+        try:
+            for _ in range(len(tasks)):
+                result = await results.get()
+                if "error" in result:
+                    failed += 1
+                else:
+                    for key in usage:
+                        usage[key] += result["usage"].get(key, 0)
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield {
+            "summary": {
+                "total": len(tasks),
+                "succeeded": len(tasks) - failed,
+                "failed": failed,
+                "usage": usage,
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+            }
+        }
+
+    async def refresh_catalog(self) -> ModelCatalog:
+        """Probe every node and rebuild the model catalog; concurrent calls share one."""
+
+        async def refresh():
+            answered = await self.pool.probe(self.client)
+            self.catalog.record(answered, self.pool.nodes)
+            return self.catalog
+
+        return await self.single_flight.do(("catalog",), refresh)
+
+    async def model_catalog(self) -> ModelCatalog:
+        """The model catalog, refreshed first only if the background loop is not."""
+        if self.catalog.due:
+            await self.refresh_catalog()
+        return self.catalog
+
+    async def list_models(self, refresh: bool = False) -> List[str]:
+        """
+        List the models available on any healthy Ollama node.
+
+        Served from the model catalog, which falls back to the last snapshot
+        while Ollama is unreachable.
+        """
+        catalog = await (self.refresh_catalog() if refresh else self.model_catalog())
+        if not catalog.populated:
+            logger.error("Error listing models: %s", catalog.error)
+            raise Exception(f"Error listing models: {catalog.error}")
+        return catalog.names()
+
+    async def pull_model(
+        self, model_name: str, timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Pull a model onto every healthy node and wait for the pull job to finish.
+
+        The job keeps running in the background if ``timeout`` expires.
+        """
+        job = self.pull_jobs.start(model_name)
+        try:
+            result = await job.wait(timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"Error pulling model: still running after {timeout}s")
+        if result["status"] == "failed":
+            raise Exception(f"Error pulling model: {result['error']}")
+        return result
+
+    async def create_conversation(
+        self,
+        title: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> Optional[int]:
+        """Create a conversation in the Django admin and return its id."""
+        response = await self.client.post(
+            f"{self.admin_url}/chat/conversations/create/",
+            json={"title": title, "session_id": session_id, "user_id": user_id},
+            timeout=5,
+        )
+        if response.status_code == 201:
+            conversation_id = response.json().get("id")
+            if conversation_id:
+                self.history.start(conversation_id)
+            return conversation_id
+        return None
+
+    async def evaluate_response(
+        self,
+        prompt: str,
+        response: str,
+        criteria: Optional[Dict] = None,
+        mode: Optional[str] = None,
+    ) -> Dict:
+        """
+        Grade a response with the evaluation engine (see app/services/evaluation.py).
+        """
+        try:
+            return await evaluation.EvaluationEngine(self).evaluate(
+                prompt, response, criteria=criteria, mode=mode
+            )
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            logger.error("Error during evaluation: %s", e)
             raise Exception(f"Error during evaluation: {str(e)}")
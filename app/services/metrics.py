@@ -0,0 +1,250 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: Tuple, value) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_sample(self, key: Tuple, value) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            labels = _format_labels(self.labelnames, key, le)
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "llm_stage_duration_seconds",
+        "Time spent per request stage.",
+        ("stage", "model"),
+    )
+)
+GENERATIONS = REGISTRY.register(
+    Counter(
+        "llm_generations_total",
+        "Generation requests by mode and response cache status.",
+        ("model", "mode", "cache"),
+    )
+)
+TOKENS = REGISTRY.register(
+    Counter("llm_tokens_total", "Tokens processed by Ollama.", ("model", "kind"))
+)
+TOKENS_PER_SECOND = REGISTRY.register(
+    Histogram(
+        "llm_generation_tokens_per_second",
+        "Generation speed reported by Ollama (eval_count / eval_duration).",
+        ("model",),
+        buckets=TOKENS_PER_SECOND_BUCKETS,
+    )
+)
+HTTP_SECONDS = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency until the response starts.",
+        ("method", "route", "status"),
+    )
+)
+WEBSOCKET_CONNECTIONS = REGISTRY.register(
+    Gauge("websocket_connections", "Open /ws connections.")
+)
+ADMIN_LOG_RECORDS = REGISTRY.register(
+    Counter(
+        "llm_admin_log_records_total",
+        "Interaction records shipped to the Django admin, by outcome.",
+        ("outcome",),
+    )
+)
+STATE = REGISTRY.register(
+    Gauge(
+        "llm_service_state",
+        "Point-in-time service state, refreshed on every scrape.",
+        ("name",),
+    )
+)
+
+# Ollama durations (nanoseconds) in the final chat chunk, by stage name
+OLLAMA_DURATIONS = {
+    "ollama_load": "load_duration",
+    "ollama_prompt_eval": "prompt_eval_duration",
+    "ollama_generation": "eval_duration",
+    "ollama_total": "total_duration",
+}
+
+
+def observe_stage(stage: str, seconds: float, model: Optional[str] = "") -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage, model=model)
+
+
+@contextmanager
+def stage(name: str, model: Optional[str] = ""):
+    """Time the block as one request stage."""
+    with STAGE_SECONDS.time(stage=name, model=model):
+        yield
+
+
+def record_ollama_chunk(model: str, chunk: Optional[Dict]) -> None:
+    """Export the timings and token counts of Ollama's final chat chunk."""
+    if not chunk:
+        return
+    for stage_name, field in OLLAMA_DURATIONS.items():
+        if chunk.get(field):
+            observe_stage(stage_name, chunk[field] / 1e9, model)
+    prompt_tokens = chunk.get("prompt_eval_count", 0)
+    completion_tokens = chunk.get("eval_count", 0)
+    if prompt_tokens:
+        TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        TOKENS.inc(completion_tokens, model=model, kind="completion")
+        if chunk.get("eval_duration"):
+            TOKENS_PER_SECOND.observe(
+                completion_tokens / (chunk["eval_duration"] / 1e9), model=model
+            )
@@ -0,0 +1,115 @@
+import time
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.ollama_pool import OllamaNode, normalize_model
+
+# /api/tags "details" fields kept in the catalog
+DETAIL_FIELDS = (
+    "format",
+    "family",
+    "families",
+    "parameter_size",
+    "quantization_level",
+)
+# Metric label shared by model names missing from the catalog
+OTHER_MODEL_LABEL = "other"
+
+
+class ModelCatalog:
+    """
+    In-memory snapshot of the models available across the Ollama nodes.
+
+    The snapshot is rebuilt from each round of node probes. When no node
+    answers, the previous snapshot is kept but flagged stale, so health and
+    model-list requests keep working through short Ollama outages.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = max_age or settings.MODEL_CATALOG_MAX_AGE
+        self.models: Dict[str, Dict] = {}
+        self._labels: Set[str] = set()
+        self.refreshed_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._refreshed_monotonic: Optional[float] = None
+        self._checked_monotonic: Optional[float] = None
+
+    @property
+    def due(self) -> bool:
+        """True when no refresh was attempted within ``max_age``."""
+        return (
+            self._checked_monotonic is None
+            or time.monotonic() - self._checked_monotonic > self.max_age
+        )
+
+    @property
+    def populated(self) -> bool:
+        return self.refreshed_at is not None
+
+    @property
+    def age(self) -> Optional[float]:
+        if self._refreshed_monotonic is None:
+            return None
+        return time.monotonic() - self._refreshed_monotonic
+
+    @property
+    def stale(self) -> bool:
+        return self.error is not None or self.age is None or self.age > self.max_age
+
+    def record(self, answered: List[OllamaNode], nodes: List[OllamaNode]) -> None:
+        """Rebuild the snapshot after a probe round in which ``answered`` replied."""
+        self._checked_monotonic = time.monotonic()
+        if not answered:
+            errors = [node.error for node in nodes if node.error]
+            self.error = errors[0] if errors else "No Ollama node answered"
+            return
+        models: Dict[str, Dict] = {}
+        for node in nodes:
+            if not node.healthy:
+                continue
+            for name, info in node.model_info.items():
+                entry = models.setdefault(
+                    name,
+                    {
+                        "name": name,
+                        "size": info.get("size"),
+                        "digest": info.get("digest"),
+                        "modified_at": info.get("modified_at"),
+                        "details": {
+                            field: info.get("details", {}).get(field)
+                            for field in DETAIL_FIELDS
+                        },
+                        "nodes": [],
+                        "loaded": False,
+                    },
+                )
+                entry["nodes"].append(node.url)
+                entry["loaded"] = entry["loaded"] or node.has_loaded(name)
+        self.models = models
+        self._labels = {normalize_model(name) for name in models}
+        self.refreshed_at = time.time()
+        self._refreshed_monotonic = time.monotonic()
+        self.error = None
+
+    def names(self) -> List[str]:
+        return list(self.models)
+
+    def metric_label(self, model: str) -> str:
+        """
+        ``model`` as a metric label: its tagged name, or ``other`` if unknown.
+
+        Model names come from clients, so labelling them as sent would let
+        arbitrary strings grow the metric series without bound.
+        """
+        name = normalize_model(model)
+        return name if name in self._labels else OTHER_MODEL_LABEL
+
+    def snapshot(self) -> Dict:
+        age = self.age
+        return {
+            "models": list(self.models.values()),
+            "refreshed_at": self.refreshed_at,
+            "age_seconds": None if age is None else round(age, 1),
+            "stale": self.stale,
+            "error": self.error,
+        }
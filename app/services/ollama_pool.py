@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from app.core.config import settings
+
+
+def configured_endpoints() -> List[str]:
+    """OLLAMA_ENDPOINTS if set, otherwise the single OLLAMA_HOST:OLLAMA_PORT node."""
+    endpoints = [
+        endpoint.strip().rstrip("/")
+        for endpoint in settings.OLLAMA_ENDPOINTS.split(",")
+        if endpoint.strip()
+    ]
+    return endpoints or [f"http://{settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}"]
+
+
+def normalize_model(name: str) -> str:
+    """``name`` with the ``:latest`` tag Ollama implies when none is given."""
+    if ":" in name.rsplit("/", 1)[-1]:
+        return name
+    return f"{name}:latest"
+
+
+class OllamaNode:
+    """Routing state of one Ollama server."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.failures = 0
+        self.error: Optional[str] = None  # last probe error
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # time to response, EWMA seconds
+        # Model names below are normalized with normalize_model
+        self.models: Optional[Set[str]] = None  # None until the first probe
+        self.model_info: Dict[str, Dict] = {}  # /api/tags entries by name
+        self.loaded: Set[str] = set()
+        self.loaded_sizes: Dict[str, int] = {}  # /api/ps bytes by name
+
+    def has_model(self, model: str) -> bool:
+        return self.models is None or normalize_model(model) in self.models
+
+    def has_loaded(self, model: str) -> bool:
+        return normalize_model(model) in self.loaded
+
+    def stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "latency_ms": (
+                None if self.latency is None else round(self.latency * 1000, 1)
+            ),
+            "models": None if self.models is None else sorted(self.models),
+            "loaded": sorted(self.loaded),
+        }
+
+
+class OllamaPool:
+    """
+    Route Ollama requests across several servers.
+
+    Healthy nodes are ranked for each request by whether they have the model,
+    whether it is already loaded in memory, their in-flight request count and
+    their recent response latency; nodes without one yet are tried first. A
+    node is ejected after ``max_failures`` consecutive failed requests or
+    probes and readmitted by the first successful probe.
+    """
+
+    def __init__(
+        self, endpoints: Optional[List[str]] = None, max_failures: Optional[int] = None
+    ):
+        self.nodes = [OllamaNode(url) for url in endpoints or configured_endpoints()]
+        self.max_failures = max_failures or settings.OLLAMA_MAX_FAILURES
+
+    def ranked(self, model: str) -> List[OllamaNode]:
+        """Nodes to try for ``model``, best first; unhealthy nodes only as a last resort."""
+        healthy = [node for node in self.nodes if node.healthy]
+        return sorted(
+            healthy or self.nodes,
+            key=lambda node: (
+                not node.has_model(model),
+                not node.has_loaded(model),
+                node.in_flight,
+                node.latency or 0.0,
+            ),
+        )
+
+    def healthy_nodes(self) -> List[OllamaNode]:
+        return [node for node in self.nodes if node.healthy] or self.nodes
+
+    @contextmanager
+    def track(self, node: OllamaNode, model: Optional[str] = None):
+        """
+        Count a request against ``node``; transport errors count as failures.
+
+        ``model`` is marked loaded on the node only when the block completes,
+        so callers check the response status inside it.
+        """
+        node.in_flight += 1
+        try:
+            yield
+        except httpx.TransportError:
+            self.mark_failed(node)
+            raise
+        else:
+            node.failures = 0
+            if model:
+                node.loaded.add(normalize_model(model))
+        finally:
+            node.in_flight -= 1
+
+    def observe_latency(self, node: OllamaNode, seconds: float) -> None:
+        """Fold the time ``node`` took to start answering a request into its EWMA."""
+        node.latency = (
+            seconds if node.latency is None else 0.7 * node.latency + 0.3 * seconds
+        )
+
+    def mark_failed(self, node: OllamaNode) -> None:
+        node.failures += 1
+        if node.failures >= self.max_failures:
+            node.healthy = False
+
+    async def probe(self, client: httpx.AsyncClient) -> List[OllamaNode]:
+        """
+        Refresh every node's health, available models and loaded models.
+
+        Returns the nodes that answered.
+        """
+        answered = await asyncio.gather(
+            *(self._probe_node(client, node) for node in self.nodes)
+        )
+        return [node for node, ok in zip(self.nodes, answered) if ok]
+
+    async def _probe_node(self, client: httpx.AsyncClient, node: OllamaNode) -> bool:
+        timeout = settings.OLLAMA_PROBE_TIMEOUT
+        try:
+            tags = await client.get(f"{node.url}/api/tags", timeout=timeout)
+            tags.raise_for_status()
+            running = await client.get(f"{node.url}/api/ps", timeout=timeout)
+        except httpx.HTTPError as e:
+            node.error = str(e) or type(e).__name__
+            self.mark_failed(node)
+            return False
+        node.model_info = {
+            model["name"]: model for model in tags.json().get("models", [])
+        }
+        node.models = {normalize_model(name) for name in node.model_info}
+        if running.status_code == 200:
+            node.loaded_sizes = {
+                normalize_model(model["name"]): model.get("size", 0)
+                for model in running.json().get("models", [])
+            }
+            node.loaded = set(node.loaded_sizes)
+        node.failures = 0
+        node.error = None
+        node.healthy = True
+        return True
+
+    def stats(self) -> List[Dict]:
+        return [node.stats() for node in self.nodes]
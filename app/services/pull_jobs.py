@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.ollama_pool import OllamaNode, normalize_model
+
+if TYPE_CHECKING:
+    from app.services.llm_service import AsyncLLMService
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("success", "failed")
+
+
+def parse_pull_line(line: str) -> Optional[Dict]:
+    """
+    Parse one line of Ollama's streamed /api/pull response.
+
+    Lines look like ``{"status": "pulling <digest>", "digest": ..., "total":
+    ..., "completed": ...}``; an ``{"error": ...}`` line raises ValueError.
+    """
+    if not line.strip():
+        return None
+    event = json.loads(line)
+    if "error" in event:
+        raise ValueError(event["error"])
+    return event
+
+
+class PullJob:
+    """Progress of one model pull, observable by any number of subscribers."""
+
+    def __init__(self, model: str):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.nodes: Dict[str, Dict] = {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.version = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    async def update(self, **changes) -> None:
+        for name, value in changes.items():
+            setattr(self, name, value)
+        if self.done and self.finished_at is None:
+            self.finished_at = time.time()
+        async with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    async def node_progress(self, url: str, event: Dict) -> None:
+        progress = self.nodes.setdefault(url, {})
+        progress["detail"] = event.get("status", progress.get("detail"))
+        if "total" in event:
+            progress["total"] = event["total"]
+            progress["completed"] = event.get("completed", 0)
+        await self.update(status="pulling")
+
+    def snapshot(self) -> Dict:
+        completed = sum(node.get("completed", 0) for node in self.nodes.values())
+        total = sum(node.get("total", 0) for node in self.nodes.values())
+        return {
+            "id": self.id,
+            "model": self.model,
+            "status": self.status,
+            "completed": completed,
+            "total": total,
+            "progress": round(completed / total, 4) if total else None,
+            "nodes": self.nodes,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict:
+        async def finished():
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.done)
+
+        await asyncio.wait_for(finished(), timeout)
+        return self.snapshot()
+
+    def _changed_since(self, version: int) -> bool:
+        return self.version != version
+
+    async def watch(self) -> AsyncIterator[Dict]:
+        """Yield a snapshot now and after every change until the job finishes."""
+        seen = -1
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(partial(self._changed_since, seen))
+                seen = self.version
+            yield self.snapshot()
+            if self.done:
+                return
+
+
+class PullJobManager:
+    """
+    Run model pulls as background jobs.
+
+    A pull streams Ollama's progress from every healthy node into a PullJob.
+    Starting a pull for a model that is already being pulled returns the
+    running job instead of starting another download.
+    """
+
+    def __init__(self, llm_service: "AsyncLLMService", history: Optional[int] = None):
+        self.llm_service = llm_service
+        self.history = history or settings.PULL_JOB_HISTORY
+        self.jobs: "OrderedDict[str, PullJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, model: str) -> PullJob:
+        for job in self.jobs.values():
+            if job.model == model and not job.done:
+                return job
+        job = PullJob(model)
+        self.jobs[job.id] = job
+        self._prune()
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    def get(self, job_id: str) -> Optional[PullJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        return [job.snapshot() for job in self.jobs.values()]
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[: max(len(self.jobs) - self.history, 0)]:
+            del self.jobs[job_id]
+
+    async def _run(self, job: PullJob) -> None:
+        nodes = self.llm_service.pool.healthy_nodes()
+        await job.update(status="pulling")
+        try:
+            await asyncio.gather(*(self._pull(job, node) for node in nodes))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("Error pulling model %s: %s", job.model, e)
+            await job.update(status="failed", error=str(e))
+            return
+        for node in nodes:
+            if node.models is not None:
+                node.models.add(normalize_model(job.model))
+        await job.update(status="success")
+        try:
+            await self.llm_service.refresh_catalog()
+        except Exception as e:
+            logger.warning("Failed to refresh the model catalog: %s", e)
+
+    async def _pull(self, job: PullJob, node: OllamaNode) -> None:
+        async with self.llm_service.client.stream(
+            "POST",
+            f"{node.url}/api/pull",
+            json={"name": job.model, "stream": True},
+            timeout=httpx.Timeout(
+                settings.OLLAMA_READ_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT
+            ),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                event = parse_pull_line(line)
+                if event is not None:
+                    await job.node_progress(node.url, event)
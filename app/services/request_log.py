@@ -0,0 +1,65 @@
+import logging
+import random
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.requests")
+
+
+def truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+
+def payload_sampled(rate: Optional[float] = None) -> bool:
+    rate = settings.REQUEST_LOG_PAYLOAD_SAMPLE_RATE if rate is None else rate
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def log_request(
+    mode: str,
+    payload: Dict,
+    prompt: str,
+    response: Dict,
+    duration: float,
+    session_id: Optional[str] = None,
+    conversation_id: Optional[int] = None,
+) -> None:
+    """
+    Log one completed generation as a structured record.
+
+    The record carries fixed-size metadata (sizes, token counts, timing and
+    cache status). Prompt and response text is attached only for the
+    sampled fraction of requests and truncated to
+    REQUEST_LOG_PAYLOAD_MAX_CHARS.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    content = response["message"]["content"]
+    usage = response["usage"]
+    fields = {
+        "mode": mode,
+        "model": payload["model"],
+        "messages": len(payload["messages"]),
+        "prompt_chars": len(prompt),
+        "response_chars": len(content),
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "cache": usage.get("cache"),
+        "duration_ms": round(duration * 1000, 1),
+        "session_id": session_id,
+        "conversation_id": conversation_id,
+    }
+    if payload_sampled():
+        max_chars = settings.REQUEST_LOG_PAYLOAD_MAX_CHARS
+        fields["prompt"] = truncate(prompt, max_chars)
+        fields["response"] = truncate(content, max_chars)
+    logger.info(
+        "%s %s completed in %.0fms",
+        mode,
+        fields["model"],
+        fields["duration_ms"],
+        extra=fields,
+    )
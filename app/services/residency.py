@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+import httpx
+
+from app.core.config import settings
+from app.services.context_window import context_length, lookup_model_family
+from app.services.ollama_pool import OllamaNode
+from app.services.scheduler import PRIORITY_BATCH
+
+if TYPE_CHECKING:
+    from app.services.llm_service import AsyncLLMService
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def _parse_overrides(value: str) -> Dict[str, str]:
+    overrides = {}
+    for item in value.split(","):
+        model, _, keep_alive = item.partition("=")
+        if model.strip() and keep_alive.strip():
+            overrides[model.strip()] = keep_alive.strip()
+    return overrides
+
+
+def keep_alive_for(model: str) -> str:
+    """
+    How long Ollama should keep ``model`` loaded after a request.
+
+    MODEL_KEEP_ALIVE_OVERRIDES ("llama3=1h,mixtral:8x7b=5m") is matched on the
+    exact model name first, then on its family; MODEL_KEEP_ALIVE otherwise.
+    """
+    overrides = _parse_overrides(settings.MODEL_KEEP_ALIVE_OVERRIDES)
+    if model in overrides:
+        return overrides[model]
+    return lookup_model_family(overrides, model) or settings.MODEL_KEEP_ALIVE
+
+
+def warm_models() -> List[str]:
+    """Models kept resident: MODEL_WARM_MODELS, or the default model."""
+    models = [m.strip() for m in settings.MODEL_WARM_MODELS.split(",") if m.strip()]
+    return models or [settings.DEFAULT_MODEL]
+
+
+class ResidencyManager:
+    """
+    Keep models loaded in Ollama so requests skip the cold start.
+
+    A model is warmed by sending Ollama an empty chat with a keep_alive hint,
+    which loads it without generating anything, on every healthy node that
+    has the model. Loads go through the scheduler at batch priority, so they
+    queue behind user requests and count against the memory budget. Which
+    models are actually resident comes from the pool's /api/ps probes;
+    ensure_resident() re-warms configured models that a node has evicted.
+    """
+
+    def __init__(self, llm_service: "AsyncLLMService"):
+        self.llm_service = llm_service
+        self.models: Dict[str, Dict] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def is_loaded(self, model: str) -> bool:
+        return any(node.has_loaded(model) for node in self.llm_service.pool.nodes)
+
+    def unloaded_nodes(self, model: str) -> List[OllamaNode]:
+        """Healthy nodes that have ``model`` but do not hold it in memory."""
+        return [
+            node
+            for node in self.llm_service.pool.healthy_nodes()
+            if node.has_model(model) and not node.has_loaded(model)
+        ]
+
+    async def warm(self, model: str) -> Dict:
+        """Load ``model`` on every node that has it; concurrent calls share a load."""
+        return await self.llm_service.single_flight.do(
+            ("warm", model), lambda: self._load(model)
+        )
+
+    async def _load(self, model: str) -> Dict:
+        # With no node holding the model, try the best one so the error shows
+        nodes = self.unloaded_nodes(model)
+        if not nodes and not self.is_loaded(model):
+            nodes = self.llm_service.pool.ranked(model)[:1]
+        state = self.models[model] = {
+            "status": "warming",
+            "nodes": {node.url: "warming" for node in nodes},
+        }
+        results = await asyncio.gather(
+            *(self._load_on(model, node, state) for node in nodes)
+        )
+        if nodes and not any(results):
+            state["status"] = "failed"
+            return state
+        state.update(status="loaded", loaded_at=time.time())
+        return state
+
+    async def _load_on(self, model: str, node: OllamaNode, state: Dict) -> bool:
+        """Load ``model`` on ``node``, queued behind requests as batch work."""
+        pool = self.llm_service.pool
+        payload = {
+            "model": model,
+            "messages": [],
+            # Requests send the same num_ctx; a different one would reload it
+            "options": {"num_ctx": context_length(model)},
+            "keep_alive": keep_alive_for(model),
+        }
+        async with self.llm_service.scheduler.slot(model, PRIORITY_BATCH):
+            started = time.monotonic()
+            try:
+                with pool.track(node, model):
+                    response = await self.llm_service.client.post(
+                        f"{node.url}/api/chat",
+                        json=payload,
+                        timeout=httpx.Timeout(
+                            settings.MODEL_WARM_TIMEOUT,
+                            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+                        ),
+                    )
+                    response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning("Failed to warm model %s on %s: %s", model, node.url, e)
+                state["nodes"][node.url] = "failed"
+                state["error"] = str(e)
+                return False
+        load_seconds = round(time.monotonic() - started, 3)
+        state["nodes"][node.url] = "loaded"
+        state["load_seconds"] = max(state.get("load_seconds", 0), load_seconds)
+        logger.info("Warmed model %s on %s in %ss", model, node.url, load_seconds)
+        return True
+
+    def warm_in_background(self, model: str) -> Dict:
+        """Start warming ``model`` where it is not resident; returns its state."""
+        if self.unloaded_nodes(model) or not self.is_loaded(model):
+            task = asyncio.ensure_future(self.warm(model))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self.models.setdefault(model, {"status": "warming"})
+        return self.state(model)
+
+    async def warm_configured(self, models: Optional[List[str]] = None) -> List[Dict]:
+        return await asyncio.gather(
+            *(self.warm(model) for model in models or warm_models())
+        )
+
+    async def ensure_resident(self) -> None:
+        """Re-warm configured models on healthy nodes that have evicted them."""
+        missing = [model for model in warm_models() if self.unloaded_nodes(model)]
+        if missing:
+            await self.warm_configured(missing)
+
+    def state(self, model: str) -> Dict:
+        return {
+            **self.models.get(model, {"status": "unloaded"}),
+            "resident": self.is_loaded(model),
+            "keep_alive": keep_alive_for(model),
+        }
+
+    def stats(self) -> Dict:
+        models = set(self.models) | set(warm_models())
+        for node in self.llm_service.pool.nodes:
+            models |= node.loaded
+        return {model: self.state(model) for model in sorted(models)}
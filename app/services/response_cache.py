@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+
+
+def request_key(payload: Dict) -> str:
+    """Canonical hash of everything that determines a generation's output."""
+    canonical = json.dumps(
+        {
+            "model": payload["model"],
+            "messages": payload["messages"],
+            "options": payload.get("options", {}),
+            "format": payload.get("format"),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Exact-match cache of formatted generation results keyed by request_key.
+
+    ``get``/``set`` serve the threaded service; the async service awaits
+    ``aget``/``aset``, which backends doing blocking I/O run off the event
+    loop.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict) -> None: ...
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Dict) -> None:
+        self.set(key, value)
+
+
+class InMemoryResponseCache(ResponseCache):
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int = 64 * 1024**2):
+        self._cache = TTLCache(
+            ttl=ttl,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=lambda value: len(value["message"]["content"]),
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Dict) -> None:
+        self._cache.set(key, value)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    On-disk cache that survives restarts; least recently used rows are pruned.
+
+    Reads do not write: hits are remembered in memory and their ``used_at``
+    is stored with the next write, or once ``touch_batch`` hits pile up.
+    Expired and least recently used rows are pruned every ``prune_every``
+    writes, so the table can exceed ``max_entries`` by that many rows.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        max_entries: int,
+        prune_every: int = 100,
+        touch_batch: int = 100,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.touch_batch = touch_batch
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            # Expired rows are left for the next prune
+            if row is None or row[1] + self.ttl <= now:
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touches()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._touched.pop(key, None)
+            self._flush_touches()
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(now)
+            self._conn.commit()
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Dict) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _prune(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,)
+        )
+        # Walks the used_at index to the oldest row worth keeping
+        self._conn.execute(
+            "DELETE FROM responses WHERE used_at < ("
+            "SELECT used_at FROM responses ORDER BY used_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,),
+        )
+
+
+def build_response_cache(backend: Optional[str] = None) -> Optional[ResponseCache]:
+    """Create the backend named by RESPONSE_CACHE_BACKEND; None disables caching."""
+    backend = settings.RESPONSE_CACHE_BACKEND if backend is None else backend
+    if not backend:
+        return None
+    if backend == "memory":
+        return InMemoryResponseCache(
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        )
+    if backend == "sqlite":
+        return SQLiteResponseCache(
+            settings.RESPONSE_CACHE_PATH,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        )
+    raise ValueError(f"Unknown response cache backend {backend!r}")
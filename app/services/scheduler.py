@@ -0,0 +1,290 @@
+import asyncio
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import psutil
+
+from app.core.config import settings
+from app.services import metrics
+from app.services.context_window import lookup_model_family
+from app.services.ollama_pool import OllamaPool, normalize_model
+
+# Approximate resident size (GB) of the default quantization of each model
+# family once Ollama has loaded it. Unknown models fall back to
+# MODEL_MEMORY_REQUIREMENT.
+MODEL_MEMORY_FOOTPRINTS = {
+    "mistral": 4.1,
+    "mixtral": 26.0,
+    "llama2": 3.8,
+    "llama3": 4.7,
+    "llama3.1": 4.9,
+    "llama3.2": 2.0,
+    "codellama": 3.8,
+    "gemma": 5.0,
+    "gemma2": 5.4,
+    "phi3": 2.3,
+    "qwen2": 4.4,
+    "qwen2.5": 4.7,
+    "tinyllama": 0.6,
+}
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_API = 1
+PRIORITY_BATCH = 2
+
+
+def memory_footprint(model: str) -> float:
+    footprint = lookup_model_family(MODEL_MEMORY_FOOTPRINTS, model)
+    return footprint or settings.MODEL_MEMORY_REQUIREMENT
+
+
+def is_local(url: str) -> bool:
+    return urlparse(url).hostname in ("localhost", "127.0.0.1", "::1")
+
+
+class SchedulerBusy(Exception):
+    """Raised instead of queueing when the scheduler is saturated."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, model: str, priority: int, seq: int):
+        self.model = model
+        self.priority = priority
+        self.seq = seq
+        self.queued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+    def effective_priority(self, now: float, aging_seconds: float) -> int:
+        """Priority raised one level per ``aging_seconds`` spent waiting."""
+        if not aging_seconds:
+            return self.priority
+        aged = int((now - self.queued_at) // aging_seconds)
+        return max(PRIORITY_INTERACTIVE, self.priority - aged)
+
+
+class Scheduler:
+    """
+    Admission control for Ollama calls.
+
+    Each model has a concurrency limit per Ollama node, multiplied by the
+    healthy nodes that have it. A model that is not in memory yet is only
+    admitted while it fits in the memory budget next to the resident models:
+    those running a request and those Ollama keeps loaded (keep_alive), as
+    reported by the pool's /api/ps probes. With nothing running it is always
+    admitted, since Ollama can unload idle models to make room.
+
+    The budget is ``memory_budget_gb`` (SCHEDULER_MEMORY_BUDGET_GB) per
+    healthy node. Without one it is 80% of this machine's memory when Ollama
+    runs here too, and memory is not checked for remote nodes.
+
+    Requests that cannot start immediately wait in a queue ordered by
+    priority, then arrival; a waiter moves up one priority level every
+    ``aging_seconds`` so batch work is not starved by a steady interactive
+    load. Whenever a slot frees up the queue is scanned in that order and
+    every waiter that fits is started, so a blocked model never holds up the
+    others.
+
+    Interactive and API requests are rejected with SchedulerBusy (and a
+    Retry-After estimate) when the queue is full or they waited longer than
+    ``max_wait``. Batch requests are already bounded by their caller and
+    simply wait their turn.
+    """
+
+    def __init__(
+        self,
+        max_concurrency_per_model: Optional[int] = None,
+        model_limits: Optional[Dict[str, int]] = None,
+        memory_budget_gb: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        aging_seconds: Optional[float] = None,
+        pool: Optional[OllamaPool] = None,
+    ):
+        self.pool = pool
+        self.max_concurrency_per_model = (
+            max_concurrency_per_model or settings.SCHEDULER_MAX_CONCURRENCY_PER_MODEL
+        )
+        self.model_limits = model_limits or {}
+        self.node_memory_gb = (
+            memory_budget_gb
+            or settings.SCHEDULER_MEMORY_BUDGET_GB
+            or self._local_memory_gb()
+        )
+        self.max_queue = (
+            settings.SCHEDULER_MAX_QUEUE if max_queue is None else max_queue
+        )
+        self.max_wait = settings.SCHEDULER_MAX_WAIT if max_wait is None else max_wait
+        self.aging_seconds = (
+            settings.SCHEDULER_AGING_SECONDS if aging_seconds is None else aging_seconds
+        )
+        self._active: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._durations: Dict[str, float] = {}
+        self.rejected = 0
+
+    def _local_memory_gb(self) -> Optional[float]:
+        # psutil describes this machine, which says nothing about remote nodes
+        if self.pool is None or all(is_local(node.url) for node in self.pool.nodes):
+            return psutil.virtual_memory().total / 1024**3 * 0.8
+        return None
+
+    def _healthy_nodes(self, model: Optional[str] = None) -> int:
+        if self.pool is None:
+            return 1
+        nodes = [
+            node
+            for node in self.pool.nodes
+            if node.healthy and (model is None or node.has_model(model))
+        ]
+        return max(1, len(nodes))
+
+    @property
+    def memory_budget_gb(self) -> Optional[float]:
+        if self.node_memory_gb is None:
+            return None
+        return self.node_memory_gb * self._healthy_nodes()
+
+    def limit(self, model: str) -> int:
+        if model in self.model_limits:
+            return self.model_limits[model]
+        return self.max_concurrency_per_model * self._healthy_nodes(model)
+
+    def _loaded(self) -> Dict[str, float]:
+        """GB held by models Ollama reports loaded, by normalized name."""
+        loaded: Dict[str, float] = {}
+        if self.pool is not None:
+            for node in self.pool.nodes:
+                if node.healthy:
+                    for model in node.loaded:
+                        size = node.loaded_sizes.get(model)
+                        gb = size / 1024**3 if size else memory_footprint(model)
+                        loaded[model] = loaded.get(model, 0.0) + gb
+        return loaded
+
+    def _resident_gb(self) -> float:
+        loaded = self._loaded()
+        return sum(loaded.values()) + sum(
+            memory_footprint(model)
+            for model in self._active
+            if normalize_model(model) not in loaded
+        )
+
+    def _admissible(self, model: str) -> bool:
+        running = self._active.get(model, 0)
+        if running >= self.limit(model):
+            return False
+        if running or not self._active:
+            # A model alone is always admitted, otherwise it could never run
+            return True
+        budget = self.memory_budget_gb
+        if budget is None or normalize_model(model) in self._loaded():
+            return True
+        return self._resident_gb() + memory_footprint(model) <= budget
+
+    def _start(self, model: str) -> None:
+        self._active[model] = self._active.get(model, 0) + 1
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._waiters.sort(
+            key=lambda waiter: (
+                waiter.effective_priority(now, self.aging_seconds),
+                waiter.seq,
+            )
+        )
+        for waiter in list(self._waiters):
+            if not waiter.future.done() and self._admissible(waiter.model):
+                self._waiters.remove(waiter)
+                self._start(waiter.model)
+                waiter.future.set_result(None)
+
+    def retry_after(self, model: str) -> int:
+        """Seconds until a new request for ``model`` would likely get a slot."""
+        duration = self._durations.get(model, settings.SCHEDULER_DEFAULT_DURATION)
+        queued = sum(1 for waiter in self._waiters if waiter.model == model)
+        return max(1, math.ceil(duration * (queued + 1) / self.limit(model)))
+
+    def _busy(self, model: str, reason: str) -> SchedulerBusy:
+        self.rejected += 1
+        return SchedulerBusy(
+            f"Model {model} is busy ({reason}), retry later", self.retry_after(model)
+        )
+
+    async def acquire(self, model: str, priority: int = PRIORITY_API) -> None:
+        if not self._waiters and self._admissible(model):
+            self._start(model)
+            return
+
+        bounded = priority < PRIORITY_BATCH
+        if bounded:
+            queued = sum(
+                1 for waiter in self._waiters if waiter.priority < PRIORITY_BATCH
+            )
+            if queued >= self.max_queue:
+                raise self._busy(model, "queue is full")
+
+        waiter = _Waiter(model, priority, next(self._seq))
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future), self.max_wait if bounded else None
+            )
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._waiters.remove(waiter)
+                raise self._busy(model, f"waited {self.max_wait:g}s")
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                self.release(model)
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, model: str, duration: Optional[float] = None) -> None:
+        self._active[model] -= 1
+        if not self._active[model]:
+            del self._active[model]
+        if duration is not None:
+            previous = self._durations.get(model, duration)
+            self._durations[model] = 0.8 * previous + 0.2 * duration
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = PRIORITY_API):
+        """Hold one of ``model``'s slots for the duration of the block."""
+        queued = time.monotonic()
+        await self.acquire(model, priority)
+        started = time.monotonic()
+        metrics.observe_stage("queue", started - queued, model)
+        try:
+            yield
+        finally:
+            self.release(model, time.monotonic() - started)
+
+    def stats(self) -> Dict:
+        return {
+            "active": dict(self._active),
+            "queued": len(self._waiters),
+            "resident_gb": round(self._resident_gb(), 2),
+            "memory_budget_gb": (
+                None
+                if self.memory_budget_gb is None
+                else round(self.memory_budget_gb, 2)
+            ),
+            "limits": {model: self.limit(model) for model in self._active},
+            "rejected": self.rejected,
+            "avg_duration_seconds": {
+                model: round(duration, 3) for model, duration in self._durations.items()
+            },
+        }
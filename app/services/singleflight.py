@@ -0,0 +1,112 @@
+import asyncio
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+
+class _Broadcast:
+    """Events produced by one upstream stream, replayed to every subscriber."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.condition = asyncio.Condition()
+        # The task pumping the upstream; the event loop only keeps a weak
+        # reference, so without this it could be collected mid-stream
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async calls into one upstream call.
+
+    The upstream work runs in its own task, so a caller that disconnects or is
+    cancelled does not cancel it for the others. Keys are forgotten as soon
+    as the call completes; later identical calls start a new one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Await ``fn()``, sharing the result with concurrent callers of ``key``."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def stream(
+        self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate ``fn()``, sharing its events with concurrent callers of ``key``.
+
+        Callers that join late first receive the events already produced.
+        When the last subscriber leaves before the end, the upstream is
+        cancelled and closed.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, fn(), broadcast))
+
+        broadcast.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with broadcast.condition:
+                    await broadcast.condition.wait_for(
+                        partial(self._ready, broadcast, index)
+                    )
+                    events = broadcast.events[index:]
+                    index = len(broadcast.events)
+                    finished = broadcast.done
+                for event in events:
+                    yield event
+                if finished:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if not broadcast.subscribers and not broadcast.done:
+                self._forget(key, broadcast)
+                broadcast.task.cancel()
+
+    @staticmethod
+    def _ready(broadcast: _Broadcast, index: int) -> bool:
+        return index < len(broadcast.events) or broadcast.done
+
+    def _forget(self, key, broadcast: _Broadcast) -> None:
+        # A new stream may already have taken the key
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+
+    async def _pump(self, key, upstream: AsyncIterator[Any], broadcast: _Broadcast):
+        try:
+            async for event in upstream:
+                async with broadcast.condition:
+                    broadcast.events.append(event)
+                    broadcast.condition.notify_all()
+        except BaseException as e:
+            # Cancellation included, so no subscriber is left waiting
+            broadcast.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._forget(key, broadcast)
+            # Releases what the upstream holds (scheduler slot, connection)
+            aclose = getattr(upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            async with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.harness import (
+    DEFAULT_BASELINE,
+    SCENARIOS,
+    Benchmark,
+    compare,
+    environment,
+    load_baseline,
+    local_stack,
+    save_baseline,
+)
+
+app = typer.Typer()
+console = Console()
+
+
+def _print_results(results):
+    table = Table(title="Benchmark results")
+    for column in (
+        "scenario",
+        "ok",
+        "429",
+        "errors",
+        "req/s",
+        "items/s",
+        "p50",
+        "p95",
+        "p99",
+        "ttft p50",
+        "ttft p95",
+    ):
+        table.add_column(column, justify="right")
+    for scenario, result in results.items():
+        latency = result["latency_seconds"] or {}
+        ttft = result["ttft_seconds"] or {}
+        table.add_row(
+            scenario,
+            str(result["ok"]),
+            str(result["rejected"]),
+            str(result["errors"]),
+            str(result["requests_per_second"]),
+            str(result["items_per_second"]),
+            *(str(latency.get(p, "-")) for p in ("p50", "p95", "p99")),
+            *(str(ttft.get(p, "-")) for p in ("p50", "p95")),
+        )
+    console.print(table)
+
+
+@app.command()
+def run(
+    scenario: List[str] = typer.Option(
+        list(SCENARIOS), help="Scenario to run (repeatable): " + ", ".join(SCENARIOS)
+    ),
+    concurrency: int = typer.Option(8, help="Concurrent clients per scenario"),
+    requests: int = typer.Option(100, help="Requests per scenario"),
+    max_tokens: int = typer.Option(32, help="max_tokens sent with every prompt"),
+    batch_size: int = typer.Option(10, help="Prompts per /generate/batch request"),
+    target: Optional[str] = typer.Option(
+        None, help="Benchmark a running API instead of an in-process one"
+    ),
+    model: Optional[str] = typer.Option(None, help="Model to request"),
+    token_rate: float = typer.Option(50.0, help="Fake Ollama tokens per second"),
+    latency: float = typer.Option(0.05, help="Fake Ollama seconds to first token"),
+    baseline: str = typer.Option(DEFAULT_BASELINE, help="Baseline results file"),
+    save: bool = typer.Option(
+        False, "--save", help="Save these results as the baseline"
+    ),
+    tolerance: float = typer.Option(0.1, help="Allowed regression (fraction)"),
+    output: Optional[str] = typer.Option(None, help="Write the results as JSON"),
+):
+    """Load-test the API and compare the results with the saved baseline."""
+    for name in scenario:
+        if name not in SCENARIOS:
+            raise typer.BadParameter(f"Unknown scenario {name!r}")
+
+    async def run_scenarios(base_url):
+        bench = Benchmark(
+            base_url,
+            concurrency=concurrency,
+            requests=requests,
+            max_tokens=max_tokens,
+            batch_size=batch_size,
+            model=model,
+        )
+        return {name: await bench.run(name) for name in scenario}
+
+    if target:
+        results = asyncio.run(run_scenarios(target))
+    else:
+        with local_stack(token_rate, latency, max_tokens, model) as stack:
+            results = asyncio.run(run_scenarios(stack["api"]))
+
+    run_record = {
+        "created_at": time.time(),
+        "config": {
+            "concurrency": concurrency,
+            "requests": requests,
+            "max_tokens": max_tokens,
+            "batch_size": batch_size,
+            "target": target or "local",
+            "token_rate": None if target else token_rate,
+            "latency": None if target else latency,
+        },
+        "environment": environment(),
+        "results": results,
+    }
+    _print_results(results)
+    if output:
+        with open(output, "w") as f:
+            json.dump(run_record, f, indent=2)
+
+    previous = load_baseline(baseline)
+    if save:
+        save_baseline(run_record, baseline)
+        console.print(f"Saved baseline to {baseline}")
+    elif previous is None:
+        console.print("No baseline to compare with; rerun with --save to record one")
+    else:
+        if previous["config"] != run_record["config"]:
+            console.print(
+                "[yellow]Warning:[/yellow] baseline was recorded with a different "
+                "configuration"
+            )
+        regressions = compare(results, previous["results"], tolerance)
+        for regression in regressions:
+            console.print(f"[bold red]Regression:[/bold red] {regression}")
+        if regressions:
+            raise typer.Exit(code=1)
+        console.print("[bold green]No regressions against the baseline[/bold green]")
+
+
+if __name__ == "__main__":
+    app()
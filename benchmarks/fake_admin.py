@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeAdmin:
+    """
+    Local stand-in for the Django admin API used by the FastAPI service.
+
+    Accepts interaction batches, conversation creation, training-context and
+    history lookups and score write-back, keeping everything in memory so
+    tests and benchmarks can inspect what the service sent. ``latency``
+    delays every response.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.interactions: List[Dict] = []
+        self.conversations: Dict[int, Dict] = {}
+        self.scores: Dict[int, Dict] = {}
+        self._ids = itertools.count(1)
+        self.app = self._build_app()
+
+    async def _delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake admin")
+
+        @app.post("/chat/llm-interactions/bulk/")
+        async def bulk_create(request: Request):
+            await self._delay()
+            records = await request.json()
+            keys = {row.get("idempotency_key") for row in self.interactions}
+            created = 0
+            for record in records:
+                key = record.get("idempotency_key")
+                if key is not None and key in keys:
+                    continue
+                keys.add(key)
+                self.interactions.append({"id": next(self._ids), **record})
+                created += 1
+            return JSONResponse(
+                {
+                    "created": created,
+                    "duplicates": len(records) - created,
+                    "errors": [],
+                },
+                status_code=201,
+            )
+
+        @app.post("/chat/llm-interactions/log/")
+        async def log_interaction(request: Request):
+            await self._delay()
+            record = await request.json()
+            key = record.get("idempotency_key")
+            for row in self.interactions:
+                if key is not None and row.get("idempotency_key") == key:
+                    return JSONResponse(row)
+            row = {"id": next(self._ids), **record}
+            self.interactions.append(row)
+            return JSONResponse(row, status_code=201)
+
+        @app.get("/chat/llm-interactions/training-context/")
+        async def training_context(
+            conversation_id: Optional[int] = None, limit: int = 20
+        ):
+            await self._delay()
+            rows = [
+                {"prompt": row["prompt"], "response": row["response"]}
+                for row in self.interactions
+                if conversation_id is None or row.get("conversation") == conversation_id
+            ]
+            return {"results": rows[-limit:]}
+
+        @app.post("/chat/llm-interactions/scores/")
+        async def update_scores(request: Request):
+            await self._delay()
+            updates = await request.json()
+            known = {row["id"] for row in self.interactions}
+            for update in updates:
+                self.scores[update["id"]] = update
+            missing = [u["id"] for u in updates if u["id"] not in known]
+            return {"updated": len(updates) - len(missing), "missing": missing}
+
+        @app.post("/chat/conversations/create/")
+        async def create_conversation(request: Request):
+            await self._delay()
+            conversation_id = next(self._ids)
+            self.conversations[conversation_id] = await request.json()
+            return JSONResponse({"id": conversation_id}, status_code=201)
+
+        @app.get("/chat/conversations/{conversation_id}/messages/")
+        async def conversation_messages(conversation_id: int, limit: int = 200):
+            await self._delay()
+            messages = []
+            for row in self.interactions:
+                if row.get("conversation") == conversation_id:
+                    messages.append({"role": "user", "content": row["prompt"]})
+                    messages.append({"role": "assistant", "content": row["response"]})
+            results = [
+                {"position": position, **message}
+                for position, message in enumerate(messages)
+            ][-limit:]
+            next_cursor = results[0]["position"] if len(messages) > limit else None
+            return {"results": results, "next_cursor": next_cursor}
+
+        @app.get("/chat/conversations/{conversation_id}/interactions/")
+        async def conversation_interactions(
+            conversation_id: int, cursor: int = 0, limit: int = 100
+        ):
+            rows = [
+                {"id": row["id"], "prompt": row["prompt"], "response": row["response"]}
+                for row in self.interactions
+                if row.get("conversation") == conversation_id and row["id"] > cursor
+            ]
+            page = rows[:limit]
+            next_cursor = page[-1]["id"] if len(rows) > limit else None
+            return {"results": page, "next_cursor": next_cursor}
+
+        return app
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import re
+import time
+from typing import Dict, List, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Criteria listed in evaluation.json_messages ("- <name>: <question>")
+_CRITERION = re.compile(r"^- (\w+):", re.MULTILINE)
+
+
+class FakeOllama:
+    """
+    Local stand-in for the Ollama API, for tests and benchmarks.
+
+    Serves /api/chat (streaming and not), /api/tags, /api/ps and /api/pull.
+    Replies are deterministic: ``tokens`` words (capped by the request's
+    ``num_predict``) produced at ``token_rate`` tokens per second after
+    ``latency`` seconds of simulated prompt evaluation. The first request for
+    a model additionally waits ``load_time`` seconds, like a cold load.
+    A token rate of 0 produces every token immediately.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[str] = ("mistral:7b-instruct-q4",),
+        token_rate: float = 50.0,
+        latency: float = 0.05,
+        load_time: float = 0.0,
+        tokens: int = 32,
+    ):
+        self.models = list(models)
+        self.token_rate = token_rate
+        self.latency = latency
+        self.load_time = load_time
+        self.tokens = tokens
+        self.loaded: set = set()
+        self.requests: Dict[str, int] = {}
+        self.app = self._build_app()
+
+    def _count(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def _model_entry(self, name: str) -> Dict:
+        return {
+            "name": name,
+            "model": name,
+            "size": 4_109_865_159,
+            "digest": f"fake-{name}",
+            "modified_at": "2024-01-01T00:00:00Z",
+            "details": {
+                "format": "gguf",
+                "family": name.split(":")[0],
+                "families": [name.split(":")[0]],
+                "parameter_size": "7B",
+                "quantization_level": "Q4_0",
+            },
+        }
+
+    def reply_content(self, payload: Dict) -> List[str]:
+        """The reply to a chat payload, as a list of token strings."""
+        if payload.get("format") == "json":
+            messages = payload.get("messages") or [{}]
+            criteria = _CRITERION.findall(messages[-1].get("content", ""))
+            reply = {
+                "scores": {name: 7 for name in criteria},
+                "explanations": {name: "Fake judgement." for name in criteria},
+                "score": 7,
+                "explanation": "Fake judgement.",
+            }
+            return [json.dumps(reply)]
+        limit = (payload.get("options") or {}).get("num_predict") or self.tokens
+        return [f"token{index} " for index in range(min(self.tokens, limit))]
+
+    async def _load(self, model: str) -> float:
+        if model in self.loaded:
+            return 0.0
+        self.loaded.add(model)
+        await asyncio.sleep(self.load_time)
+        return self.load_time
+
+    async def _produce(self, payload: Dict):
+        """Yield (delta, final chunk or None) pairs at the configured pace."""
+        model = payload.get("model", "")
+        started = time.perf_counter()
+        load = await self._load(model)
+        messages = payload.get("messages") or []
+        if not messages:
+            # Ollama loads the model and returns at once for an empty chat
+            yield "", self._final_chunk(model, 0, 0, load, 0.0, 0.0, started)
+            return
+        await asyncio.sleep(self.latency)
+        eval_started = time.perf_counter()
+        tokens = self.reply_content(payload)
+        for token in tokens:
+            if self.token_rate:
+                await asyncio.sleep(1 / self.token_rate)
+            yield token, None
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        yield "", self._final_chunk(
+            model,
+            prompt_tokens,
+            len(tokens),
+            load,
+            self.latency,
+            time.perf_counter() - eval_started,
+            started,
+        )
+
+    @staticmethod
+    def _final_chunk(
+        model, prompt_tokens, eval_count, load, prompt_eval, eval_duration, started
+    ) -> Dict:
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_duration * 1e9),
+        }
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Ollama")
+
+        @app.get("/")
+        async def root():
+            return "Ollama is running"
+
+        @app.get("/api/tags")
+        async def tags():
+            self._count("tags")
+            return {"models": [self._model_entry(name) for name in self.models]}
+
+        @app.get("/api/ps")
+        async def ps():
+            self._count("ps")
+            return {"models": [self._model_entry(name) for name in self.loaded]}
+
+        @app.post("/api/chat")
+        async def chat(request: Request):
+            self._count("chat")
+            payload = await request.json()
+            model = payload.get("model", "")
+            if self.models and model not in self.models:
+                return JSONResponse(
+                    {"error": f"model '{model}' not found, try pulling it first"},
+                    status_code=404,
+                )
+
+            if payload.get("stream", True):
+
+                async def lines():
+                    async for delta, final in self._produce(payload):
+                        chunk = final or {
+                            "model": model,
+                            "message": {"role": "assistant", "content": delta},
+                            "done": False,
+                        }
+                        yield json.dumps(chunk) + "\n"
+
+                return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+            parts, final = [], None
+            async for delta, chunk in self._produce(payload):
+                parts.append(delta)
+                final = chunk or final
+            final["message"]["content"] = "".join(parts)
+            return final
+
+        @app.post("/api/pull")
+        async def pull(request: Request):
+            self._count("pull")
+            payload = await request.json()
+            name = payload.get("name") or payload.get("model")
+            total = 1000
+
+            async def lines():
+                yield json.dumps({"status": "pulling manifest"}) + "\n"
+                for completed in range(0, total + 1, 250):
+                    event = {
+                        "status": f"pulling fake-{name}",
+                        "digest": f"sha256:fake-{name}",
+                        "total": total,
+                        "completed": completed,
+                    }
+                    yield json.dumps(event) + "\n"
+                    await asyncio.sleep(0)
+                if name not in self.models:
+                    self.models.append(name)
+                yield json.dumps({"status": "success"}) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        return app
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import httpx
+import websockets
+
+from benchmarks.fake_admin import FakeAdmin
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.servers import BackgroundServer
+
+SCENARIOS = ("generate", "stream", "ws", "batch")
+PERCENTILES = (50, 95, 99)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Percentile ``q`` (0-100) of ``values`` with linear interpolation."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Sequence[float]) -> Optional[Dict]:
+    if not values:
+        return None
+    summary = {f"p{q}": round(percentile(values, q), 4) for q in PERCENTILES}
+    summary["mean"] = round(sum(values) / len(values), 4)
+    return summary
+
+
+class Sample:
+    """Timing of one benchmark request."""
+
+    __slots__ = ("latency", "ttft", "outcome", "items")
+
+    def __init__(self, latency, ttft=None, outcome="ok", items=1):
+        self.latency = latency
+        self.ttft = ttft
+        self.outcome = outcome
+        self.items = items
+
+
+def report(samples: List[Sample], elapsed: float) -> Dict:
+    ok = [sample for sample in samples if sample.outcome == "ok"]
+    items = sum(sample.items for sample in ok)
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "rejected": sum(sample.outcome == "rejected" for sample in samples),
+        "errors": sum(sample.outcome == "error" for sample in samples),
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(len(ok) / elapsed, 2) if elapsed else None,
+        "items_per_second": round(items / elapsed, 2) if elapsed else None,
+        "latency_seconds": summarize([sample.latency for sample in ok]),
+        "ttft_seconds": summarize(
+            [sample.ttft for sample in ok if sample.ttft is not None]
+        ),
+    }
+
+
+class Benchmark:
+    """
+    Drive the API at a fixed concurrency and collect per-request timings.
+
+    Every request uses a distinct prompt so the response cache and
+    single-flight coalescing do not flatter the results.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        concurrency: int = 8,
+        requests: int = 100,
+        max_tokens: int = 32,
+        batch_size: int = 10,
+        model: Optional[str] = None,
+        timeout: float = 300.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.requests = requests
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.model = model
+        self.timeout = timeout
+        self._counter = 0
+
+    def _request_body(self) -> Dict:
+        self._counter += 1
+        body = {
+            "prompt": f"Benchmark prompt {self._counter}: say something.",
+            "max_tokens": self.max_tokens,
+        }
+        if self.model:
+            body["model"] = self.model
+        return body
+
+    async def run(self, scenario: str) -> Dict:
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {scenario!r}; expected {SCENARIOS}")
+        samples: List[Sample] = []
+        remaining = iter(range(self.requests))
+        limits = httpx.Limits(max_connections=self.concurrency * 2)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    self._worker(scenario, client, remaining, samples)
+                    for _ in range(self.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - started
+        return report(samples, elapsed)
+
+    async def _worker(self, scenario, client, remaining, samples) -> None:
+        websocket = None
+        if scenario == "ws":
+            url = self.base_url.replace("http", "ws", 1) + "/ws"
+            websocket = await websockets.connect(url, open_timeout=self.timeout)
+        try:
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    if scenario == "ws":
+                        sample = await self._ws(websocket, started)
+                    else:
+                        sample = await getattr(self, f"_{scenario}")(client, started)
+                except (httpx.HTTPError, websockets.WebSocketException):
+                    sample = Sample(time.perf_counter() - started, outcome="error")
+                samples.append(sample)
+        finally:
+            if websocket is not None:
+                await websocket.close()
+
+    @staticmethod
+    def _outcome(status: int) -> str:
+        if status == 429:
+            return "rejected"
+        return "ok" if status < 400 else "error"
+
+    async def _generate(self, client, started) -> Sample:
+        response = await client.post(
+            f"{self.base_url}/api/generate", json=self._request_body()
+        )
+        return Sample(
+            time.perf_counter() - started, outcome=self._outcome(response.status_code)
+        )
+
+    async def _stream(self, client, started) -> Sample:
+        ttft, outcome = None, "error"
+        async with client.stream(
+            "POST", f"{self.base_url}/api/generate/stream", json=self._request_body()
+        ) as response:
+            if response.status_code != 200:
+                return Sample(
+                    time.perf_counter() - started,
+                    outcome=self._outcome(response.status_code),
+                )
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: ") :]
+                elif line.startswith("data: "):
+                    if event is None and ttft is None:
+                        ttft = time.perf_counter() - started
+                    elif event == "done":
+                        outcome = "ok"
+                    event = None
+        return Sample(time.perf_counter() - started, ttft, outcome)
+
+    async def _ws(self, websocket, started) -> Sample:
+        await websocket.send(json.dumps({**self._request_body(), "stream": True}))
+        ttft = None
+        while True:
+            message = json.loads(await websocket.recv())
+            if "error" in message:
+                outcome = "rejected" if "retry_after" in message else "error"
+                return Sample(time.perf_counter() - started, outcome=outcome)
+            if message.get("done"):
+                return Sample(time.perf_counter() - started, ttft)
+            if ttft is None:
+                ttft = time.perf_counter() - started
+
+    async def _batch(self, client, started) -> Sample:
+        items = [self._request_body() for _ in range(self.batch_size)]
+        failed = 0
+        async with client.stream(
+            "POST", f"{self.base_url}/api/generate/batch", json=items
+        ) as response:
+            if response.status_code != 200:
+                return Sample(
+                    time.perf_counter() - started,
+                    outcome=self._outcome(response.status_code),
+                )
+            async for line in response.aiter_lines():
+                if line.strip() and "error" in json.loads(line):
+                    failed += 1
+        return Sample(
+            time.perf_counter() - started,
+            outcome="error" if failed else "ok",
+            items=len(items),
+        )
+
+
+@contextmanager
+def local_stack(
+    token_rate: float = 50.0,
+    latency: float = 0.05,
+    tokens: int = 32,
+    model: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Run the API in this process against a FakeOllama and a FakeAdmin.
+
+    Yields the URLs of the three servers and the fakes themselves.
+    """
+    from app.api.routes import llm_service
+    from app.core.config import settings
+    from app.services.interaction_logger import interaction_logger
+    from app.services.ollama_pool import OllamaPool
+
+    fake_ollama = FakeOllama(
+        models=[model or settings.DEFAULT_MODEL],
+        token_rate=token_rate,
+        latency=latency,
+        tokens=tokens,
+    )
+    fake_admin = FakeAdmin()
+    with BackgroundServer(fake_ollama.app) as ollama, BackgroundServer(
+        fake_admin.app
+    ) as admin:
+        # Point the already-constructed service singletons at the fakes
+        previous = (
+            llm_service.pool,
+            llm_service.admin_url,
+            interaction_logger.admin_url,
+        )
+        llm_service.pool = OllamaPool([ollama.url])
+        llm_service.admin_url = admin.url
+        interaction_logger.admin_url = admin.url
+        from app.main import app
+
+        try:
+            with BackgroundServer(app) as api:
+                yield {
+                    "api": api.url,
+                    "ollama": ollama.url,
+                    "admin": admin.url,
+                    "fake_ollama": fake_ollama,
+                    "fake_admin": fake_admin,
+                }
+        finally:
+            llm_service.pool, llm_service.admin_url, interaction_logger.admin_url = (
+                previous
+            )
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.1) -> List[str]:
+    """
+    List regressions of ``results`` against ``baseline``.
+
+    A scenario regresses when its p95 latency or time to first token grows,
+    or its throughput drops, by more than ``tolerance`` (a fraction).
+    """
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+        for metric in ("latency_seconds", "ttft_seconds"):
+            now, before = current.get(metric), previous.get(metric)
+            if now and before and now["p95"] > before["p95"] * (1 + tolerance):
+                regressions.append(
+                    f"{scenario}: {metric} p95 {now['p95']}s vs baseline {before['p95']}s"
+                )
+        now, before = current.get("items_per_second"), previous.get("items_per_second")
+        if now is not None and before and now < before * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: {now} items/s vs baseline {before} items/s"
+            )
+        if current.get("errors", 0) > previous.get("errors", 0):
+            regressions.append(
+                f"{scenario}: {current['errors']} errors vs baseline {previous['errors']}"
+            )
+    return regressions
+
+
+def load_baseline(path: str = DEFAULT_BASELINE) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(run: Dict, path: str = DEFAULT_BASELINE) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -10,7 +10,10 @@ export const Chat = () => {
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [conversationId, setConversationId] = useState<string | null>(null);
+  const [model, setModel] = useState('mistral');
+  const [models, setModels] = useState<string[]>([]);
   const ws = useRef<WebSocket | null>(null);
+  const streaming = useRef(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   // Generate or load session_id
@@ -35,17 +38,38 @@ export const Chat = () => {
       const data = JSON.parse(event.data);
       if (data.error) {
         alert(data.error);
+        // A failed turn must not leave the next turn's first delta
+        // treated as a continuation
+        streaming.current = false;
         setIsLoading(false);
         return;
       }
       if (data.conversation_id) {
         setConversationId(data.conversation_id);
       }
+      if (data.delta !== undefined) {
+        // Append streamed tokens to the assistant message being generated
+        const isFirstDelta = !streaming.current;
+        streaming.current = true;
+        setMessages((prev) =>
+          isFirstDelta
+            ? [...prev, { role: 'assistant', content: data.delta }]
+            : [
+                ...prev.slice(0, -1),
+                { role: 'assistant', content: prev[prev.length - 1].content + data.delta },
+              ]
+        );
+        return;
+      }
       const assistantMessage: Message = {
         role: 'assistant',
         content: data.response,
       };
-      setMessages((prev) => [...prev, assistantMessage]);
+      const wasStreaming = streaming.current;
+      streaming.current = false;
+      setMessages((prev) =>
+        wasStreaming ? [...prev.slice(0, -1), assistantMessage] : [...prev, assistantMessage]
+      );
       setIsLoading(false);
     };
 
@@ -60,6 +84,19 @@ export const Chat = () => {
     // eslint-disable-next-line
   }, []);
 
+  useEffect(() => {
+    fetch('/api/models')
+      .then((res) => (res.ok ? res.json() : []))
+      .then(setModels)
+      .catch(() => setModels([]));
+  }, []);
+
+  const selectModel = (name: string) => {
+    setModel(name);
+    // Ask the backend to load the model now so the first reply skips the cold start
+    fetch(`/api/models/${encodeURIComponent(name)}/warm`, { method: 'POST' }).catch(() => {});
+  };
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
@@ -78,7 +115,7 @@ export const Chat = () => {
     ws.current.send(
       JSON.stringify({
         prompt: input,
-        model: 'mistral',
+        model,
         session_id: sessionId,
         conversation_id: conversationId,
       })
@@ -115,6 +152,20 @@ export const Chat = () => {
         <div ref={messagesEndRef} />
       </div>
       <form onSubmit={handleSubmit} style={{ display: 'flex', gap: 8 }}>
+        {models.length > 0 && (
+          <select
+            value={model}
+            onChange={(e) => selectModel(e.target.value)}
+            disabled={isLoading}
+            style={{ padding: 8, borderRadius: 4, border: '1px solid #ccc' }}
+          >
+            {(models.includes(model) ? models : [model, ...models]).map((name) => (
+              <option key={name} value={name}>
+                {name}
+              </option>
+            ))}
+          </select>
+        )}
         <input
           value={input}
           onChange={(e) => setInput(e.target.value)}
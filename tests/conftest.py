@@ -0,0 +1,41 @@
+import httpx
+import pytest
+
+from app.services.llm_service import AsyncLLMService
+
+
+class NullLogger:
+    def log(self, record):
+        pass
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def log(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def null_logger():
+    return NullLogger()
+
+
+@pytest.fixture
+def recording_logger():
+    return RecordingLogger()
+
+
+@pytest.fixture
+def make_service(null_logger):
+    """Factory for an ``AsyncLLMService`` whose Ollama traffic goes to ``handler``."""
+
+    def build(handler, interaction_logger=None, **kwargs):
+        return AsyncLLMService(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            interaction_logger=interaction_logger or null_logger,
+            **kwargs,
+        )
+
+    return build
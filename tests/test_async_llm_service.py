@@ -0,0 +1,257 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.context_window import ContextWindowManager
+
+
+def ollama_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/tags":
+        return httpx.Response(200, json={"models": [{"name": "mistral"}]})
+    if request.url.path == "/api/chat":
+        return httpx.Response(
+            200,
+            json={
+                "message": {"role": "assistant", "content": "4"},
+                "done": True,
+                "prompt_eval_count": 10,
+                "eval_count": 2,
+            },
+        )
+    return httpx.Response(201, json={})
+
+
+def test_generate_response_async(make_service):
+    service = make_service(ollama_handler)
+
+    result = asyncio.run(service.generate_response(prompt="What is 2+2?"))
+
+    assert result["message"]["content"] == "4"
+    assert result["usage"] == {
+        "prompt_tokens": 10,
+        "completion_tokens": 2,
+        "total_tokens": 12,
+        "cache": "disabled",
+    }
+
+
+def test_list_models_async(make_service):
+    service = make_service(ollama_handler)
+
+    assert asyncio.run(service.list_models()) == ["mistral"]
+
+
+def test_concurrent_requests_share_client(make_service):
+    seen = []
+
+    def handler(request):
+        if request.url.path == "/api/chat":
+            seen.append(json.loads(request.content)["messages"][-1]["content"])
+        return ollama_handler(request)
+
+    service = make_service(handler)
+    client = service.client
+
+    async def run():
+        return await asyncio.gather(
+            *(service.generate_response(prompt=f"q{i}") for i in range(20))
+        )
+
+    results = asyncio.run(run())
+
+    assert len(results) == 20
+    assert len(seen) == 20
+    assert service.client is client
+
+
+def test_ollama_error_is_reported(make_service):
+    service = make_service(lambda request: httpx.Response(500))
+
+    with pytest.raises(Exception, match="Error communicating with Ollama"):
+        asyncio.run(service.generate_response(prompt="hi"))
+
+
+def test_generate_stream_yields_deltas_and_logs_streamed(
+    make_service, recording_logger
+):
+    chunks = [
+        {"message": {"role": "assistant", "content": "Hel"}, "done": False},
+        {"message": {"role": "assistant", "content": "lo"}, "done": False},
+        {
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "prompt_eval_count": 5,
+            "eval_count": 2,
+        },
+    ]
+
+    def handler(request):
+        if request.url.path == "/api/chat":
+            assert json.loads(request.content)["stream"] is True
+            body = "\n".join(json.dumps(chunk) for chunk in chunks) + "\n"
+            return httpx.Response(200, content=body.encode())
+        return httpx.Response(404)
+
+    service = make_service(handler, recording_logger)
+
+    async def collect():
+        return [event async for event in service.generate_stream(prompt="hi")]
+
+    events = asyncio.run(collect())
+
+    assert [e["delta"] for e in events[:-1]] == ["Hel", "lo"]
+    assert events[-1]["done"] is True
+    assert events[-1]["message"]["content"] == "Hello"
+    assert events[-1]["usage"]["total_tokens"] == 7
+    assert len(recording_logger.records) == 1
+    assert recording_logger.records[0]["streamed"] is True
+    assert recording_logger.records[0]["response"] == "Hello"
+    assert recording_logger.records[0]["prompt_tokens"] == 5
+    assert recording_logger.records[0]["completion_tokens"] == 2
+
+
+def test_get_training_context_uses_dedicated_endpoint(monkeypatch, make_service):
+    monkeypatch.setattr(settings, "INTERNAL_SERVICE_TOKEN", "service-secret")
+
+    def handler(request):
+        assert request.url.path == "/chat/llm-interactions/training-context/"
+        assert request.url.params["conversation"] == "7"
+        assert request.headers["X-Service-Token"] == "service-secret"
+        return httpx.Response(
+            200,
+            json={
+                "results": [{"id": 1, "prompt": "p", "response": "r"}],
+                "next_cursor": None,
+            },
+        )
+
+    service = make_service(handler)
+
+    context = asyncio.run(service.get_training_context(conversation_id=7))
+
+    assert context == [{"id": 1, "prompt": "p", "response": "r"}]
+
+
+def test_structured_messages_keep_a_stable_prefix(make_service):
+    payloads = []
+
+    def handler(request):
+        if request.url.path == "/api/chat":
+            payloads.append(json.loads(request.content))
+            return ollama_handler(request)
+        return httpx.Response(
+            200,
+            json={"results": [{"id": 1, "prompt": "tp", "response": "tr"}]},
+        )
+
+    service = make_service(handler)
+    history = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hey"},
+    ]
+
+    async def run():
+        await service.generate_response(
+            prompt="first",
+            system_prompt="sys",
+            context=history[:0],
+            use_training_context=True,
+            user_id=1,
+        )
+        await service.generate_response(
+            prompt="second",
+            system_prompt="sys",
+            context=history,
+            use_training_context=True,
+            user_id=1,
+        )
+
+    asyncio.run(run())
+
+    first, second = (p["messages"] for p in payloads)
+    assert first == [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "tp"},
+        {"role": "assistant", "content": "tr"},
+        {"role": "user", "content": "first"},
+    ]
+    assert second[:3] == first[:3]
+    assert second[3:] == history + [{"role": "user", "content": "second"}]
+
+
+def test_summarize_policy_replaces_dropped_history(make_service):
+    payloads = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        payloads.append(body)
+        content = (
+            "SUMMARY"
+            if body["messages"][0]["content"].startswith("Summarize")
+            else "ok"
+        )
+        return httpx.Response(200, json={"message": {"content": content}, "done": True})
+
+    service = make_service(handler)
+    service.context_window = ContextWindowManager(policy="summarize", max_turns=1)
+    history = [
+        {"role": "user", "content": "my name is Ada"},
+        {"role": "assistant", "content": "hello Ada"},
+        {"role": "user", "content": "q2"},
+        {"role": "assistant", "content": "a2"},
+    ]
+
+    async def run():
+        for _ in range(2):
+            await service.generate_response(prompt="what is my name?", context=history)
+
+    asyncio.run(run())
+
+    summary_calls = [
+        p for p in payloads if p["messages"][-1]["content"] != "what is my name?"
+    ]
+    assert len(summary_calls) == 1
+    assert "my name is Ada" in summary_calls[0]["messages"][1]["content"]
+    chat = payloads[-1]["messages"]
+    assert chat[0]["content"] == "Summary of the earlier conversation: SUMMARY"
+    assert chat[1:] == history[2:] + [{"role": "user", "content": "what is my name?"}]
+
+
+def test_summaries_fold_in_only_newly_dropped_messages(make_service):
+    summary_inputs = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        if body["messages"][0]["content"].startswith("Summarize"):
+            summary_inputs.append(body["messages"][1]["content"])
+            content = f"S{len(summary_inputs)}"
+        else:
+            content = "ok"
+        return httpx.Response(200, json={"message": {"content": content}, "done": True})
+
+    service = make_service(handler)
+    service.context_window = ContextWindowManager(policy="summarize", max_turns=1)
+    history = []
+
+    async def run():
+        for turn in range(4):
+            history.extend(
+                [
+                    {"role": "user", "content": f"q{turn}"},
+                    {"role": "assistant", "content": f"a{turn}"},
+                ]
+            )
+            await service.generate_response(prompt="next", context=list(history))
+
+    asyncio.run(run())
+
+    assert summary_inputs == [
+        "user: q0\nassistant: a0",
+        "Summary of the conversation so far: S1\n\nIt continues:\n"
+        "user: q1\nassistant: a1",
+        "Summary of the conversation so far: S2\n\nIt continues:\n"
+        "user: q2\nassistant: a2",
+    ]
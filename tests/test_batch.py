@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+
+
+def upper_handler(max_seen):
+    """Echo prompts upper-cased, recording how many requests overlap."""
+    in_flight = {"now": 0}
+
+    async def handler(request):
+        body = json.loads(request.content)
+        prompt = body["messages"][-1]["content"]
+        in_flight["now"] += 1
+        max_seen.append(in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if prompt == "boom":
+            return httpx.Response(500)
+        return httpx.Response(
+            200,
+            json={
+                "message": {"content": prompt.upper()},
+                "done": True,
+                "prompt_eval_count": 2,
+                "eval_count": 3,
+            },
+        )
+
+    return handler
+
+
+def test_generate_many_isolates_errors_and_bounds_concurrency(make_service):
+    max_seen = []
+    service = make_service(upper_handler(max_seen))
+    items = [{"prompt": f"p{i}", "temperature": 0.5} for i in range(10)]
+    items[3] = {"prompt": "boom"}
+    items[5] = "not an object"
+
+    async def run():
+        return [
+            event
+            async for event in service.generate_many(items, concurrency_per_model=2)
+        ]
+
+    events = asyncio.run(run())
+    results, summary = events[:-1], events[-1]["summary"]
+
+    assert sorted(r["index"] for r in results) == list(range(10))
+    errors = {r["index"] for r in results if "error" in r}
+    assert errors == {3, 5}
+    assert next(r for r in results if r["index"] == 0)["response"] == "P0"
+    assert max(max_seen) <= 2
+    assert summary["succeeded"] == 8
+    assert summary["failed"] == 2
+    assert summary["usage"]["total_tokens"] == 40
+
+
+def test_batch_endpoint_accepts_jsonl_upload(monkeypatch, make_service):
+    monkeypatch.setattr(routes, "llm_service", make_service(upper_handler([])))
+    client = TestClient(app)
+    upload = "\n".join(json.dumps({"prompt": f"p{i}"}) for i in range(3))
+
+    response = client.post(
+        "/api/generate/batch", files={"file": ("eval.jsonl", upload.encode())}
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+    assert lines[-1]["summary"]["succeeded"] == 3
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from benchmarks.harness import (
+    SCENARIOS,
+    Benchmark,
+    compare,
+    load_baseline,
+    local_stack,
+    percentile,
+    save_baseline,
+)
+
+
+def test_percentile_interpolates():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 50) == pytest.approx(0.25)
+    assert percentile(values, 100) == 0.4
+    assert percentile([], 95) is None
+
+
+def test_compare_flags_slower_latency_and_lower_throughput():
+    baseline = {
+        "generate": {
+            "latency_seconds": {"p95": 1.0},
+            "ttft_seconds": None,
+            "items_per_second": 20.0,
+            "errors": 0,
+        }
+    }
+    steady = {
+        "generate": {
+            "latency_seconds": {"p95": 1.05},
+            "ttft_seconds": None,
+            "items_per_second": 19.0,
+            "errors": 0,
+        }
+    }
+    slower = {
+        "generate": {
+            "latency_seconds": {"p95": 1.5},
+            "ttft_seconds": None,
+            "items_per_second": 10.0,
+            "errors": 0,
+        }
+    }
+    assert compare(steady, baseline, tolerance=0.1) == []
+    regressions = compare(slower, baseline, tolerance=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("generate: latency_seconds p95 1.5s")
+
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baselines" / "baseline.json")
+    assert load_baseline(path) is None
+    save_baseline({"results": {"generate": {"ok": 1}}}, path)
+    assert load_baseline(path) == {"results": {"generate": {"ok": 1}}}
+
+
+def test_every_scenario_runs_against_the_fakes():
+    with local_stack(token_rate=0, latency=0, tokens=4) as stack:
+        bench = Benchmark(stack["api"], concurrency=2, requests=4, batch_size=3)
+        results = {scenario: asyncio.run(bench.run(scenario)) for scenario in SCENARIOS}
+        fake_ollama = stack["fake_ollama"]
+
+    for scenario, result in results.items():
+        assert (result["ok"], result["errors"]) == (4, 0), scenario
+        assert result["latency_seconds"]["p99"] >= result["latency_seconds"]["p50"]
+    assert results["stream"]["ttft_seconds"]["p50"] is not None
+    assert results["ws"]["ttft_seconds"]["p50"] is not None
+    assert (
+        results["batch"]["items_per_second"] > results["batch"]["requests_per_second"]
+    )
+    assert fake_ollama.requests["chat"] >= 4 * 3 + 3 * 4
@@ -0,0 +1,83 @@
+import time
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.llm_service import LLMService
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(ttl=60, max_entries=2, max_bytes=1000)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=0.01, max_entries=10, max_bytes=1000)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_bound():
+    cache = TTLCache(ttl=60, max_entries=10, max_bytes=10, sizeof=len)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    cache.set("huge", "z" * 11)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 6
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_training_context_invalidation_matches_filters():
+    service = LLMService()
+    cache = service.training_context_cache
+    item = [{"prompt": "p", "response": "r"}]
+    cache.set((1, None, None), item)
+    cache.set((None, "s1", None), item)
+    cache.set((1, "s2", 5), item)
+    cache.set((2, None, None), item)
+
+    removed = service.invalidate_training_context(
+        user_id=1, session_id="s1", conversation_id=9
+    )
+
+    assert removed == 2
+    assert cache.get((1, "s2", 5)) == item
+    assert cache.get((2, None, None)) == item
+
+
+def test_training_context_is_fetched_once(monkeypatch):
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {"results": [{"id": 1, "prompt": "p", "response": "r"}]}
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        assert headers == {"X-Service-Token": "service-secret"}
+        calls.append(params)
+        return Response()
+
+    monkeypatch.setattr("app.services.llm_service.requests.get", fake_get)
+    monkeypatch.setattr(settings, "INTERNAL_SERVICE_TOKEN", "service-secret")
+    service = LLMService()
+
+    for _ in range(3):
+        assert service.get_training_context(user_id=1)[0]["prompt"] == "p"
+
+    assert len(calls) == 1
+    assert service.training_context_cache.stats()["hits"] == 2
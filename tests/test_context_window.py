@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.context_window import (
+    SUMMARY_PROMPT_TOKENS,
+    ContextWindowManager,
+    context_length,
+    count_tokens,
+)
+from app.services.llm_service import Message
+
+
+def history(turns, size=400):
+    messages = []
+    for i in range(turns):
+        messages.append(Message(role="user", content=f"q{i} " + "x" * size))
+        messages.append(Message(role="assistant", content=f"a{i} " + "y" * size))
+    return messages
+
+
+def test_context_length_registry():
+    assert context_length("mistral:7b-instruct-q4") == 8192
+    assert context_length("llama3.1:8b") == 131072
+    assert context_length("llama3-gradient") == 8192
+    assert context_length("unknown-model", default=1234) == 1234
+
+
+def test_count_tokens_is_approximate():
+    assert count_tokens("") == 0
+    assert count_tokens("abcd" * 100) == 100
+
+
+def test_sliding_window_keeps_newest_messages_within_budget():
+    manager = ContextWindowManager(policy="sliding_window")
+    messages = [Message(role="system", content="be brief")] + history(200)
+    pinned = [{"role": "user", "content": "new question"}]
+
+    kept, dropped = manager.fit(messages, "llama2", 1000, pinned)
+
+    assert kept[0].role == "system"
+    assert kept[-1] == messages[-1]
+    assert len(kept) + len(dropped) == len(messages)
+    assert sum(count_tokens(m.content) + 4 for m in kept) <= manager.budget(
+        "llama2", 1000
+    )
+
+
+def test_prompt_cost_is_bounded_as_conversation_grows():
+    manager = ContextWindowManager(policy="sliding_window")
+    pinned = [{"role": "user", "content": "q"}]
+    sizes = [
+        sum(
+            count_tokens(m.content)
+            for m in manager.fit(history(n), "llama2", 500, pinned)[0]
+        )
+        for n in (50, 500, 5000)
+    ]
+
+    assert max(sizes) - min(sizes) < 300
+
+
+def test_last_n_turns_policy():
+    manager = ContextWindowManager(policy="last_n_turns", max_turns=2)
+    messages = history(5, size=1)
+
+    kept, dropped = manager.fit(messages, "mistral", 100, [])
+
+    assert kept == messages[-4:]
+    assert dropped == messages[:-4]
+
+
+def test_summary_chunks_fit_one_request_each():
+    manager = ContextWindowManager(policy="summarize", summary_max_tokens=256)
+    messages = history(100)
+    cap = manager.budget("llama2", 256) - 256 - SUMMARY_PROMPT_TOKENS
+
+    chunks = manager.summary_chunks(messages, "llama2")
+
+    assert len(chunks) > 1
+    assert [m for chunk in chunks for m in chunk] == messages
+    assert all(sum(count_tokens(m.content) + 4 for m in c) <= cap for c in chunks)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ContextWindowManager(policy="keep_everything")
+
+
+def test_payload_sets_num_ctx_to_the_budgeted_window(make_service):
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"message": {"role": "assistant", "content": "ok"}, "done": True}
+        )
+
+    service = make_service(handler)
+    asyncio.run(
+        service.generate_response(
+            prompt="new question", model="llama2", context=history(200), max_tokens=500
+        )
+    )
+
+    (payload,) = payloads
+    assert payload["options"]["num_ctx"] == context_length("llama2") == 4096
+    sent = sum(count_tokens(m["content"]) + 4 for m in payload["messages"])
+    assert sent <= service.context_window.budget("llama2", 500)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+HISTORY = [
+    {"position": 0, "role": "user", "content": "My name is Ada."},
+    {"position": 1, "role": "assistant", "content": "Hello Ada."},
+]
+
+
+@pytest.fixture
+def make_history_service(make_service, recording_logger):
+    def build(history_status=200, log_status=201):
+        calls = {"history": 0, "chat": [], "logged": []}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/chat/llm-interactions/log/":
+                calls["logged"].append(
+                    (
+                        json.loads(request.content),
+                        request.headers.get("X-Service-Token"),
+                    )
+                )
+                return httpx.Response(log_status, json={})
+            if request.url.path.endswith("/messages/"):
+                calls["history"] += 1
+                return httpx.Response(
+                    history_status, json={"results": HISTORY, "next_cursor": None}
+                )
+            if request.url.path == "/api/chat":
+                calls["chat"].append(json.loads(request.content)["messages"])
+                return httpx.Response(
+                    200,
+                    json={
+                        "message": {"role": "assistant", "content": "Ada."},
+                        "done": True,
+                    },
+                )
+            if request.url.path.endswith("/conversations/create/"):
+                return httpx.Response(201, json={"id": 9})
+            return httpx.Response(404)
+
+        service = make_service(handler, recording_logger)
+        return service, calls
+
+    return build
+
+
+def test_turns_continue_the_stored_history(make_history_service):
+    service, calls = make_history_service()
+
+    async def run():
+        await service.generate_response(prompt="What is my name?", conversation_id=1)
+        await service.generate_response(prompt="Spell it.", conversation_id=1)
+
+    asyncio.run(run())
+
+    assert calls["history"] == 1
+    first, second = calls["chat"]
+    assert [m["content"] for m in first] == [
+        "My name is Ada.",
+        "Hello Ada.",
+        "What is my name?",
+    ]
+    assert [m["content"] for m in second] == [
+        "My name is Ada.",
+        "Hello Ada.",
+        "What is my name?",
+        "Ada.",
+        "Spell it.",
+    ]
+    assert service.history.stats()["entries"] == 1
+
+
+def test_concurrent_misses_share_one_load(make_history_service):
+    service, calls = make_history_service()
+
+    async def run():
+        return await asyncio.gather(*(service.history.load(1) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls["history"] == 1
+    assert all(len(messages) == 2 for messages in results)
+
+
+def test_client_context_and_new_conversations_skip_the_load(make_history_service):
+    service, calls = make_history_service()
+
+    async def run():
+        await service.generate_response(prompt="Hi", context=[], conversation_id=1)
+        conversation_id = await service.create_conversation("Web Chat")
+        await service.generate_response(prompt="Hi", conversation_id=conversation_id)
+        return conversation_id
+
+    conversation_id = asyncio.run(run())
+
+    assert calls["history"] == 0
+    assert [m["content"] for m in calls["chat"][1]] == ["Hi"]
+    assert asyncio.run(service.history.load(conversation_id)) == [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Ada."},
+    ]
+
+
+def test_failed_load_is_not_cached(make_history_service):
+    service, calls = make_history_service(history_status=503)
+
+    assert asyncio.run(service.history.load(1)) == []
+    assert asyncio.run(service.history.load(1)) == []
+    assert calls["history"] == 2
+
+
+def test_hot_tier_keeps_the_most_recent_messages(make_history_service):
+    service, _ = make_history_service()
+    service.history.max_messages = 4
+    service.history.start(1)
+    for turn in range(3):
+        service.history.append(1, f"q{turn}", f"a{turn}")
+    service.history.append(2, "cold", "not cached")
+
+    messages = asyncio.run(service.history.load(1))
+
+    assert [m["content"] for m in messages] == ["q1", "a1", "q2", "a2"]
+    assert service.history.stats()["entries"] == 1
+
+
+def test_turns_are_logged_in_the_background(make_history_service, recording_logger):
+    service, calls = make_history_service()
+
+    asyncio.run(service.generate_response(prompt="Hi", conversation_id=1))
+
+    # Delivered by the batching logger, not awaited before the reply
+    assert calls["logged"] == []
+    (record,) = recording_logger.records
+    assert (record["prompt"], record["conversation"]) == ("Hi", 1)
+    assert [m["content"] for m in asyncio.run(service.history.load(1))][-2:] == [
+        "Hi",
+        "Ada.",
+    ]
+
+
+def test_appending_does_not_extend_the_cached_history(
+    monkeypatch, make_history_service
+):
+    service, calls = make_history_service()
+    clock = [100.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: clock[0])
+    service.history.cache.ttl = 30
+
+    asyncio.run(service.history.load(1))
+    clock[0] += 20
+    service.history.append(1, "q", "a")
+    assert len(asyncio.run(service.history.load(1))) == 4
+
+    # Reloaded once the entry loaded 30s ago expires, despite the append
+    clock[0] += 15
+    asyncio.run(service.history.load(1))
+    assert calls["history"] == 2
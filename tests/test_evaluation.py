@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.evaluation import (
+    EvaluationEngine,
+    parse_evaluation,
+    parse_json_object,
+    validate_score,
+)
+
+CRITERIA = {"relevance": "Relevant?", "clarity": "Clear?"}
+
+
+@pytest.fixture
+def make_engine(make_service):
+    def build(judge, admin_requests, mode="json"):
+        """Engine whose Ollama judge replies come from ``judge(body)``."""
+        in_flight = {"now": 0, "max": 0}
+
+        async def handler(request):
+            if request.url.path.startswith("/chat/"):
+                admin_requests.append(request)
+                if request.url.path.endswith("/scores/"):
+                    updates = json.loads(request.content)
+                    return httpx.Response(200, json={"updated": len(updates)})
+                cursor = request.url.params.get("cursor")
+                rows = [
+                    {"id": i, "prompt": f"p{i}", "response": f"r{i}"} for i in (1, 2)
+                ]
+                if cursor is None:
+                    return httpx.Response(200, json={"results": rows, "next_cursor": 2})
+                return httpx.Response(200, json={"results": [], "next_cursor": None})
+
+            body = json.loads(request.content)
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return httpx.Response(
+                200, json={"message": {"content": judge(body)}, "done": True}
+            )
+
+        service = make_service(handler)
+        return EvaluationEngine(service, model="judge", mode=mode), in_flight
+
+    return build
+
+
+def test_parse_and_validate_scores():
+    assert parse_json_object('Sure! {"a": 1} Hope that helps') == {"a": 1}
+    with pytest.raises(ValueError):
+        parse_json_object("no json here")
+    assert validate_score("7") == 7
+    assert validate_score(8.0) == 8
+    for bad in (0, 11, 7.5, True, "high", None):
+        with pytest.raises(ValueError):
+            validate_score(bad)
+
+    result = parse_evaluation(
+        json.dumps(
+            {
+                "scores": {"relevance": 9, "clarity": 42},
+                "explanations": {"relevance": "On topic"},
+            }
+        ),
+        CRITERIA,
+        "judge",
+    )
+    assert result["scores"] == {"relevance": 9}
+    assert result["score"] == 9
+    assert set(result["errors"]) == {"clarity"}
+
+
+def test_json_mode_uses_one_format_json_call(make_engine):
+    bodies = []
+
+    def judge(body):
+        bodies.append(body)
+        return json.dumps(
+            {
+                "scores": {"relevance": 8, "clarity": 6},
+                "explanations": {"relevance": "ok", "clarity": "meh"},
+            }
+        )
+
+    engine, _ = make_engine(judge, [])
+    result = asyncio.run(engine.evaluate("q", "a", criteria=CRITERIA))
+
+    assert len(bodies) == 1
+    assert bodies[0]["format"] == "json"
+    assert bodies[0]["model"] == "judge"
+    assert result["score"] == 7
+    assert result["errors"] == {}
+
+
+def test_parallel_mode_runs_one_call_per_criterion(make_engine):
+    def judge(body):
+        prompt = body["messages"][-1]["content"]
+        score = 9 if "(relevance)" in prompt else "bad"
+        return json.dumps({"score": score, "explanation": "x"})
+
+    engine, in_flight = make_engine(judge, [], mode="parallel")
+    result = asyncio.run(engine.evaluate("q", "a", criteria=CRITERIA))
+
+    assert in_flight["max"] == 2
+    assert result["scores"] == {"relevance": 9}
+    assert "clarity" in result["errors"]
+
+
+def test_evaluate_many_bounds_concurrency_and_writes_back(make_engine):
+    admin_requests = []
+
+    def judge(body):
+        return json.dumps({"scores": {"relevance": 5, "clarity": 7}})
+
+    engine, in_flight = make_engine(judge, admin_requests)
+
+    async def run():
+        items = await engine.conversation_items(42)
+        items.append({"prompt": "no response"})
+        return [
+            event
+            async for event in engine.evaluate_many(
+                items, criteria=CRITERIA, concurrency=1
+            )
+        ]
+
+    events = asyncio.run(run())
+    results, summary = events[:-1], events[-1]["summary"]
+
+    assert in_flight["max"] == 1
+    assert sorted(r["index"] for r in results) == [0, 1, 2]
+    assert "error" in next(r for r in results if r["index"] == 2)
+    assert summary["succeeded"] == 2
+    assert summary["failed"] == 1
+    assert summary["written"] == 2
+    assert summary["mean_score"] == 6
+
+    writes = [r for r in admin_requests if r.url.path.endswith("/scores/")]
+    assert len(writes) == 1
+    updates = json.loads(writes[0].content)
+    assert {u["id"] for u in updates} == {1, 2}
+    assert all(u["score"] == 6 for u in updates)
+    assert "relevance: 5/10" in updates[0]["feedback_comment"]
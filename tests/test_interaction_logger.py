@@ -0,0 +1,163 @@
+import json
+
+import requests
+
+from app.services.interaction_logger import InteractionLogger
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = ""
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    def __init__(self, fail_times=0, replies=()):
+        self.fail_times = fail_times
+        # Responses returned before the admin starts accepting batches
+        self.replies = list(replies)
+        self.received = []
+        self.batch_sizes = []
+
+    def post(self, url, json=None, timeout=None):
+        assert url == "http://admin/chat/llm-interactions/bulk/"
+        if self.fail_times:
+            self.fail_times -= 1
+            raise requests.ConnectionError("admin is down")
+        if self.replies:
+            return self.replies.pop(0)
+        self.batch_sizes.append(len(json))
+        self.received.extend(json)
+        return FakeResponse(201)
+
+    def prompts(self):
+        return [record["prompt"] for record in self.received]
+
+
+def make_logger(tmp_path, session, **kwargs):
+    return InteractionLogger(
+        admin_url="http://admin",
+        batch_size=10,
+        flush_interval=0.05,
+        retry_backoff=0,
+        spool_path=str(tmp_path / "spool.jsonl"),
+        session=session,
+        **kwargs,
+    )
+
+
+def test_records_are_flushed_in_batches(tmp_path):
+    session = FakeSession()
+    interaction_logger = make_logger(tmp_path, session)
+
+    for i in range(25):
+        interaction_logger.log({"prompt": f"p{i}"})
+    interaction_logger.close()
+
+    assert [r["prompt"] for r in session.received] == [f"p{i}" for i in range(25)]
+    assert all(size <= 10 for size in session.batch_sizes)
+    assert len(session.batch_sizes) < 25
+
+
+def test_retries_before_giving_up(tmp_path):
+    session = FakeSession(fail_times=2)
+    interaction_logger = make_logger(tmp_path, session, max_retries=3)
+
+    interaction_logger.log({"prompt": "p"})
+    interaction_logger.close()
+
+    assert session.prompts() == ["p"]
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_failed_batches_are_spooled_and_replayed_once(tmp_path):
+    session = FakeSession(fail_times=100)
+    interaction_logger = make_logger(tmp_path, session, max_retries=1)
+
+    interaction_logger.log({"prompt": "first"})
+    interaction_logger.close()
+
+    spool = tmp_path / "spool.jsonl"
+    spooled = [json.loads(line) for line in spool.read_text().splitlines()]
+    assert [record["prompt"] for record in spooled] == ["first"]
+
+    session.fail_times = 0
+    interaction_logger.log({"prompt": "second"})
+    interaction_logger.close()
+
+    assert session.prompts() == ["second", "first"]
+    assert session.received[1]["idempotency_key"] == spooled[0]["idempotency_key"]
+    assert not spool.exists()
+
+
+def test_refused_batches_are_spooled_not_dropped(tmp_path):
+    session = FakeSession(
+        replies=[
+            FakeResponse(413),
+            FakeResponse(400, {"error": "Expected a list of interactions"}),
+        ]
+    )
+    interaction_logger = make_logger(tmp_path, session, max_retries=1)
+
+    interaction_logger.log({"prompt": "p"})
+    interaction_logger.close()
+
+    spool = tmp_path / "spool.jsonl"
+    assert [json.loads(line)["prompt"] for line in spool.read_text().splitlines()] == [
+        "p"
+    ]
+
+
+def test_items_rejected_by_validation_are_dropped(tmp_path):
+    session = FakeSession(
+        replies=[FakeResponse(400, {"created": 0, "errors": [{"index": 0}]})]
+    )
+    interaction_logger = make_logger(tmp_path, session)
+
+    interaction_logger.log({"prompt": None})
+    interaction_logger.close()
+
+    assert session.received == []
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_interrupted_replay_is_resumed(tmp_path):
+    # A replay file left behind by a crash mid-replay
+    replay = tmp_path / "spool.jsonl.replay"
+    replay.write_text(json.dumps({"prompt": "stranded", "idempotency_key": "k"}) + "\n")
+    session = FakeSession()
+    interaction_logger = make_logger(tmp_path, session)
+
+    interaction_logger.log({"prompt": "new"})
+    interaction_logger.close()
+
+    assert session.prompts() == ["new", "stranded"]
+    assert not replay.exists()
+
+
+def test_failed_replay_keeps_the_records(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    spool.write_text(json.dumps({"prompt": "old", "idempotency_key": "k"}) + "\n")
+    # The live batch goes through, the replay of the spool does not
+    session = FakeSession()
+    interaction_logger = make_logger(tmp_path, session)
+    sent = interaction_logger._send
+
+    def send(batch):
+        if batch[0]["prompt"] == "old":
+            return batch
+        return sent(batch)
+
+    interaction_logger._send = send
+    interaction_logger.log({"prompt": "new"})
+    interaction_logger.close()
+
+    assert session.prompts() == ["new"]
+    assert [json.loads(line)["prompt"] for line in spool.read_text().splitlines()] == [
+        "old"
+    ]
+    assert not (tmp_path / "spool.jsonl.replay").exists()
@@ -1,24 +1,38 @@
 import pytest
 
 from app.services.llm_service import LLMService, Message
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.servers import BackgroundServer
+
+
+@pytest.fixture(scope="module")
+def fake_ollama():
+    fake = FakeOllama(models=["mistral:7b-instruct-q4"], token_rate=0, latency=0)
+    with BackgroundServer(fake.app) as server:
+        fake.url = server.url
+        yield fake
 
 
 @pytest.fixture
-def llm_service():
-    return LLMService()
+def llm_service(fake_ollama, null_logger):
+    service = LLMService(interaction_logger=null_logger)
+    service.base_url = fake_ollama.url
+    service.default_model = "mistral:7b-instruct-q4"
+    return service
 
 
 def test_generate_response(llm_service):
     # Test basic response generation
     result = llm_service.generate_response(prompt="What is 2+2?", temperature=0.1)
-    assert "response" in result
-    assert "model" in result
+    assert result["message"]["content"].startswith("token0 ")
+    assert result["model"] == "mistral:7b-instruct-q4"
+    assert result["usage"]["completion_tokens"] == 32
 
 
 def test_list_models(llm_service):
     # Test listing available models
     models = llm_service.list_models()
-    assert isinstance(models, list)
+    assert models == ["mistral:7b-instruct-q4"]
 
 
 def test_generate_with_context(llm_service):
@@ -31,7 +45,17 @@ def test_generate_with_context(llm_service):
     ]
 
     result = llm_service.generate_response(
-        prompt="What is 4+4?", context=context, temperature=0.1
+        prompt="What is 4+4?", context=context, temperature=0.1, max_tokens=5
     )
-    assert "response" in result
-    assert "model" in result
+    assert result["message"]["content"] == "token0 token1 token2 token3 token4 "
+    assert result["model"] == "mistral:7b-instruct-q4"
+
+
+def test_generate_stream(llm_service):
+    events = list(llm_service.generate_stream(prompt="Count", max_tokens=3))
+    assert [event["delta"] for event in events[:-1]] == [
+        "token0 ",
+        "token1 ",
+        "token2 ",
+    ]
+    assert events[-1]["usage"]["completion_tokens"] == 3
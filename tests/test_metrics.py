@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    histogram = registry.register(
+        metrics.Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    )
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+    assert 'demo_seconds_sum{stage="a"} 5.55' in lines
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("demo_total", "Demo.", ("model",))
+    counter.inc(model='we"ird\nname')
+    assert counter.render()[-1] == 'demo_total{model="we\\"ird\\nname"} 1'
+
+
+def test_ollama_chunk_records_stages_and_tokens_per_second():
+    chunk = {
+        "done": True,
+        "load_duration": 500_000_000,
+        "prompt_eval_count": 12,
+        "prompt_eval_duration": 100_000_000,
+        "eval_count": 40,
+        "eval_duration": 2_000_000_000,
+        "total_duration": 2_700_000_000,
+    }
+    metrics.record_ollama_chunk("metrics-test", chunk)
+
+    key = ("metrics-test",)
+    assert metrics.TOKENS._values[("metrics-test", "completion")] == 40
+    assert metrics.TOKENS._values[("metrics-test", "prompt")] == 12
+    _, total, count = metrics.TOKENS_PER_SECOND._values[key]
+    assert (total, count) == (20.0, 1)
+    _, total, _ = metrics.STAGE_SECONDS._values[("ollama_load", "metrics-test")]
+    assert total == 0.5
+
+
+def test_metrics_endpoint_exposes_state_and_http_latency():
+    with TestClient(app) as client:
+        client.get("/api/scheduler")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'llm_service_state{name="scheduler_queued"} 0' in body
+    assert 'llm_service_state{name="interaction_log_queue"}' in body
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/api/scheduler",'
+        'status="200"}' in body
+    )
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import metrics
+
+TAGS = {
+    "models": [
+        {
+            "name": "mistral:7b-instruct-q4",
+            "size": 4109865159,
+            "digest": "abc",
+            "details": {
+                "format": "gguf",
+                "family": "llama",
+                "families": ["llama"],
+                "parameter_size": "7B",
+                "quantization_level": "Q4_0",
+            },
+        }
+    ]
+}
+
+
+def tags_handler(state):
+    def handler(request):
+        state["requests"].append(request.url.path)
+        if not state["up"]:
+            raise httpx.ConnectError("connection refused")
+        if request.url.path == "/api/ps":
+            return httpx.Response(
+                200, json={"models": [{"name": "mistral:7b-instruct-q4"}]}
+            )
+        return httpx.Response(200, json=TAGS)
+
+    return handler
+
+
+def test_model_list_is_served_from_the_catalog(make_service):
+    state = {"up": True, "requests": []}
+    service = make_service(tags_handler(state))
+
+    async def run():
+        first = await service.list_models()
+        second = await service.list_models()
+        return first, second, (await service.model_catalog()).snapshot()
+
+    first, second, snapshot = asyncio.run(run())
+    assert first == second == ["mistral:7b-instruct-q4"]
+    assert state["requests"] == ["/api/tags", "/api/ps"]
+    model = snapshot["models"][0]
+    assert model["details"]["quantization_level"] == "Q4_0"
+    assert model["size"] == 4109865159
+    assert model["loaded"] is True
+    assert snapshot["stale"] is False
+
+
+def test_unreachable_ollama_serves_stale_snapshot(make_service):
+    state = {"up": True, "requests": []}
+    service = make_service(tags_handler(state))
+
+    async def run():
+        await service.refresh_catalog()
+        state["up"] = False
+        await service.refresh_catalog()
+        return await service.list_models()
+
+    models = asyncio.run(run())
+    assert models == ["mistral:7b-instruct-q4"]
+    snapshot = service.catalog.snapshot()
+    assert snapshot["stale"] is True
+    assert "connection refused" in snapshot["error"]
+
+    state["up"] = True
+    asyncio.run(service.refresh_catalog())
+    assert service.catalog.stale is False
+
+
+def test_list_models_fails_without_any_snapshot(make_service):
+    service = make_service(tags_handler({"up": False, "requests": []}))
+    with pytest.raises(Exception, match="connection refused"):
+        asyncio.run(service.list_models())
+
+
+def test_models_missing_from_the_catalog_share_one_metric_label(make_service):
+    tags = tags_handler({"up": True, "requests": []})
+
+    def handler(request):
+        if request.url.path == "/api/chat":
+            return httpx.Response(
+                200, json={"message": {"content": "ok"}, "done": True, "eval_count": 1}
+            )
+        return tags(request)
+
+    service = make_service(handler)
+
+    async def run():
+        await service.refresh_catalog()
+        for model in ("mistral:7b-instruct-q4", "made-up-1", "made-up-2"):
+            await service.generate_response(prompt="hi", model=model)
+
+    before = metrics.GENERATIONS._values.get(("other", "generate", "disabled"), 0)
+    asyncio.run(run())
+
+    assert service.catalog.metric_label("mistral:7b-instruct-q4") == (
+        "mistral:7b-instruct-q4"
+    )
+    assert service.catalog.metric_label("llama3") == "other"
+    values = metrics.GENERATIONS._values
+    assert values[("mistral:7b-instruct-q4", "generate", "disabled")] >= 1
+    assert values[("other", "generate", "disabled")] == before + 2
+    assert not any(key[0].startswith("made-up") for key in values)
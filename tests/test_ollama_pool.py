@@ -0,0 +1,188 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.services.llm_service import AsyncLLMService
+from app.services.ollama_pool import OllamaPool
+
+
+class StubOllama:
+    """Minimal Ollama server on a local port answering tags, ps and chat."""
+
+    def __init__(self, name, models=("mistral",), loaded=()):
+        self.name = name
+        self.models = list(models)
+        self.loaded = list(loaded)
+        self.chats = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, body):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                names = stub.models if self.path == "/api/tags" else stub.loaded
+                self.reply({"models": [{"name": name} for name in names]})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                stub.chats += 1
+                self.reply({"message": {"content": stub.name}, "done": True})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    servers = []
+
+    def make(*args, **kwargs):
+        server = StubOllama(*args, **kwargs)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.close()
+
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def make_pool_service(null_logger):
+    def build(urls):
+        return AsyncLLMService(
+            client=httpx.AsyncClient(),
+            interaction_logger=null_logger,
+            pool=OllamaPool(urls, max_failures=1),
+        )
+
+    return build
+
+
+def test_routes_to_node_with_model_already_loaded(stubs, make_pool_service):
+    cold = stubs("cold", models=("mistral", "llama3"))
+    warm = stubs("warm", models=("mistral",), loaded=("mistral",))
+    other = stubs("other", models=("llama3",), loaded=("llama3",))
+    service = make_pool_service([cold.url, warm.url, other.url])
+
+    async def run():
+        await service.pool.probe(service.client)
+        mistral = await service.generate_response("hi", model="mistral")
+        llama = await service.generate_response("hi", model="llama3")
+        models = await service.list_models()
+        await service.aclose()
+        return mistral, llama, models
+
+    mistral, llama, models = asyncio.run(run())
+    assert mistral["message"]["content"] == "warm"
+    assert llama["message"]["content"] == "other"
+    assert models == ["mistral", "llama3"]
+
+
+def test_fails_over_and_ejects_unreachable_node(stubs, make_pool_service):
+    healthy = stubs("healthy")
+    down = unused_url()
+    service = make_pool_service([down, healthy.url])
+    # Make the unreachable node the preferred one
+    service.pool.nodes[0].loaded.add("mistral")
+
+    async def run():
+        first = await service.generate_response("hi", model="mistral")
+        second = await service.generate_response("again", model="mistral")
+        await service.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["message"]["content"] == "healthy"
+    assert second["message"]["content"] == "healthy"
+    assert healthy.chats == 2
+    assert [node["healthy"] for node in service.pool.stats()] == [False, True]
+
+
+def test_probe_readmits_recovered_node(stubs):
+    node = stubs("node")
+    pool = OllamaPool([node.url], max_failures=1)
+    pool.mark_failed(pool.nodes[0])
+    assert not pool.nodes[0].healthy
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            await pool.probe(client)
+
+    asyncio.run(run())
+    assert pool.nodes[0].healthy
+    assert pool.nodes[0].models == {"mistral:latest"}
+
+
+def test_untagged_and_latest_names_match(stubs):
+    node = stubs("node", models=("mistral", "llama3:latest"), loaded=("mistral",))
+    pool = OllamaPool([node.url])
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            await pool.probe(client)
+
+    asyncio.run(run())
+    assert pool.nodes[0].has_model("mistral:latest")
+    assert pool.nodes[0].has_model("llama3")
+    assert not pool.nodes[0].has_model("llama3:8b")
+    assert pool.nodes[0].has_loaded("mistral:latest")
+
+
+def test_latency_comes_from_requests(stubs, make_pool_service):
+    node = stubs("node")
+    service = make_pool_service([node.url])
+
+    async def run():
+        await service.pool.probe(service.client)
+        assert service.pool.nodes[0].latency is None
+        await service.generate_response("hi", model="mistral")
+        await service.aclose()
+
+    asyncio.run(run())
+    assert service.pool.nodes[0].latency > 0
+
+
+def test_failed_requests_do_not_mark_the_model_loaded(make_service):
+    def handler(request):
+        return httpx.Response(500, json={"error": "model failed to load"})
+
+    service = make_service(handler, pool=OllamaPool(["http://a:11434"]))
+
+    with pytest.raises(Exception, match="500"):
+        asyncio.run(service.generate_response("hi", model="mistral"))
+    assert service.pool.nodes[0].loaded == set()
+
+
+def test_unmeasured_nodes_are_tried_before_measured_ones():
+    pool = OllamaPool(["http://a:11434", "http://b:11434"])
+    pool.observe_latency(pool.nodes[0], 0.5)
+
+    assert [node.url for node in pool.ranked("mistral")] == [
+        "http://b:11434",
+        "http://a:11434",
+    ]
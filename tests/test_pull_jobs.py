@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+
+def pull_handler(lines, pulls):
+    async def handler(request):
+        pulls.append(json.loads(request.content))
+        body = "".join(json.dumps(line) + "\n" for line in lines)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=body.encode())
+
+    return handler
+
+
+PROGRESS = [
+    {"status": "pulling manifest"},
+    {"status": "pulling abc", "digest": "sha256:abc", "total": 100, "completed": 40},
+    {"status": "pulling abc", "digest": "sha256:abc", "total": 100, "completed": 100},
+    {"status": "success"},
+]
+
+
+def test_concurrent_pulls_of_a_model_share_one_job(make_service):
+    pulls = []
+    service = make_service(pull_handler(PROGRESS, pulls))
+
+    async def run():
+        first = service.pull_jobs.start("phi3")
+        second = service.pull_jobs.start("phi3")
+        snapshots = [snapshot async for snapshot in first.watch()]
+        return first, second, snapshots
+
+    first, second, snapshots = asyncio.run(run())
+    assert first is second
+    assert pulls == [{"name": "phi3", "stream": True}]
+    assert snapshots[-1]["status"] == "success"
+    assert snapshots[-1]["progress"] == 1.0
+    assert snapshots[0]["status"] == "queued"
+    assert {s["status"] for s in snapshots[1:-1]} == {"pulling"}
+    assert service.pull_jobs.list()[0]["id"] == first.id
+
+
+def test_pulled_model_is_known_by_its_normalized_name(monkeypatch, make_service):
+    service = make_service(pull_handler(PROGRESS, []))
+    node = service.pool.nodes[0]
+    node.models = set()
+
+    async def refresh_catalog():
+        pass
+
+    monkeypatch.setattr(service, "refresh_catalog", refresh_catalog)
+    asyncio.run(service.pull_model("phi3"))
+
+    assert node.models == {"phi3:latest"}
+    assert node.has_model("phi3") and node.has_model("phi3:latest")
+
+
+def test_pull_error_fails_the_job(make_service):
+    service = make_service(
+        pull_handler([{"status": "pulling manifest"}, {"error": "not found"}], [])
+    )
+
+    with pytest.raises(Exception, match="not found"):
+        asyncio.run(service.pull_model("missing"))
+    assert service.pull_jobs.list()[0]["status"] == "failed"
+
+
+def test_finished_jobs_are_pruned_to_history(make_service):
+    service = make_service(pull_handler(PROGRESS, []))
+    service.pull_jobs.history = 2
+
+    async def run():
+        for index in range(4):
+            await service.pull_model(f"model-{index}")
+
+    asyncio.run(run())
+    assert [job["model"] for job in service.pull_jobs.list()] == ["model-2", "model-3"]
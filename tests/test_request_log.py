@@ -0,0 +1,64 @@
+import io
+import json
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from app.core import logging_config
+from app.core.config import settings
+from app.services import request_log
+
+PAYLOAD = {
+    "model": "mistral:7b-instruct-q4",
+    "messages": [{"role": "user", "content": "x" * 1000}],
+}
+RESPONSE = {
+    "message": {"role": "assistant", "content": "y" * 1000},
+    "usage": {"prompt_tokens": 250, "completion_tokens": 260, "cache": "miss"},
+}
+
+
+@pytest.fixture
+def log_output():
+    stream = io.StringIO()
+    logging_config.configure_logging(
+        level="INFO", fmt="json", handler=logging.StreamHandler(stream)
+    )
+    yield stream
+    logging_config.stop_logging()
+
+
+def records(stream):
+    logging_config.stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_request_log_carries_metadata_only(log_output, monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    request_log.log_request("generate", PAYLOAD, "x" * 1000, RESPONSE, 0.25, "s1")
+
+    (entry,) = records(log_output)
+    assert entry["logger"] == "app.requests"
+    assert entry["message"] == "generate mistral:7b-instruct-q4 completed in 250ms"
+    assert entry["prompt_chars"] == entry["response_chars"] == 1000
+    assert entry["completion_tokens"] == 260
+    assert entry["session_id"] == "s1"
+    assert "prompt" not in entry and "response" not in entry
+
+
+def test_sampled_requests_log_truncated_payloads(log_output, monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "REQUEST_LOG_PAYLOAD_MAX_CHARS", 10)
+    request_log.log_request("stream", PAYLOAD, "x" * 1000, RESPONSE, 0.1)
+
+    (entry,) = records(log_output)
+    assert entry["prompt"] == "xxxxxxxxxx... [990 more chars]"
+    assert entry["response"].startswith("yyyyyyyyyy...")
+
+
+def test_stop_logging_detaches_the_queue_handler(log_output):
+    logging_config.stop_logging()
+    assert not any(
+        isinstance(handler, QueueHandler) for handler in logging.getLogger().handlers
+    )
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+
+from app.core.config import settings
+from app.services.ollama_pool import OllamaPool
+from app.services.residency import keep_alive_for
+from app.services.scheduler import Scheduler
+
+
+def recording_handler(bodies):
+    async def handler(request):
+        body = json.loads(request.content)
+        bodies.append({**body, "url": f"{request.url.scheme}://{request.url.host}"})
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"message": {"content": "ok"}, "done": True})
+
+    return handler
+
+
+def test_keep_alive_overrides_match_model_then_family(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_KEEP_ALIVE", "30m")
+    monkeypatch.setattr(
+        settings, "MODEL_KEEP_ALIVE_OVERRIDES", "llama3=1h, mistral:7b = -1"
+    )
+    assert keep_alive_for("mistral:7b") == "-1"
+    assert keep_alive_for("llama3:8b-instruct") == "1h"
+    assert keep_alive_for("phi3") == "30m"
+
+
+def test_requests_carry_keep_alive_hint(make_service):
+    bodies = []
+    service = make_service(recording_handler(bodies))
+    asyncio.run(service.generate_response("hi", model="phi3"))
+    assert bodies[0]["keep_alive"] == keep_alive_for("phi3")
+
+
+def test_concurrent_warms_share_one_load_and_mark_model_resident(make_service):
+    bodies = []
+    service = make_service(recording_handler(bodies))
+
+    async def run():
+        states = await asyncio.gather(
+            service.residency.warm("phi3"), service.residency.warm("phi3")
+        )
+        again = service.residency.warm_in_background("phi3")
+        return states, again
+
+    states, again = asyncio.run(run())
+    assert len(bodies) == 1
+    assert bodies[0]["messages"] == []
+    assert states[0]["status"] == "loaded"
+    # Already resident, so no second load is started
+    assert again["resident"] is True
+    assert len(bodies) == 1
+
+
+def test_ensure_resident_rewarms_evicted_models(monkeypatch, make_service):
+    monkeypatch.setattr(settings, "MODEL_WARM_MODELS", "phi3,absent")
+    bodies = []
+    service = make_service(recording_handler(bodies))
+    node = service.pool.nodes[0]
+    node.models = {"phi3:latest", "mistral:latest"}
+
+    asyncio.run(service.residency.ensure_resident())
+    assert [body["model"] for body in bodies] == ["phi3"]
+
+    asyncio.run(service.residency.ensure_resident())
+    assert len(bodies) == 1
+
+    node.loaded.clear()  # a probe saw Ollama evict it
+    asyncio.run(service.residency.ensure_resident())
+    assert len(bodies) == 2
+
+
+def test_warm_loads_every_healthy_node_with_the_model(make_service):
+    bodies = []
+    pool = OllamaPool(["http://a", "http://b", "http://c", "http://d"])
+    pool.nodes[1].loaded = {"phi3:latest"}
+    pool.nodes[2].models = {"mistral:latest"}
+    pool.nodes[3].healthy = False
+    service = make_service(recording_handler(bodies), pool=pool)
+
+    state = asyncio.run(service.residency.warm("phi3"))
+
+    assert [body["url"] for body in bodies] == ["http://a"]
+    assert state["nodes"] == {"http://a": "loaded"}
+    assert pool.nodes[0].has_loaded("phi3")
+
+
+def test_warm_waits_behind_requests_for_a_scheduler_slot(make_service):
+    bodies = []
+    scheduler = Scheduler(max_concurrency_per_model=1, memory_budget_gb=100)
+    service = make_service(recording_handler(bodies), scheduler=scheduler)
+
+    async def run():
+        await scheduler.acquire("phi3")
+        warm = asyncio.ensure_future(service.residency.warm("phi3"))
+        await asyncio.sleep(0.05)
+        assert bodies == [] and scheduler.stats()["queued"] == 1
+        scheduler.release("phi3")
+        return await warm
+
+    assert asyncio.run(run())["status"] == "loaded"
+    assert len(bodies) == 1
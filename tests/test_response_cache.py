@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import httpx
+
+from app.services.response_cache import (
+    InMemoryResponseCache,
+    SQLiteResponseCache,
+    request_key,
+)
+
+
+def payload(**overrides):
+    data = {
+        "model": "mistral",
+        "messages": [{"role": "user", "content": "2+2?"}],
+        "stream": False,
+        "options": {"temperature": 0.0, "num_predict": 10},
+    }
+    data.update(overrides)
+    return data
+
+
+def response(content="4"):
+    return {
+        "message": {"role": "assistant", "content": content},
+        "model": "mistral",
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    }
+
+
+def test_request_key_is_canonical():
+    reordered = {
+        "options": {"num_predict": 10, "temperature": 0.0},
+        "stream": True,
+        "messages": [{"content": "2+2?", "role": "user"}],
+        "model": "mistral",
+    }
+
+    assert request_key(payload()) == request_key(reordered)
+    assert request_key(payload()) != request_key(payload(model="llama3"))
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteResponseCache(path, ttl=60, max_entries=10).set("k", response())
+
+    assert SQLiteResponseCache(path, ttl=60, max_entries=10).get("k") == response()
+    assert SQLiteResponseCache(path, ttl=0, max_entries=10).get("k") is None
+
+
+def test_sqlite_cache_prunes_least_recently_used(tmp_path):
+    cache = SQLiteResponseCache(
+        str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2, prune_every=1
+    )
+    cache.set("a", response("a"))
+    cache.set("b", response("b"))
+    cache.get("a")
+    cache.set("c", response("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == response("a")
+
+
+def test_sqlite_cache_batches_writes(tmp_path):
+    cache = SQLiteResponseCache(
+        str(tmp_path / "cache.sqlite3"),
+        ttl=60,
+        max_entries=2,
+        prune_every=3,
+        touch_batch=2,
+    )
+    cache.set("a", response("a"))
+    cache.set("b", response("b"))
+    changes = cache._conn.total_changes
+
+    # Hits are stored in batches of touch_batch
+    assert cache.get("a") == response("a")
+    assert cache._conn.total_changes == changes
+    assert cache.get("b") == response("b")
+    assert cache._conn.total_changes == changes + 2
+
+    # The third write prunes the least recently used row
+    cache.set("c", response("c"))
+    rows = cache._conn.execute("SELECT key FROM responses ORDER BY key").fetchall()
+    assert rows == [("b",), ("c",)]
+
+
+def test_sqlite_cache_async_access_runs_off_the_event_loop(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2)
+    threads = []
+    get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.current_thread())
+        return get(key)
+
+    cache.get = recording_get
+
+    async def run():
+        await cache.aset("k", response())
+        return await cache.aget("k")
+
+    assert asyncio.run(run()) == response()
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_service_reports_cache_status(make_service, recording_logger):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(
+            200, json={"message": {"content": "4"}, "done": True, "eval_count": 1}
+        )
+
+    service = make_service(
+        handler,
+        recording_logger,
+        response_cache=InMemoryResponseCache(ttl=60, max_entries=10),
+    )
+
+    async def run():
+        return [
+            await service.generate_response(prompt="2+2?", temperature=0),
+            await service.generate_response(prompt="2+2?", temperature=0),
+            await service.generate_response(prompt="2+2?", temperature=0.9),
+        ]
+
+    miss, hit, bypass = asyncio.run(run())
+
+    assert [r["usage"]["cache"] for r in (miss, hit, bypass)] == [
+        "miss",
+        "hit",
+        "bypass",
+    ]
+    assert hit["message"]["content"] == "4"
+    assert len(calls) == 2
+    # Only generations are billed with tokens in the interaction log
+    assert [r["completion_tokens"] for r in recording_logger.records] == [
+        1,
+        None,
+        1,
+    ]
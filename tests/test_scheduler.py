@@ -0,0 +1,197 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.ollama_pool import OllamaPool
+from app.services.scheduler import (
+    PRIORITY_API,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    Scheduler,
+    SchedulerBusy,
+    memory_footprint,
+)
+
+
+def test_memory_footprint_uses_model_family():
+    assert memory_footprint("mistral:7b-instruct-q4") == 4.1
+    assert memory_footprint("llama3.1:8b") == 4.9
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    scheduler = Scheduler(max_concurrency_per_model=1, memory_budget_gb=100)
+    order = []
+
+    async def run():
+        await scheduler.acquire("mistral")
+
+        async def wait(name, priority):
+            await scheduler.acquire("mistral", priority)
+            order.append(name)
+            scheduler.release("mistral")
+
+        tasks = [
+            asyncio.ensure_future(wait("batch", PRIORITY_BATCH)),
+            asyncio.ensure_future(wait("api", PRIORITY_API)),
+            asyncio.ensure_future(wait("ws-1", PRIORITY_INTERACTIVE)),
+            asyncio.ensure_future(wait("ws-2", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        scheduler.release("mistral")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["ws-1", "ws-2", "api", "batch"]
+
+
+def test_models_that_do_not_fit_in_memory_wait():
+    scheduler = Scheduler(max_concurrency_per_model=2, memory_budget_gb=6)
+
+    async def run():
+        await scheduler.acquire("mistral")
+        await scheduler.acquire("mistral")
+        # A small model fits alongside mistral, a second large one does not
+        await scheduler.acquire("tinyllama")
+        llama = asyncio.ensure_future(scheduler.acquire("llama3"))
+        await asyncio.sleep(0)
+        assert not llama.done()
+        for model in ("mistral", "mistral", "tinyllama"):
+            scheduler.release(model)
+        await llama
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["active"] == {"llama3": 1}
+
+
+def test_batch_waiters_age_past_newer_requests():
+    scheduler = Scheduler(
+        max_concurrency_per_model=1, memory_budget_gb=100, aging_seconds=0.05
+    )
+    order = []
+
+    async def run():
+        await scheduler.acquire("mistral")
+
+        async def wait(name, priority):
+            await scheduler.acquire("mistral", priority)
+            order.append(name)
+            scheduler.release("mistral")
+
+        batch = asyncio.ensure_future(wait("batch", PRIORITY_BATCH))
+        await asyncio.sleep(0.12)
+        api = asyncio.ensure_future(wait("api", PRIORITY_API))
+        await asyncio.sleep(0)
+        scheduler.release("mistral")
+        await asyncio.gather(batch, api)
+
+    asyncio.run(run())
+    assert order == ["batch", "api"]
+
+
+def test_models_kept_loaded_by_ollama_count_against_the_budget():
+    pool = OllamaPool(["http://a:11434"])
+    node = pool.nodes[0]
+    node.loaded = {"llama3:latest", "tinyllama:latest"}
+    node.loaded_sizes = {"llama3:latest": 5 * 1024**3}
+    scheduler = Scheduler(max_concurrency_per_model=2, memory_budget_gb=6, pool=pool)
+
+    async def run():
+        await scheduler.acquire("tinyllama")
+        # llama3 is idle but resident, so mistral no longer fits
+        mistral = asyncio.ensure_future(scheduler.acquire("mistral"))
+        await asyncio.sleep(0)
+        assert not mistral.done()
+        # Models already in memory are admitted without growing it
+        await scheduler.acquire("llama3")
+        stats = scheduler.stats()
+        mistral.cancel()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["resident_gb"] == 5.6
+    assert stats["active"] == {"tinyllama": 1, "llama3": 1}
+
+
+def test_limits_and_budget_follow_healthy_nodes():
+    pool = OllamaPool(["http://a:11434", "http://b:11434", "http://c:11434"])
+    pool.nodes[2].healthy = False
+    pool.nodes[1].models = {"llama3:latest"}
+    scheduler = Scheduler(max_concurrency_per_model=2, memory_budget_gb=8, pool=pool)
+
+    assert scheduler.limit("mistral") == 2
+    assert scheduler.limit("llama3") == 4
+    assert scheduler.memory_budget_gb == 16
+
+
+def test_remote_nodes_are_not_budgeted_from_local_memory(monkeypatch):
+    monkeypatch.setattr("app.services.scheduler.settings.SCHEDULER_MEMORY_BUDGET_GB", 0)
+
+    remote = Scheduler(pool=OllamaPool(["http://gpu-1:11434"]))
+    local = Scheduler(pool=OllamaPool(["http://localhost:11434"]))
+
+    assert remote.memory_budget_gb is None
+    assert remote.stats()["memory_budget_gb"] is None
+    assert local.memory_budget_gb > 0
+
+
+def test_saturated_requests_are_rejected_with_retry_after():
+    scheduler = Scheduler(max_concurrency_per_model=1, max_queue=1, max_wait=0.05)
+
+    async def run():
+        await scheduler.acquire("mistral")
+        queued = asyncio.ensure_future(scheduler.acquire("mistral"))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerBusy, match="queue is full"):
+            await scheduler.acquire("mistral")
+        with pytest.raises(SchedulerBusy, match="waited") as excinfo:
+            await queued
+        # Batch requests wait instead of being rejected
+        batch = asyncio.ensure_future(scheduler.acquire("mistral", PRIORITY_BATCH))
+        await asyncio.sleep(0.1)
+        assert not batch.done()
+        scheduler.release("mistral")
+        await batch
+        return excinfo.value
+
+    busy = asyncio.run(run())
+    assert busy.retry_after >= 1
+    assert scheduler.rejected == 2
+
+
+def test_generate_returns_429_when_busy(monkeypatch):
+    async def busy(**kwargs):
+        raise SchedulerBusy("Model mistral is busy", retry_after=7)
+
+    monkeypatch.setattr(routes.llm_service, "generate_response", busy)
+    response = TestClient(app).post("/api/generate", json={"prompt": "hi"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_generate_stream_is_closed_even_if_never_iterated(monkeypatch):
+    closed = []
+
+    async def stream(**kwargs):
+        try:
+            yield {"delta": "a"}
+            yield {"delta": "b"}
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(routes.llm_service, "generate_stream", stream)
+
+    async def disconnect_before_body():
+        response = await routes.generate_stream(routes.GenerateRequest(prompt="hi"))
+        await response.background()
+
+    asyncio.run(disconnect_before_body())
+    assert closed == [True]
+
+    response = TestClient(app).post("/api/generate/stream", json={"prompt": "hi"})
+    assert response.status_code == 200
+    assert closed == [True, True]
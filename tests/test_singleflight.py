@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+        assert flight.in_flight() == 0
+        return results
+
+    assert asyncio.run(run()) == ["result"] * 10
+    assert len(calls) == 1
+
+
+def test_errors_are_shared():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flight = SingleFlight()
+        return await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    async def work():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
+
+
+def test_stream_fans_out_to_late_subscribers():
+    started = []
+
+    async def produce():
+        started.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.005)
+            yield i
+
+    async def consume(flight, delay=0):
+        await asyncio.sleep(delay)
+        return [event async for event in flight.stream("k", produce)]
+
+    async def run():
+        flight = SingleFlight()
+        return await asyncio.gather(consume(flight), consume(flight, delay=0.007))
+
+    assert asyncio.run(run()) == [[0, 1, 2], [0, 1, 2]]
+    assert len(started) == 1
+
+
+def test_stream_is_cancelled_when_every_subscriber_leaves():
+    closed = []
+
+    async def produce():
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.005)
+                yield i
+        finally:
+            closed.append(True)
+
+    async def run():
+        flight = SingleFlight()
+        streams = [flight.stream("k", produce) for _ in range(2)]
+        assert [await stream.__anext__() for stream in streams] == [0, 0]
+        await streams[0].aclose()
+        assert await streams[1].__anext__() == 1
+        await streams[1].aclose()
+        await asyncio.sleep(0.01)
+        return flight.in_flight()
+
+    assert asyncio.run(run()) == 0
+    assert closed == [True]
+
+
+def test_identical_generations_hit_ollama_once(make_service):
+    calls = []
+
+    async def handler(request):
+        calls.append(json.loads(request.content))
+        await asyncio.sleep(0.01)
+        if calls[-1]["stream"]:
+            body = json.dumps({"message": {"content": "hi"}, "done": True}) + "\n"
+            return httpx.Response(200, content=body.encode())
+        return httpx.Response(200, json={"message": {"content": "hi"}, "done": True})
+
+    service = make_service(handler)
+
+    async def stream():
+        return [e async for e in service.generate_stream(prompt="same")]
+
+    async def run():
+        responses = await asyncio.gather(
+            *(service.generate_response(prompt="same") for _ in range(5))
+        )
+        streams = await asyncio.gather(*(stream() for _ in range(5)))
+        return responses, streams
+
+    responses, streams = asyncio.run(run())
+
+    assert {r["message"]["content"] for r in responses} == {"hi"}
+    assert all(s[0] == {"delta": "hi"} for s in streams)
+    assert len(calls) == 2